@@ -0,0 +1,119 @@
+# aho_corasick.py
+# ------------------------------------------------------------------
+# Autômato de Aho-Corasick para localizar milhares de termos (ex.: nomes
+# de partes carregados com carregar_termos_de_txt) em uma única passada
+# pelo texto da página, sem diferenciar maiúsculas/minúsculas nem acentos.
+# ------------------------------------------------------------------
+
+import unicodedata
+from collections import deque
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def _normalizar_char(c):
+    # Remove acento e caixa mantendo exatamente 1 caractere por caractere,
+    # para que os offsets do texto normalizado batam com os do original.
+    base = unicodedata.normalize("NFD", c)[0].casefold()[:1] or c
+    return " " if base.isspace() else base
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Normaliza o texto para a busca (sem acento, casefold, espaços e quebras
+    de linha viram ' '), preservando o comprimento e os offsets originais.
+    """
+    return "".join(map(_normalizar_char, texto))
+
+
+def normalizar_termo(termo: str) -> str:
+    """Normaliza um termo e colapsa espaços internos em um único ' '."""
+    return " ".join(normalizar_texto(termo).split())
+
+
+class AutomatoTermos:
+    """
+    Autômato de Aho-Corasick sobre termos normalizados.
+    • palavras_inteiras .. se True, só aceita ocorrências delimitadas por
+                           caracteres não alfanuméricos (evita 'Ana' em 'Banana')
+    """
+
+    def __init__(self, termos, palavras_inteiras: bool = True):
+        self.palavras_inteiras = palavras_inteiras
+        self._goto = [{}]
+        self._falha = [0]
+        self._saidas = [()]   # comprimentos dos termos que terminam em cada estado
+        self.total_termos = 0
+
+        for termo in termos:
+            termo_norm = normalizar_termo(termo)
+            if termo_norm:
+                self._inserir(termo_norm)
+        self._construir_falhas()
+
+    def _inserir(self, termo):
+        estado = 0
+        for c in termo:
+            proximo = self._goto[estado].get(c)
+            if proximo is None:
+                proximo = len(self._goto)
+                self._goto[estado][c] = proximo
+                self._goto.append({})
+                self._falha.append(0)
+                self._saidas.append(())
+            estado = proximo
+        if len(termo) not in self._saidas[estado]:
+            self._saidas[estado] += (len(termo),)
+            self.total_termos += 1
+
+    def _construir_falhas(self):
+        fila = deque(self._goto[0].values())
+        while fila:
+            estado = fila.popleft()
+            for c, proximo in self._goto[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and c not in self._goto[falha]:
+                    falha = self._falha[falha]
+                destino = self._goto[falha].get(c, 0)
+                self._falha[proximo] = destino if destino != proximo else 0
+                # Herda as saídas do estado de falha (termos que são sufixos)
+                self._saidas[proximo] += self._saidas[self._falha[proximo]]
+
+    def buscar(self, texto: str):
+        """
+        Percorre o texto uma única vez e devolve a lista de intervalos
+        (inicio, fim) de todas as ocorrências de termos.
+        O texto é normalizado internamente; os offsets valem para o original.
+        """
+        texto_norm = normalizar_texto(texto)
+        goto, falha, saidas = self._goto, self._falha, self._saidas
+        inteiras = self.palavras_inteiras
+        tamanho = len(texto_norm)
+        ocorrencias = []
+        estado = 0
+        for pos, c in enumerate(texto_norm):
+            while estado and c not in goto[estado]:
+                estado = falha[estado]
+            estado = goto[estado].get(c, 0)
+            for comprimento in saidas[estado]:
+                inicio, fim = pos + 1 - comprimento, pos + 1
+                if inteiras and ((inicio > 0 and texto_norm[inicio - 1].isalnum())
+                                 or (fim < tamanho and texto_norm[fim].isalnum())):
+                    continue
+                ocorrencias.append((inicio, fim))
+        return ocorrencias
+
+
+@lru_cache(maxsize=8)
+def _compilar_em_cache(termos: tuple, palavras_inteiras: bool):
+    return AutomatoTermos(termos, palavras_inteiras)
+
+
+def compilar_automato(termos, palavras_inteiras: bool = True) -> AutomatoTermos:
+    """
+    Compila (ou reaproveita do cache) o autômato para a lista de termos.
+    O cache é indexado pelo conjunto de termos (ordem e repetições não contam):
+    em um lote de arquivos com a mesma lista, a compilação acontece uma vez só.
+    """
+    return _compilar_em_cache(tuple(sorted(set(termos))), palavras_inteiras)
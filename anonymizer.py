@@ -1,15 +1,20 @@
 import fitz  # PyMuPDF
 import re
 import os
+import bisect
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
-# Configurar logging para o módulo anonymizer para ajudar na depuração.
-# Nível DEBUG para ver todas as mensagens detalhadas de busca de CPF.
-logging.basicConfig(level=logging.DEBUG, # Nível DEBUG para depuração
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    filename='anonymizer_process.log', # Log separado para anonymizer
-                    filemode='a', # 'a' para append, para não sobrescrever o log principal
-                    encoding='utf-8') # Garante que o log é UTF-8
+from streaming import copiar_janela, documento_estruturado, estrutura_nao_remontada, processar_em_janelas
+from compactacao import compactar_recursos
+from validacao import validar_cpfs
+from registro_log import AmostradorLog
+from redaction_engine import aplicar_redacoes, coalescer_retangulos, pode_conter_identificador
+
+# O logging é configurado pelos pontos de entrada (ver registro_log.py).
+# Eventos por match só aparecem com nível DEBUG, e por amostragem.
+_log_cpf_marcado = AmostradorLog(logging.DEBUG)
+_log_cpf_invalido = AmostradorLog(logging.WARNING)
 
 # REGEX 1 - CPF linha única
 cpf_regex_linha_unica = re.compile(
@@ -23,161 +28,283 @@ cpf_regex_quebra_linha = re.compile(
     r'(\d{3}[.\s]?\d{3}[.\s]?\d{3})(?:\s*[-–]?\s*\n\s*|\s+)(\d{2})'
 )
 
-def anonimizar_cpf_em_pagina(page):
+# Incrementar ao mudar as regexes ou a lógica de detecção de CPF:
+# invalida os resultados guardados em cache (ver cache_resultados.py).
+VERSAO_DETECTOR_CPF = 2
+
+# Dígitos de um CPF: páginas sem um trecho de dígitos desse tamanho são puladas
+DIGITOS_CPF = 11
+
+# Política para candidatos com dígitos verificadores inválidos:
+#   "todos" ..... tudo que tem o formato é redigido; os inválidos são reportados
+#                 (padrão: um CPF com um dígito mal reconhecido pelo OCR continua tarjado)
+#   "validos" ... só os CPFs válidos são redigidos (menos falsos positivos:
+#                 números de processo, telefones, códigos de barras)
+POLITICAS_CPF = ("validos", "todos")
+POLITICA_CPF_PADRAO = "todos"
+
+# Modo paralelo de anonymize_pdf: abaixo deste número de páginas por intervalo
+# o custo de abrir o arquivo em cada processo supera o ganho.
+MIN_PAGINAS_POR_INTERVALO = 8
+
+def mapear_palavras(word_list):
+    """
+    Constrói o texto linear da página a partir da saída de page.get_text("words")
+    e o mapa offset de caractere -> índice de palavra.
+    Palavras da mesma linha são separadas por espaço e cada troca de linha vira '\\n',
+    de modo que as duas regexes de CPF rodam sobre o mesmo texto.
+    Retorna (texto_linear, inicios), onde inicios[i] é o offset da palavra i.
+    """
+    partes = []
+    inicios = []
+    posicao = 0
+    linha_anterior = None
+    for indice, word in enumerate(word_list):
+        linha_atual = (word[5], word[6])  # (block_no, line_no)
+        if indice:
+            partes.append(" " if linha_atual == linha_anterior else "\n")
+            posicao += 1
+        inicios.append(posicao)
+        partes.append(word[4])
+        posicao += len(word[4])
+        linha_anterior = linha_atual
+    return "".join(partes), inicios
+
+
+def palavras_do_intervalo(inicios, inicio, fim):
+    """
+    Retorna os índices das palavras que intersectam o intervalo [inicio, fim)
+    do texto linear produzido por mapear_palavras.
+    """
+    primeira = max(bisect.bisect_right(inicios, inicio) - 1, 0)
+    ultima = bisect.bisect_left(inicios, fim) - 1
+    return range(primeira, ultima + 1)
+
+
+def retangulos_das_palavras(word_list, indices):
+    """
+    Converte índices de palavras em retângulos de redação, unindo as
+    palavras consecutivas de uma mesma linha em um único retângulo.
+    """
+    retangulos = []
+    linha_anterior = None
+    indice_anterior = None
+    for indice in sorted(indices):
+        word = word_list[indice]
+        linha_atual = (word[5], word[6])
+        rect = fitz.Rect(word[:4])
+        if retangulos and linha_atual == linha_anterior and indice == indice_anterior + 1:
+            retangulos[-1] |= rect
+        else:
+            retangulos.append(rect)
+        linha_anterior = linha_atual
+        indice_anterior = indice
+    return [r for r in retangulos if not r.is_empty]
+
+
+def localizar_cpfs(word_list, page_number=None, politica=POLITICA_CPF_PADRAO, estatisticas=None):
+    """
+    Localiza CPFs (linha única e quebrados) usando apenas a lista de palavras
+    da página, sem novas extrações de texto nem chamadas a page.search_for.
+    As duas regexes rodam sobre o texto linear; os candidatos da página têm
+    os dígitos verificadores conferidos de uma vez (validacao.validar_cpfs)
+    antes do mapeamento para as bounding boxes das palavras casadas.
+    • politica ...... ver POLITICAS_CPF
+    • estatisticas .. dict opcional; acumula "cpfs_validos" e "cpfs_invalidos"
+    Retorna a lista de retângulos (fitz.Rect) a serem redigidos.
+    """
+    if politica not in POLITICAS_CPF:
+        raise ValueError(f"Política de CPF desconhecida: {politica}")
+    page_text_linear, inicios = mapear_palavras(word_list)
+
+    # As duas regexes podem casar o mesmo trecho: cada (início, fim) conta uma vez
+    candidatos = {}
+    for regex in (cpf_regex_linha_unica, cpf_regex_quebra_linha):
+        for match in regex.finditer(page_text_linear):
+            candidatos.setdefault(match.span(), match)
+    candidatos = list(candidatos.values())
+    if not candidatos:
+        return []
+    validos = validar_cpfs([match.group(0) for match in candidatos])
+
+    palavras_marcadas = set()
+    for match, valido in zip(candidatos, validos):
+        if not valido:
+            if estatisticas is not None:
+                estatisticas["cpfs_invalidos"] = estatisticas.get("cpfs_invalidos", 0) + 1
+            if politica == "validos":
+                continue
+            _log_cpf_invalido.registrar("Candidato a CPF com dígito verificador inválido redigido (Pág %s).",
+                                        page_number)
+        elif estatisticas is not None:
+            estatisticas["cpfs_validos"] = estatisticas.get("cpfs_validos", 0) + 1
+        indices = palavras_do_intervalo(inicios, match.start(), match.end())
+        if not indices:
+            continue
+        # A adjacência no fluxo de palavras substitui a antiga heurística de
+        # proximidade entre retângulos do search_for para CPFs quebrados.
+        _log_cpf_marcado.registrar("CPF marcado (Pág %s) nas palavras %d-%d",
+                                   page_number, indices.start, indices.stop - 1)
+        palavras_marcadas.update(indices)
+
+    return retangulos_das_palavras(word_list, palavras_marcadas)
+
+
+def anonimizar_cpf_em_pagina(page, politica=POLITICA_CPF_PADRAO):
     """
     Função para adicionar anotações de redação para CPFs em linha única e quebrados.
-    Utiliza uma abordagem robusta de mapeamento de palavras para retângulos.
-    As redações serão aplicadas posteriormente em anonymize_pdf.
+    Faz uma única extração de texto (get_text("words")) e mapeia os matches
+    das regexes direto para as bounding boxes das palavras.
+    • politica ...... ver POLITICAS_CPF
+    Retorna a quantidade de retângulos redigidos na página.
     """
-    logging.debug(f"Iniciando busca detalhada por CPFs na página {page.number}...")
-    
-    # Extrai todas as palavras da página com suas bounding boxes.
     # Formato de word_list: [(x0, y0, x1, y1, word_text, block_no, line_no, word_no), ...]
-    word_list = page.get_text("words") 
-    
-    # Constrói uma string linear da página para aplicar as regex.
-    # Isso nos permite usar as regex do Python de forma confiável.
-    # Usamos um espaço como separador, pois é assim que as regex esperam.
-    page_text_linear = " ".join([word[4] for word in word_list]) 
-
-    redaction_rects = [] # Lista para armazenar todos os retângulos a serem redigidos
-
-    # --- 1. Busca por CPFs em linha única ---
-    for match_idx, match in enumerate(cpf_regex_linha_unica.finditer(page_text_linear)):
-        matched_string = match.group(0)
-        logging.debug(f"Regex linha única encontrou match #{match_idx+1}: '{matched_string}' na string linear.")
-        
-        # Encontra as palavras que correspondem a este match
-        # Percorre as palavras e verifica se o texto da palavra está contido no match
-        # ou se a sequência de palavras forma o match.
-        
-        # A forma mais precisa é encontrar os índices das palavras no `page_text_linear`
-        # e usar os retângulos das palavras originais.
-        
-        # Para simplificar e manter a robustez, vamos usar page.search_for()
-        # mas *apenas* para a string exata que a regex encontrou.
-        # Se search_for falhar aqui, o problema é no PDF ou na versão do PyMuPDF.
-        try:
-            # page.search_for(string) retorna uma lista de retângulos para a string.
-            # Se a string tem espaços, PyMuPDF tenta encontrar a sequência de palavras.
-            found_rects_for_match = page.search_for(matched_string)
-            
-            if found_rects_for_match:
-                for rect in found_rects_for_match:
-                    if rect and not rect.is_empty:
-                        redaction_rects.append(rect)
-                        logging.info(f"CPF linha única ENCONTRADO E MARCADO (Pág {page.number}): '{matched_string}' em {rect}")
-                    else:
-                        logging.warning(f"Retângulo inválido/vazio para CPF linha única: {rect}. Ignorando.")
-            else:
-                logging.debug(f"page.search_for não encontrou retângulos para o match de linha única: '{matched_string}'.")
-                # Se search_for falhar, podemos tentar uma abordagem mais manual aqui se for crítico.
-                # Por enquanto, confiamos que o get_text("words") e o search_for funcionam juntos.
-
-        except Exception as e:
-            logging.error(f"Erro ao buscar retângulos para CPF linha única '{matched_string}' na página {page.number}: {e}")
-
-    # --- 2. Busca por CPFs com quebra de linha ---
-    # Para CPFs quebrados, a abordagem de mapeamento de palavras é mais crucial.
-    # Vamos usar a `full_page_text` (com newlines) para a regex e depois mapear.
-    
-    # Extrai o texto da página com quebras de linha preservadas para a regex de quebra.
-    full_page_text_with_newlines = page.get_text("text") 
-
-    for match_idx, match in enumerate(cpf_regex_quebra_linha.finditer(full_page_text_with_newlines)):
-        matched_full_string = match.group(0)
-        part1_text = match.group(1).strip() 
-        part2_text = match.group(2).strip() 
-        
-        logging.debug(f"Regex de quebra encontrou match #{match_idx+1}: '{matched_full_string}' (Parte1: '{part1_text}', Parte2: '{part2_text}')")
-
-        if not part1_text or not part2_text:
-            logging.warning(f"Ignorando match de CPF quebrado devido a partes vazias. Match completo: '{matched_full_string}'")
-            continue 
-        
-        rects_part1 = []
-        rects_part2 = []
-
-        # Tenta buscar as partes individualmente.
-        # Se page.search_for falhar aqui, o problema está na forma como o texto está no PDF.
-        try:
-            rects_part1 = page.search_for(part1_text)
-        except Exception as e:
-            logging.error(f"Erro ao buscar '{part1_text}' (Parte1) na página {page.number}: {e}")
-            
-        try:
-            rects_part2 = page.search_for(part2_text)
-        except Exception as e:
-            logging.error(f"Erro ao buscar '{part2_text}' (Parte2) na página {page.number}: {e}")
-
-        if not rects_part1:
-            logging.debug(f"Parte 1 ('{part1_text}') do CPF quebrado não encontrada por search_for na página {page.number}. Pulando match.")
-            continue 
-        if not rects_part2:
-            logging.debug(f"Parte 2 ('{part2_text}') do CPF quebrado não encontrada por search_for na página {page.number}. Pulando match.")
-            continue 
-
-        found_and_redacted = False
-        for r_p1 in rects_part1:
-            for r_p2 in rects_part2:
-                # Heurística de proximidade para CPFs quebrados por linha
-                # r_p2.y0 > r_p1.y1 - 5: segunda parte começa levemente acima ou na mesma linha
-                # r_p2.y0 < r_p1.y1 + 30: segunda parte não está muito longe na vertical (proxima linha)
-                vertical_proximity_ok = (r_p2.y0 > r_p1.y1 - 5) and (r_p2.y0 < r_p1.y1 + 30)
-
-                # Horizontal alignment: x0 de r_p2 dentro de uma margem de x0 de r_p1
-                # r_p2.x0 < r_p1.x1 + 50: X de inicio da parte 2 não muito à direita do fim da parte 1
-                # r_p2.x1 > r_p1.x0 - 50: X de fim da parte 2 não muito à esquerda do inicio da parte 1
-                horizontal_alignment_ok = (r_p2.x0 < r_p1.x1 + 50) and (r_p2.x1 > r_p1.x0 - 50)
-                
-                if vertical_proximity_ok and horizontal_alignment_ok:
-                    combined_rect = r_p1 | r_p2 # União dos retângulos para cobrir ambas as partes
-
-                    logging.info(f"CPF quebrado ENCONTRADO E MARCADO (Pág {page.number}): '{part1_text}' @ {r_p1} + '{part2_text}' @ {r_p2}. Tarjando: {combined_rect}")
-                    
-                    if combined_rect and not combined_rect.is_empty: # Garante que o retângulo combinado é válido
-                        redaction_rects.append(combined_rect) # Adiciona à lista de redações
-                        found_and_redacted = True
-                        break # Encontrou um par, vai para o próximo match de regex
-                    else:
-                        logging.warning(f"Retângulo combinado de CPF quebrado inválido ou vazio: {combined_rect}. Ignorando redação na página {page.number}.")
-            if found_and_redacted:
-                break # Sai do loop de retângulos da parte 1 também
+    word_list = page.get_text("words")
+    if not pode_conter_identificador(word_list, DIGITOS_CPF):
+        logging.debug("Página %s sem trecho de %d dígitos: pulada", page.number, DIGITOS_CPF)
+        return 0
+    detectados = localizar_cpfs(word_list, page.number, politica)
+    redaction_rects = coalescer_retangulos(detectados)
+    logging.debug("Página %s: %d retângulos detectados, %d após a coalescência",
+                  page.number, len(detectados), len(redaction_rects))
 
     # *** CRÍTICO: Aplica todas as redações acumuladas nesta página ***
-    # Este é o comando que realmente oculta o texto fisicamente.
-    for rect in redaction_rects:
-        page.add_redact_annot(rect, fill=(0, 0, 0)) # Adiciona as anotações de redação
-    page.apply_redactions() # Aplica todas as redações de uma vez
-    logging.info(f"Página {page.number} processada para {os.path.basename(page.parent.name if hasattr(page.parent, 'name') else input_path)}")
+    # Este é o único apply_redactions da página; é ele que remove o texto fisicamente.
+    aplicar_redacoes(page, redaction_rects)
+    logging.debug("Página %s processada para %s", page.number, page.parent.name or "<memória>")
+    return len(redaction_rects)
 
 
-def anonymize_pdf(input_path, output_path):
+def detector_cpf(page, word_list):
+    """
+    Detector de CPF para o redaction_engine: reaproveita a lista de palavras
+    já extraída pelo motor, sem nova extração de texto (política padrão).
+    """
+    return localizar_cpfs(word_list, page.number)
+
+
+detector_cpf.digitos_minimos = DIGITOS_CPF
+
+
+def _anonimizar_paginas(doc, paginas, nome_arquivo, politica=POLITICA_CPF_PADRAO):
+    """
+    Anonimiza as páginas indicadas de um documento já aberto.
+    Usada tanto pelo caminho serial quanto pelos processos do modo paralelo,
+    garantindo a mesma cobertura de redação nos dois casos.
+    """
+    for page_num in paginas:
+        page = doc[page_num]
+        # anonimizar_cpf_em_pagina lida com ambos os tipos de CPF e faz o único
+        # apply_redactions da página (ver redaction_engine.aplicar_redacoes)
+        anonimizar_cpf_em_pagina(page, politica)
+        logging.debug("Página %d processada para %s", page_num + 1, nome_arquivo)
+
+
+def _anonimizar_intervalo(input_path, inicio, fim, politica=POLITICA_CPF_PADRAO):
+    """
+    Executada em um processo do pool: abre o PDF por conta própria,
+    anonimiza as páginas [inicio, fim) e devolve apenas esse trecho como bytes.
+    """
+    doc = fitz.open(input_path)
+    try:
+        _anonimizar_paginas(doc, range(inicio, fim), os.path.basename(input_path), politica)
+        doc.select(list(range(inicio, fim)))
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def _dividir_paginas(total_paginas, workers):
+    """
+    Divide o documento em intervalos contíguos de páginas [inicio, fim).
+    Gera alguns intervalos a mais que o número de workers para equilibrar a carga,
+    sem descer abaixo de MIN_PAGINAS_POR_INTERVALO páginas por intervalo.
+    """
+    tamanho = max(MIN_PAGINAS_POR_INTERVALO, -(-total_paginas // (workers * 2)))
+    return [(inicio, min(inicio + tamanho, total_paginas))
+            for inicio in range(0, total_paginas, tamanho)]
+
+
+def _anonimizar_em_paralelo(input_path, doc, workers, politica=POLITICA_CPF_PADRAO):
+    """
+    Distribui os intervalos de páginas entre processos e remonta o documento
+    com os trechos na ordem original das páginas.
+    A remontagem só leva páginas, metadados e sumário: links, formulários,
+    rótulos de página, anexos e JavaScript se perderiam, por isso só é usada
+    em documentos sem eles (ver streaming.estrutura_nao_remontada).
+    """
+    intervalos = _dividir_paginas(len(doc), workers)
+    logging.info(f"Anonimização paralela de {os.path.basename(input_path)}: "
+                 f"{len(intervalos)} intervalos em {workers} processos")
+
+    saida = fitz.open()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # executor.map devolve os resultados na ordem dos intervalos,
+        # o que garante a remontagem na ordem original das páginas.
+        trechos = executor.map(_anonimizar_intervalo,
+                               [input_path] * len(intervalos),
+                               [inicio for inicio, _ in intervalos],
+                               [fim for _, fim in intervalos],
+                               [politica] * len(intervalos))
+        for dados in trechos:
+            with fitz.open("pdf", dados) as trecho:
+                saida.insert_pdf(trecho)
+
+    saida.set_metadata(doc.metadata)
+    saida.set_toc(doc.get_toc(simple=False))
+    return saida
+
+
+def anonymize_pdf(input_path, output_path, workers=1, janela_paginas=None, politica=POLITICA_CPF_PADRAO):
     """
     Abre um PDF, anonimiza CPFs (linha única e quebrados) e salva.
     As regexes (cpf_regex_linha_unica, cpf_regex_quebra_linha) são globais e acessadas diretamente.
+    • workers ....... com workers > 1, as páginas são divididas em intervalos e processadas
+                      em um pool de processos; cada processo abre o arquivo por conta própria
+                      e o resultado é remontado na ordem original. Documentos com anotações,
+                      formulário, rótulos de página, anexos ou JavaScript seguem em série.
+    • janela_paginas  se informado, processa em janelas de páginas gravadas incrementalmente,
+                      com memória limitada independente do número de páginas. Documentos
+                      com anotações, formulário, rótulos de página etc. são processados
+                      inteiros, como no modo paralelo.
+    • politica ...... candidatos com dígito verificador inválido (ver POLITICAS_CPF)
     """
-    doc = fitz.open(input_path)
-    logging.info(f"Iniciando anonimização de PDF: {os.path.basename(input_path)}")
+    if janela_paginas:
+        nao_remontada = documento_estruturado(input_path)
+        if nao_remontada:
+            logging.info(f"{os.path.basename(input_path)} tem {', '.join(nao_remontada)}: anonimização sem janelas")
+            janela_paginas = None
+    if janela_paginas:
+        nome_arquivo = os.path.basename(input_path)
 
-    for page_num, page in enumerate(doc):
-        # A função anonimizar_cpf_em_pagina agora lida com ambos os tipos de CPF
-        # e adiciona as anotações de redação à página.
-        anonimizar_cpf_em_pagina(page)
-        # O apply_redactions() agora está dentro de anonimizar_cpf_em_pagina,
-        # portanto, cada página é processada e as redações são aplicadas imediatamente.
-        # Isso pode ser ajustado para apply_redactions() no final do loop da página em anonymize_pdf
-        # se preferir aplicar todas as redações de uma vez por documento.
-        # Para evitar chamadas duplicadas, vamos mover o apply_redactions() para fora de anonimizar_cpf_em_pagina,
-        # e chamá-lo uma vez por página aqui.
+        def gerar_janela(source_doc, inicio, fim):
+            parte = copiar_janela(source_doc, inicio, fim)
+            _anonimizar_paginas(parte, range(len(parte)), nome_arquivo, politica)
+            return parte
 
-        # Removido apply_redactions() de dentro de anonimizar_cpf_em_pagina
-        # e adicionado aqui para que todas as redações da página sejam aplicadas de uma vez.
-        page.apply_redactions() 
-        logging.info(f"Página {page_num + 1} processada para {os.path.basename(input_path)}")
+        processar_em_janelas(input_path, output_path, gerar_janela, janela_paginas)
+        logging.info(f"Anonimização em janelas concluída e salvo: {os.path.basename(output_path)}")
+        return
 
+    doc = fitz.open(input_path)
+    logging.info(f"Iniciando anonimização de PDF: {os.path.basename(input_path)}")
+
+    paralelo = workers > 1 and len(doc) > MIN_PAGINAS_POR_INTERVALO
+    if paralelo:
+        nao_remontada = estrutura_nao_remontada(doc)
+        if nao_remontada:
+            # A remontagem perderia essas estruturas (ver _anonimizar_em_paralelo)
+            logging.info(f"{os.path.basename(input_path)} tem {', '.join(nao_remontada)}: anonimização em série")
+            paralelo = False
+    if paralelo:
+        saida = _anonimizar_em_paralelo(input_path, doc, workers, politica)
+        doc.close()
+        doc = saida
+    else:
+        _anonimizar_paginas(doc, range(len(doc)), os.path.basename(input_path), politica)
 
     try:
+        compactar_recursos(doc)
         doc.save(output_path, garbage=4, deflate=True, clean=True, incremental=False)
         doc.close()
         logging.info(f"Anonimização concluída e salvo: {os.path.basename(output_path)}")
@@ -188,10 +315,12 @@ def anonymize_pdf(input_path, output_path):
 
 if __name__ == "__main__":
     # Este bloco de teste é para uso direto do módulo anonymizer.py, não da GUI.
+    from registro_log import configurar_logging
     try:
         # Importa load_config de config_gui.py
         from config_gui import load_config as load_app_config # Mantido para compatibilidade do teste direto
         config = load_app_config()
+        configurar_logging(config, "anonymizer_process.log")
         input_dir = config.get("paths", {}).get("input_pdfs", "input_pdfs")
         output_dir = config.get("paths", {}).get("anonymized_pdfs", "anonymized_pdfs")
     except ImportError:
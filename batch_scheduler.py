@@ -0,0 +1,132 @@
+# batch_scheduler.py
+# ------------------------------------------------------------------
+# Agendador de lotes: processa vários PDFs ao mesmo tempo em um pool
+# de threads, com um limite próprio para subprocessos pesados
+# (ocrmypdf, Ghostscript), progresso agregado de todos os arquivos e
+# cancelamento que interrompe inclusive os subprocessos em andamento.
+#
+# O MuPDF não é thread-safe, então as etapas que usam PyMuPDF devem
+# rodar dentro de `trava_mupdf`, uma trava global: redação, binarização
+# e gravação de arquivos diferentes nunca rodam ao mesmo tempo. O ganho
+# de paralelismo vem só das etapas externas (OCR e compressão pelo gs),
+# que rodam fora da trava; num lote sem elas, workers > 1 não acelera.
+# ------------------------------------------------------------------
+
+import logging
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Serializa o uso do PyMuPDF entre as threads do lote
+trava_mupdf = threading.RLock()
+
+# Limite global de subprocessos simultâneos (ver configurar_limite_subprocessos)
+_limite_subprocessos = threading.BoundedSemaphore(2)
+
+# Intervalo de verificação do cancel_event enquanto espera um subprocesso
+_INTERVALO_POLL = 0.2
+
+
+class ProcessamentoCancelado(Exception):
+    """Levantada quando o cancel_event é acionado durante uma etapa."""
+
+
+def configurar_limite_subprocessos(limite: int) -> None:
+    """Define quantos subprocessos (ocrmypdf/gs) podem rodar ao mesmo tempo."""
+    global _limite_subprocessos
+    _limite_subprocessos = threading.BoundedSemaphore(max(1, limite))
+
+
+def executar_subprocesso(command, cancel_event=None, **kwargs) -> None:
+    """
+    Equivalente a subprocess.run(command, check=True, **kwargs), respeitando o
+    limite de subprocessos simultâneos e encerrando o processo se o
+    cancel_event for acionado.
+    """
+    semaforo = _limite_subprocessos
+    while not semaforo.acquire(timeout=_INTERVALO_POLL):
+        if cancel_event is not None and cancel_event.is_set():
+            raise ProcessamentoCancelado()
+    try:
+        processo = subprocess.Popen(command, **kwargs)
+        while True:
+            try:
+                retorno = processo.wait(timeout=_INTERVALO_POLL)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel_event is not None and cancel_event.is_set():
+                    processo.terminate()
+                    try:
+                        processo.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        processo.kill()
+                        processo.wait()
+                    raise ProcessamentoCancelado()
+        if retorno != 0:
+            raise subprocess.CalledProcessError(retorno, command)
+    finally:
+        semaforo.release()
+
+
+class AgendadorLote:
+    """
+    Executa uma função por arquivo em um pool de threads.
+    • workers ........... arquivos processados ao mesmo tempo (as etapas em PyMuPDF
+                          continuam uma de cada vez, sob trava_mupdf)
+    • cancel_event ...... threading.Event compartilhado por todos os arquivos
+    • progress_callback . função (mensagem, progresso_total 0..1) chamada a cada
+                          atualização de qualquer arquivo
+    """
+
+    def __init__(self, workers: int = 1, cancel_event=None, progress_callback=None):
+        self.workers = max(1, workers)
+        self.cancel_event = cancel_event or threading.Event()
+        self.progress_callback = progress_callback
+        self._fracoes = []
+        self._pesos = []
+        self._trava = threading.Lock()
+
+    def _reportar(self, indice, mensagem, fracao):
+        with self._trava:
+            self._fracoes[indice] = min(max(fracao, self._fracoes[indice]), 1.0)
+            total = sum(f * p for f, p in zip(self._fracoes, self._pesos)) / sum(self._pesos)
+        if self.progress_callback:
+            self.progress_callback(mensagem, total)
+
+    def _executar_item(self, indice, item, funcao):
+        if self.cancel_event.is_set():
+            return None
+        reportar = lambda mensagem, fracao: self._reportar(indice, mensagem, fracao)
+        try:
+            resultado = funcao(indice, item, reportar)
+        except ProcessamentoCancelado:
+            logging.info(f"Arquivo {indice + 1} cancelado.")
+            return None
+        reportar(f"Arquivo {indice + 1}/{len(self._fracoes)} concluído.", 1.0)
+        return resultado
+
+    def executar(self, itens, funcao, pesos=None):
+        """
+        Chama funcao(indice, item, reportar) para cada item, onde
+        reportar(mensagem, fracao_do_arquivo) atualiza o progresso agregado.
+        • pesos .. custo relativo de cada item no progresso agregado (ex.: tempo
+                   previsto); se omitido, todos os itens pesam o mesmo
+        Exceções de um arquivo não interrompem os demais; são devolvidas no
+        lugar do resultado daquele arquivo. Retorna os resultados na ordem dos itens.
+        """
+        itens = list(itens)
+        self._fracoes = [0.0] * len(itens)
+        self._pesos = [max(p, 1e-9) for p in pesos] if pesos else [1.0] * len(itens)
+        inicio = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="lote") as executor:
+            futuros = [executor.submit(self._executar_item, i, item, funcao) for i, item in enumerate(itens)]
+            resultados = []
+            for futuro in futuros:
+                try:
+                    resultados.append(futuro.result())
+                except Exception as e:
+                    resultados.append(e)
+        logging.info(f"Lote de {len(itens)} arquivos concluído em {time.time() - inicio:.1f}s "
+                     f"com {self.workers} workers.")
+        return resultados
@@ -0,0 +1,217 @@
+# bench_anonimizacao.py
+# ------------------------------------------------------------------
+# Benchmark dos caminhos quentes da anonimização sobre o corpus
+# sintético (ver corpus_sintetico.py): anonimizar_cpf_em_pagina,
+# anonymize_pdf, anonymize_manual com 10/1.000/10.000 termos,
+# binarizar_pdf (o antigo _binarize_pdf), a gravação (salvar_pdf) e o
+# modo em janelas do streaming.py, com e sem a compactação final.
+#
+# Cada caso roda num processo próprio, para que o pico de memória (RSS)
+# seja só dele; o tempo é o melhor de --repeticoes execuções. O
+# resultado (páginas/s e pico de RSS) é comparado com a linha de base
+# guardada em benchmarks/baseline.json: um caso mais lento ou com mais
+# memória que a tolerância conta como regressão (código de saída 1).
+#
+# Uso:  python benchmarks/bench_anonimizacao.py [--corpus pasta] [--casos cpf,manual]
+#                                              [--repeticoes 3] [--rapido]
+#                                              [--salvar-baseline] [--sem-baseline] [--tolerancia 0.2]
+# A linha de base é por máquina e não vem no repositório: gere a sua com
+# --salvar-baseline. Sem ela (ou sem algum dos casos pedidos) nada é
+# comparado e a saída é 2; --sem-baseline só mede, com saída 0.
+# ------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus_sintetico import gerar_corpus, gerar_termos, PAGINAS_GRANDE_PADRAO  # noqa: E402
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOLERANCIA_PADRAO = 0.2
+
+
+def _pico_rss_mb():
+    # Pico de memória residente do processo atual, em MiB (None se não houver como medir)
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+# --- casos: cada um recebe (caminho, pasta_saida, parametro) e roda a operação uma vez ---
+
+def _caso_cpf_em_pagina(caminho, pasta_saida, _):
+    from anonymizer import anonimizar_cpf_em_pagina
+    with fitz.open(caminho) as doc:
+        for page in doc:
+            anonimizar_cpf_em_pagina(page)
+
+
+def _caso_anonymize_pdf(caminho, pasta_saida, _):
+    from anonymizer import anonymize_pdf
+    anonymize_pdf(caminho, os.path.join(pasta_saida, "anonymize_pdf.pdf"))
+
+
+def _caso_anonymize_manual(caminho, pasta_saida, parametro):
+    from manual_anonymizer import anonymize_manual
+    quantidade, usar_automato = parametro
+    anonymize_manual(caminho, os.path.join(pasta_saida, "manual.pdf"), gerar_termos(quantidade),
+                     usar_automato=usar_automato)
+
+
+def _caso_binarizar(caminho, pasta_saida, _):
+    from ocr import binarizar_pdf
+    binarizar_pdf(caminho, os.path.join(pasta_saida, "binarizado.pdf"))
+
+
+def _caso_salvar(caminho, pasta_saida, _):
+    from redaction_engine import salvar_pdf
+    with fitz.open(caminho) as doc:
+        salvar_pdf(doc, os.path.join(pasta_saida, "salvo.pdf"))
+
+
+def _caso_janelas(caminho, pasta_saida, compactar):
+    from streaming import copiar_janela, processar_em_janelas
+    processar_em_janelas(caminho, os.path.join(pasta_saida, "janelas.pdf"), copiar_janela, 50,
+                         compactar=compactar)
+
+
+# nome: (função, tipo do corpus, parâmetro)
+CASOS = {
+    "cpf_em_pagina/cpf_denso": (_caso_cpf_em_pagina, "cpf_denso", None),
+    "cpf_em_pagina/cpf_quebrado": (_caso_cpf_em_pagina, "cpf_quebrado", None),
+    "anonymize_pdf/texto": (_caso_anonymize_pdf, "texto", None),
+    "anonymize_pdf/cpf_denso": (_caso_anonymize_pdf, "cpf_denso", None),
+    "anonymize_pdf/misto": (_caso_anonymize_pdf, "misto", None),
+    "anonymize_pdf/grande": (_caso_anonymize_pdf, "grande", None),
+    "manual/10_termos": (_caso_anonymize_manual, "texto", (10, False)),
+    "manual/1k_termos": (_caso_anonymize_manual, "texto", (1000, False)),
+    "manual/10k_termos": (_caso_anonymize_manual, "texto", (10000, False)),
+    "manual_automato/1k_termos": (_caso_anonymize_manual, "texto", (1000, True)),
+    "manual_automato/10k_termos": (_caso_anonymize_manual, "texto", (10000, True)),
+    "binarizar/digitalizado": (_caso_binarizar, "digitalizado", None),
+    "binarizar/misto": (_caso_binarizar, "misto", None),
+    "salvar/grande": (_caso_salvar, "grande", None),
+    # Com --rapido o documento grande tem 100 páginas: comparar os dois mostra se a memória
+    # cresce com as páginas (a compactação final carrega o arquivo inteiro)
+    "janelas/grande": (_caso_janelas, "grande", False),
+    "janelas_compactar/grande": (_caso_janelas, "grande", True),
+}
+
+# Casos omitidos com --rapido (os mais demorados)
+CASOS_LENTOS = {"manual/10k_termos"}
+
+
+def _executar_caso(nome, caminho, paginas, repeticoes):
+    # Roda no processo filho: melhor tempo de `repeticoes` e pico de RSS do processo
+    funcao, _, parametro = CASOS[nome]
+    melhor = None
+    with tempfile.TemporaryDirectory(prefix="bench_") as pasta_saida:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao(caminho, pasta_saida, parametro)
+            duracao = time.perf_counter() - inicio
+            melhor = duracao if melhor is None else min(melhor, duracao)
+    return {"segundos": melhor, "paginas": paginas, "paginas_por_segundo": paginas / melhor,
+            "pico_rss_mb": _pico_rss_mb()}
+
+
+def _comparar(resultado, base, tolerancia):
+    # Lista de avisos de regressão do caso frente à linha de base
+    avisos = []
+    if base.get("paginas_por_segundo") and \
+            resultado["paginas_por_segundo"] < base["paginas_por_segundo"] * (1 - tolerancia):
+        avisos.append(f"vazão {resultado['paginas_por_segundo'] / base['paginas_por_segundo']:.2f}x")
+    if base.get("pico_rss_mb") and resultado["pico_rss_mb"] and \
+            resultado["pico_rss_mb"] > base["pico_rss_mb"] * (1 + tolerancia):
+        avisos.append(f"memória {resultado['pico_rss_mb'] / base['pico_rss_mb']:.2f}x")
+    return avisos
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos quentes da anonimização")
+    parser.add_argument("--corpus", help="Pasta do corpus sintético (padrão: pasta temporária do sistema)")
+    parser.add_argument("--casos", help="Só os casos cujo nome contém um destes trechos (separados por vírgula)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--rapido", action="store_true",
+                        help=f"Documento grande com 100 páginas em vez de {PAGINAS_GRANDE_PADRAO} e sem os casos mais lentos")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO)
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os resultados como nova linha de base")
+    parser.add_argument("--sem-baseline", action="store_true",
+                        help="Só mede: não acusa erro se a linha de base não existir")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO,
+                        help="Fração de piora aceita antes de acusar regressão")
+    args = parser.parse_args(argv)
+
+    pasta_corpus = args.corpus or os.path.join(tempfile.gettempdir(), "anonimizador_corpus")
+    corpus = gerar_corpus(pasta_corpus, paginas_grande=100 if args.rapido else PAGINAS_GRANDE_PADRAO)
+
+    nomes = list(CASOS)
+    if args.casos:
+        filtros = [f.strip() for f in args.casos.split(",") if f.strip()]
+        nomes = [n for n in nomes if any(f in n for f in filtros)]
+    if args.rapido:
+        nomes = [n for n in nomes if n not in CASOS_LENTOS]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    sem_base = [n for n in nomes if n not in baseline]
+    if sem_base and not args.salvar_baseline:
+        print(f"AVISO: {len(sem_base)} de {len(nomes)} caso(s) sem linha de base em {args.baseline}; "
+              f"nenhuma regressão será detectada neles. Gere a linha de base desta máquina com "
+              f"--salvar-baseline.", file=sys.stderr, flush=True)
+
+    resultados = {}
+    regressoes = 0
+    print(f"{'caso':<30} {'páginas':>7} {'s':>9} {'pág/s':>10} {'RSS MiB':>9}  vs. baseline")
+    for nome in nomes:
+        caminho, paginas = corpus[CASOS[nome][1]]
+        # Um processo por caso: o pico de RSS não carrega o dos casos anteriores
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            resultado = executor.submit(_executar_caso, nome, caminho, paginas, args.repeticoes).result()
+        resultados[nome] = resultado
+
+        comparacao = "sem baseline"
+        if nome in baseline:
+            avisos = _comparar(resultado, baseline[nome], args.tolerancia)
+            razao = resultado["paginas_por_segundo"] / baseline[nome]["paginas_por_segundo"]
+            comparacao = f"{razao:.2f}x" + (f"  REGRESSÃO ({', '.join(avisos)})" if avisos else "")
+            regressoes += bool(avisos)
+        rss = f"{resultado['pico_rss_mb']:9.1f}" if resultado["pico_rss_mb"] is not None else f"{'-':>9}"
+        print(f"{nome:<30} {paginas:7d} {resultado['segundos']:9.3f} {resultado['paginas_por_segundo']:10.1f} "
+              f"{rss}  {comparacao}", flush=True)
+
+    if args.salvar_baseline:
+        baseline.update(resultados)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print(f"Linha de base gravada em {args.baseline}")
+    elif regressoes:
+        print(f"{regressoes} caso(s) com regressão acima de {args.tolerancia:.0%}.")
+        return 1
+    elif sem_base and not args.sem_baseline:
+        print(f"AVISO: sem linha de base para {', '.join(sem_base)}: resultado não comparado.", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
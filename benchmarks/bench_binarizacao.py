@@ -0,0 +1,79 @@
+# bench_binarizacao.py
+# ------------------------------------------------------------------
+# Compara, por página, a binarização antiga (PNG -> PIL -> PNG ->
+# insert_image) com a nova de binarizer.py (buffer do pixmap + Flate
+# de 1 bit, sem PNG intermediário), além dos métodos Otsu e Sauvola.
+#
+# Uso:  python benchmarks/bench_binarizacao.py [--paginas 10] [--dpi 300]
+# ------------------------------------------------------------------
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from binarizer import binarizar_pagina, METODOS_BINARIZACAO  # noqa: E402
+
+
+def _binarizar_pagina_png(page, output_doc, dpi):
+    # Caminho anterior de App._binarize_pdf, mantido aqui apenas como referência
+    pix = page.get_pixmap(dpi=dpi)
+    img = Image.open(io.BytesIO(pix.tobytes("png"))).convert('1', dither=Image.Dither.FLOYDSTEINBERG)
+    img_buffer = io.BytesIO()
+    img.save(img_buffer, format="PNG")
+    new_page = output_doc.new_page(width=page.rect.width, height=page.rect.height)
+    new_page.insert_image(page.rect, stream=img_buffer.getvalue())
+
+
+def _documento_sintetico(paginas):
+    doc = fitz.open()
+    for n in range(paginas):
+        page = doc.new_page()
+        y = 60
+        while y < page.rect.height - 60:
+            page.insert_text((60, y), f"Página {n + 1} - linha de texto de teste com CPF 123.456.789-09", fontsize=10)
+            y += 14
+        page.draw_rect(fitz.Rect(60, 60, 300, 200), color=(0.3, 0.3, 0.3), fill=(0.8, 0.8, 0.8))
+    return doc
+
+
+def _medir(funcao, source_doc, dpi):
+    output_doc = fitz.open()
+    inicio = time.perf_counter()
+    for page in source_doc:
+        funcao(page, output_doc, dpi)
+    duracao = time.perf_counter() - inicio
+    tamanho = len(output_doc.tobytes(garbage=4, deflate=True))
+    output_doc.close()
+    return duracao / len(source_doc), tamanho
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da binarização por página")
+    parser.add_argument("--paginas", type=int, default=10)
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+
+    source_doc = _documento_sintetico(args.paginas)
+    antigo, tamanho_antigo = _medir(_binarizar_pagina_png, source_doc, args.dpi)
+    novo, tamanho_novo = _medir(binarizar_pagina, source_doc, args.dpi)
+
+    print(f"Páginas: {args.paginas} | DPI: {args.dpi}")
+    print(f"PNG (antigo) ...... {antigo * 1000:8.1f} ms/página | saída {tamanho_antigo / 1024:8.1f} KiB")
+    print(f"Direto (novo) ..... {novo * 1000:8.1f} ms/página | saída {tamanho_novo / 1024:8.1f} KiB")
+    print(f"Ganho ............. {antigo / novo:8.2f}x")
+
+    for metodo in METODOS_BINARIZACAO:
+        if metodo == "floyd":
+            continue
+        tempo, tamanho = _medir(lambda page, out, dpi: binarizar_pagina(page, out, dpi, metodo), source_doc, args.dpi)
+        print(f"{metodo:<18} {tempo * 1000:8.1f} ms/página | saída {tamanho / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
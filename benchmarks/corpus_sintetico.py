@@ -0,0 +1,172 @@
+# corpus_sintetico.py
+# ------------------------------------------------------------------
+# Gera um corpus de PDFs sintéticos e reproduzíveis (mesma semente =
+# mesmo conteúdo) para os benchmarks do anonimizador:
+#   texto ........... páginas só com texto (folha de pagamento fictícia)
+#   digitalizado .... páginas só com imagem (texto renderizado, sem camada de texto)
+#   misto ........... páginas de texto e digitalizadas alternadas
+#   cpf_denso ....... tabelas com dezenas de CPFs por página
+#   cpf_quebrado .... CPFs partidos entre duas linhas (ver cpf_regex_quebra_linha)
+#   grande .......... 1.000+ páginas de texto
+# Os nomes usados no texto vêm de gerar_termos(), para que a
+# anonimização manual encontre ocorrências.
+#
+# Uso:  python benchmarks/corpus_sintetico.py pasta_destino [--paginas-grande 1000] [--semente 2024]
+# ------------------------------------------------------------------
+
+import argparse
+import os
+import random
+
+import fitz  # PyMuPDF
+
+SEMENTE_PADRAO = 2024
+PAGINAS_GRANDE_PADRAO = 1000
+
+# Incrementar ao mudar o conteúdo gerado: invalida corpus reaproveitados
+VERSAO_CORPUS = 1
+
+_NOMES = ["Maria", "José", "Ana", "João", "Antônio", "Francisca", "Carlos", "Paulo", "Pedro", "Lucas",
+          "Luiz", "Marcos", "Luís", "Gabriel", "Rafael", "Daniel", "Marcelo", "Bruno", "Eduardo", "Felipe",
+          "Raimundo", "Rodrigo", "Adriana", "Juliana", "Márcia", "Fernanda", "Patrícia", "Aline", "Sandra"]
+_SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+               "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes",
+               "Vieira", "Barbosa", "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques"]
+
+_MARGEM = 50
+_ENTRELINHA = 13
+_CORPO = 9
+
+
+def gerar_cpf(rng: random.Random, valido: bool = True) -> str:
+    """CPF formatado (000.000.000-00); com valido=False o 2º dígito verificador fica errado."""
+    digitos = [rng.randrange(10) for _ in range(9)]
+    for pesos in (range(10, 1, -1), range(11, 1, -1)):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) * 10 % 11
+        digitos.append(0 if resto == 10 else resto)
+    if not valido:
+        digitos[10] = (digitos[10] + 1) % 10
+    n = "".join(map(str, digitos))
+    return f"{n[:3]}.{n[3:6]}.{n[6:9]}-{n[9:]}"
+
+
+def gerar_termos(quantidade: int, semente: int = SEMENTE_PADRAO) -> list:
+    """Nomes completos distintos ("Nome Sobrenome Sobrenome") para a anonimização manual."""
+    rng = random.Random(semente)
+    termos = set()
+    while len(termos) < quantidade:
+        termos.add(f"{rng.choice(_NOMES)} {rng.choice(_SOBRENOMES)} {rng.choice(_SOBRENOMES)}")
+    return sorted(termos)
+
+
+def _linhas_da_pagina(rng, termos, cpfs_por_linha=0.2):
+    # Linhas de uma folha de pagamento fictícia; parte delas com CPF
+    linhas = []
+    for i in range(int((842 - 2 * _MARGEM) / _ENTRELINHA)):
+        nome = rng.choice(termos)
+        if rng.random() < cpfs_por_linha:
+            linhas.append(f"{i + 1:03d}  {nome:<34} CPF {gerar_cpf(rng, rng.random() > 0.1)}  R$ {rng.randint(1500, 25000)},00")
+        else:
+            linhas.append(f"{i + 1:03d}  {nome:<34} Matrícula {rng.randint(10000, 99999)}  Lotação {rng.randint(1, 40):02d}")
+    return linhas
+
+
+def _pagina_texto(doc, linhas, fonte=None):
+    # Um TextWriter por página: insert_text linha a linha fica lento em documentos grandes
+    page = doc.new_page(width=595, height=842)
+    escrita = fitz.TextWriter(page.rect)
+    fonte = fonte or fitz.Font("cour")
+    y = _MARGEM
+    for linha in linhas:
+        escrita.append((_MARGEM, y), linha, font=fonte, fontsize=_CORPO)
+        y += _ENTRELINHA
+    escrita.write_text(page)
+    return page
+
+
+def _pagina_digitalizada(doc, linhas, dpi=150):
+    # Renderiza a página de texto e insere só a imagem, como um scanner faria
+    rascunho = fitz.open()
+    pix = _pagina_texto(rascunho, linhas).get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    page = doc.new_page(width=595, height=842)
+    page.insert_image(page.rect, stream=pix.tobytes("png"))
+    rascunho.close()
+    return page
+
+
+def _pagina_cpf_quebrado(doc, rng, termos):
+    # O CPF começa no fim de uma linha e os dois dígitos verificadores vão para a seguinte
+    linhas = []
+    for _ in range(int((842 - 2 * _MARGEM) / (2 * _ENTRELINHA))):
+        cpf = gerar_cpf(rng)
+        linhas.append(f"Declaro que {rng.choice(termos)}, inscrito(a) no CPF sob o nº {cpf[:11]}-")
+        linhas.append(f"{cpf[12:]}, residente nesta cidade, compareceu.")
+    return _pagina_texto(doc, linhas)
+
+
+def gerar_documento(tipo: str, paginas: int, semente: int = SEMENTE_PADRAO, termos=None) -> fitz.Document:
+    """Documento em memória do `tipo` (ver TIPOS_CORPUS) com `paginas` páginas."""
+    rng = random.Random(f"{semente}-{tipo}")
+    termos = termos or gerar_termos(200, semente)
+    doc = fitz.open()
+    for n in range(paginas):
+        if tipo == "texto" or tipo == "grande":
+            _pagina_texto(doc, _linhas_da_pagina(rng, termos))
+        elif tipo == "digitalizado":
+            _pagina_digitalizada(doc, _linhas_da_pagina(rng, termos))
+        elif tipo == "misto":
+            linhas = _linhas_da_pagina(rng, termos)
+            (_pagina_digitalizada if n % 2 else _pagina_texto)(doc, linhas)
+        elif tipo == "cpf_denso":
+            _pagina_texto(doc, _linhas_da_pagina(rng, termos, cpfs_por_linha=1.0))
+        elif tipo == "cpf_quebrado":
+            _pagina_cpf_quebrado(doc, rng, termos)
+        else:
+            raise ValueError(f"Tipo de corpus desconhecido: {tipo}")
+    doc.set_metadata({"title": f"Corpus sintético {tipo} v{VERSAO_CORPUS}", "creationDate": "", "modDate": ""})
+    return doc
+
+
+# Páginas de cada tipo no corpus padrão ("grande" usa paginas_grande)
+TIPOS_CORPUS = {
+    "texto": 20,
+    "digitalizado": 10,
+    "misto": 10,
+    "cpf_denso": 20,
+    "cpf_quebrado": 20,
+    "grande": PAGINAS_GRANDE_PADRAO,
+}
+
+
+def gerar_corpus(pasta: str, semente: int = SEMENTE_PADRAO, paginas_grande: int = PAGINAS_GRANDE_PADRAO) -> dict:
+    """
+    Grava o corpus em `pasta` (reaproveita arquivos já gerados com a mesma
+    semente/versão). Retorna {tipo: (caminho, páginas)}.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    termos = gerar_termos(200, semente)
+    corpus = {}
+    for tipo, paginas in TIPOS_CORPUS.items():
+        if tipo == "grande":
+            paginas = paginas_grande
+        caminho = os.path.join(pasta, f"{tipo}_{paginas}p_s{semente}_v{VERSAO_CORPUS}.pdf")
+        if not os.path.exists(caminho):
+            with gerar_documento(tipo, paginas, semente, termos) as doc:
+                doc.save(caminho + ".tmp", garbage=3, deflate=True)
+            os.replace(caminho + ".tmp", caminho)
+        corpus[tipo] = (caminho, paginas)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o corpus sintético dos benchmarks")
+    parser.add_argument("pasta")
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    parser.add_argument("--paginas-grande", type=int, default=PAGINAS_GRANDE_PADRAO)
+    args = parser.parse_args()
+    for tipo, (caminho, paginas) in gerar_corpus(args.pasta, args.semente, args.paginas_grande).items():
+        print(f"{tipo:<14} {paginas:6d} páginas  {os.path.getsize(caminho) / 1024:10.1f} KiB  {caminho}")
+
+
+if __name__ == "__main__":
+    main()
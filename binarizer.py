@@ -0,0 +1,204 @@
+# binarizer.py
+# ------------------------------------------------------------------
+# Binarização de páginas para o modo OCR "mono" sem o vaivém de PNG:
+# a página é renderizada direto em tons de cinza, o buffer de amostras
+# do pixmap é usado sem cópia, o resultado de 1 bit é codificado em
+# Flate de 1 bit ou CCITT G4 e inserido no PDF como imagem pronta,
+# sem PNG intermediário.
+#
+# Métodos de binarização disponíveis (ver METODOS_BINARIZACAO):
+#   floyd ..... dithering Floyd–Steinberg (comportamento original)
+#   otsu ...... limiar global de Otsu
+#   sauvola ... limiar adaptativo de Sauvola via imagem integral
+# Otsu e Sauvola são vetorizados em NumPy e processam a página em faixas
+# de linhas, de modo que a memória extra não cresce com o tamanho da página.
+# ------------------------------------------------------------------
+
+import io
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image, features
+
+# CCITT G4 depende do Pillow compilado com libtiff (padrão nas wheels oficiais)
+G4_DISPONIVEL = features.check("libtiff")
+
+# Número de linhas por faixa nos métodos vetorizados
+LINHAS_POR_FAIXA = 512
+
+# Parâmetros padrão de Sauvola: janela (px), k e faixa dinâmica do desvio-padrão
+SAUVOLA_JANELA = 25
+SAUVOLA_K = 0.2
+SAUVOLA_R = 128.0
+
+
+def renderizar_cinza(page, dpi: int = 300):
+    """Renderiza a página direto em tons de cinza (1 canal, sem alfa)."""
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+
+
+def imagem_do_pixmap(pix) -> Image.Image:
+    """Imagem PIL modo 'L' apontando para o buffer de amostras do pixmap, sem cópia."""
+    return Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", pix.stride, 1)
+
+
+def amostras_do_pixmap(pix) -> np.ndarray:
+    """Visão NumPy (altura x largura, uint8) do buffer de um pixmap cinza, sem cópia."""
+    linhas = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return linhas[:, :pix.width]
+
+
+def imagem_da_mascara(branco: np.ndarray) -> Image.Image:
+    """Converte uma máscara booleana (True = branco) em imagem PIL modo '1'."""
+    altura, largura = branco.shape
+    return Image.frombytes("1", (largura, altura), np.packbits(branco, axis=1).tobytes())
+
+
+def dither_floyd_steinberg(img: Image.Image) -> Image.Image:
+    """Binarização atual do modo mono: dithering Floyd–Steinberg para 1 bit."""
+    return img.convert("1", dither=Image.Dither.FLOYDSTEINBERG)
+
+
+def limiar_otsu(cinza: np.ndarray, linhas_por_faixa: int = LINHAS_POR_FAIXA) -> int:
+    """
+    Limiar global de Otsu. O histograma é acumulado faixa a faixa e a
+    variância entre classes é calculada para os 256 limiares de uma vez.
+    """
+    hist = np.zeros(256, dtype=np.int64)
+    for y in range(0, cinza.shape[0], linhas_por_faixa):
+        hist += np.bincount(cinza[y:y + linhas_por_faixa].ravel(), minlength=256)
+
+    prob = hist / max(hist.sum(), 1)
+    omega = np.cumsum(prob)
+    mu = np.cumsum(prob * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma_b = (mu[-1] * omega - mu) ** 2 / (omega * (1.0 - omega))
+    return int(np.argmax(np.nan_to_num(sigma_b)))
+
+
+def binarizar_otsu(cinza: np.ndarray, linhas_por_faixa: int = LINHAS_POR_FAIXA) -> np.ndarray:
+    """Máscara booleana (True = branco) pelo limiar global de Otsu."""
+    limiar = limiar_otsu(cinza, linhas_por_faixa)
+    branco = np.empty(cinza.shape, dtype=bool)
+    for y in range(0, cinza.shape[0], linhas_por_faixa):
+        np.greater(cinza[y:y + linhas_por_faixa], limiar, out=branco[y:y + linhas_por_faixa])
+    return branco
+
+
+def binarizar_sauvola(cinza: np.ndarray,
+                      janela: int = SAUVOLA_JANELA,
+                      k: float = SAUVOLA_K,
+                      r: float = SAUVOLA_R,
+                      linhas_por_faixa: int = LINHAS_POR_FAIXA) -> np.ndarray:
+    """
+    Máscara booleana (True = branco) pelo limiar adaptativo de Sauvola:
+        T = m * (1 + k * (s / r - 1))
+    com média m e desvio-padrão s na janela em torno de cada pixel, obtidos
+    por imagens integrais. Cada faixa leva uma margem de janela//2 linhas
+    para que o resultado seja idêntico ao da página inteira.
+    """
+    altura, largura = cinza.shape
+    meia = janela // 2
+    area = float(janela * janela)
+    branco = np.empty(cinza.shape, dtype=bool)
+
+    for y0 in range(0, altura, linhas_por_faixa):
+        y1 = min(y0 + linhas_por_faixa, altura)
+        a0, a1 = max(y0 - meia, 0), min(y1 + meia, altura)
+        faixa = np.pad(cinza[a0:a1].astype(np.float64),
+                       ((meia - (y0 - a0), meia - (a1 - y1)), (meia, meia)), mode="edge")
+
+        integral = np.zeros((faixa.shape[0] + 1, faixa.shape[1] + 1))
+        integral_q = np.zeros_like(integral)
+        np.cumsum(np.cumsum(faixa, axis=0), axis=1, out=integral[1:, 1:])
+        np.cumsum(np.cumsum(faixa * faixa, axis=0), axis=1, out=integral_q[1:, 1:])
+
+        def soma_janelas(ii):
+            return (ii[janela:, janela:] - ii[:-janela, janela:]
+                    - ii[janela:, :-janela] + ii[:-janela, :-janela])
+
+        media = soma_janelas(integral) / area
+        variancia = soma_janelas(integral_q) / area - media * media
+        desvio = np.sqrt(np.maximum(variancia, 0.0))
+        limiar = media * (1.0 + k * (desvio / r - 1.0))
+        np.greater(cinza[y0:y1], limiar, out=branco[y0:y1])
+
+    return branco
+
+
+def _binarizar_floyd(pix) -> Image.Image:
+    return dither_floyd_steinberg(imagem_do_pixmap(pix))
+
+
+def _binarizar_otsu(pix) -> Image.Image:
+    return imagem_da_mascara(binarizar_otsu(amostras_do_pixmap(pix)))
+
+
+def _binarizar_sauvola(pix) -> Image.Image:
+    return imagem_da_mascara(binarizar_sauvola(amostras_do_pixmap(pix)))
+
+
+# Método -> (função pixmap cinza -> imagem '1', usar CCITT G4 na saída)
+METODOS_BINARIZACAO = {
+    "floyd": (_binarizar_floyd, False),
+    "otsu": (_binarizar_otsu, True),
+    "sauvola": (_binarizar_sauvola, True),
+}
+
+
+def _codificar_g4(img: Image.Image):
+    # Gera um TIFF G4 com uma única faixa e recorta o fluxo CCITT de dentro dele
+    buffer = io.BytesIO()
+    img.save(buffer, format="TIFF", compression="group4", tiffinfo={278: img.height})
+    tiff = Image.open(buffer)
+    inicio = tiff.tag_v2[273][0]
+    tamanho = tiff.tag_v2[279][0]
+    # Com PhotometricInterpretation = BlackIsZero o Pillow grava o preto como bit 1
+    black_is_1 = "true" if tiff.tag_v2.get(262, 1) == 1 else "false"
+    dados = buffer.getbuffer()[inicio:inicio + tamanho].tobytes()
+    parametros = f"<< /K -1 /Columns {img.width} /Rows {img.height} /BlackIs1 {black_is_1} >>"
+    return dados, parametros
+
+
+def inserir_imagem_1bit(doc, page, rect, img: Image.Image, usar_g4: bool = False) -> int:
+    """
+    Insere uma imagem modo '1' na página como XObject de 1 bit por pixel.
+    • usar_g4 ... codifica em CCITT G4 (se disponível) em vez de Flate. O G4 é bem
+                  menor em páginas limiarizadas, mas maior que o Flate em imagens
+                  com dithering, cujo padrão de pontos ele comprime mal.
+    Retorna o xref da imagem.
+    """
+    xref = doc.get_new_xref()
+    doc.update_object(xref, f"<< /Type /XObject /Subtype /Image /Width {img.width} /Height {img.height} "
+                            f"/ColorSpace /DeviceGray /BitsPerComponent 1 >>")
+    if usar_g4 and G4_DISPONIVEL:
+        dados, parametros = _codificar_g4(img)
+        doc.update_stream(xref, dados, compress=False)
+        # update_stream reescreve o /Filter, então o filtro é definido depois
+        doc.xref_set_key(xref, "Filter", "/CCITTFaxDecode")
+        doc.xref_set_key(xref, "DecodeParms", parametros)
+    else:
+        # Modo '1' do PIL já vem empacotado em bytes por linha, 1 = branco,
+        # exatamente o layout de /DeviceGray com 1 bit por componente.
+        doc.update_stream(xref, img.tobytes(), compress=True)
+    page.insert_image(rect, xref=xref)
+    return xref
+
+
+def binarizar_pagina(page, output_doc, dpi: int = 300, metodo: str = "floyd"):
+    """
+    Renderiza `page`, binariza com `metodo` (ver METODOS_BINARIZACAO) e
+    acrescenta a página resultante em `output_doc`.
+    Retorna a nova página.
+    """
+    if metodo not in METODOS_BINARIZACAO:
+        raise ValueError(f"Método de binarização desconhecido: {metodo}")
+    binarizar, usar_g4 = METODOS_BINARIZACAO[metodo]
+
+    pix = renderizar_cinza(page, dpi)
+    img = binarizar(pix)
+    pix = None  # O buffer do pixmap não é mais necessário após a conversão
+
+    new_page = output_doc.new_page(width=page.rect.width, height=page.rect.height)
+    inserir_imagem_1bit(output_doc, new_page, new_page.rect, img, usar_g4=usar_g4)
+    return new_page
@@ -0,0 +1,169 @@
+# cache_resultados.py
+# ------------------------------------------------------------------
+# Cache persistente de resultados do pipeline. A chave é o hash do
+# conteúdo do PDF de entrada somado às configurações que alteram o
+# resultado (etapas, modo de OCR, dpi, versão/padrões dos detectores,
+# hash da lista de termos, qualidade da compressão). Num acerto, o
+# _PROCESSADO.pdf anterior é copiado para o destino sem reprocessar.
+#
+# Cada entrada são dois arquivos na pasta do cache:
+#   <chave>.pdf ... resultado do pipeline
+#   <chave>.json .. resumo (redações, páginas, tempos originais)
+# O mtime do .pdf marca o último uso; ao passar de tamanho_maximo
+# os menos usados recentemente são removidos (LRU por tamanho).
+#
+# Para invalidar tudo quando os detectores mudarem, incremente
+# VERSAO_DETECTOR_CPF (anonymizer.py) / VERSAO_DETECTOR_TERMOS
+# (manual_anonymizer.py), ou VERSAO_CACHE abaixo para qualquer outra
+# mudança de lógica; também é possível apagar o cache com limpar().
+# ------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import logging
+
+# Incrementar quando o formato da chave ou do pipeline mudar de forma
+# que resultados antigos não devam mais ser reaproveitados.
+VERSAO_CACHE = 3
+
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+
+def hash_arquivo(caminho: str) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_termos(termos) -> str:
+    """Hash da lista de termos manuais (ordem e duplicatas não alteram o resultado)."""
+    return hashlib.sha256("\n".join(sorted(set(termos))).encode("utf-8")).hexdigest()
+
+
+class CacheResultados:
+    """
+    Cache em disco de PDFs processados, seguro para as threads do AgendadorLote.
+    • pasta ............ diretório das entradas (criado se não existir)
+    • tamanho_maximo ... limite em bytes; 0 desativa a remoção por tamanho
+    """
+
+    def __init__(self, pasta: str, tamanho_maximo: int = 0):
+        self.pasta = pasta
+        self.tamanho_maximo = tamanho_maximo
+        self._trava = threading.Lock()
+        os.makedirs(pasta, exist_ok=True)
+
+    def chave(self, pdf_path: str, configuracao: dict) -> str:
+        """Combina o hash do PDF com a configuração (dict serializável em JSON)."""
+        conteudo = json.dumps({"versao": VERSAO_CACHE, "entrada": hash_arquivo(pdf_path),
+                               "configuracao": configuracao}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def _caminhos(self, chave):
+        base = os.path.join(self.pasta, chave)
+        return base + ".pdf", base + ".json"
+
+    def obter(self, chave: str, destino: str):
+        """
+        Copia o resultado em cache para `destino`.
+        Retorna o resumo guardado, ou None se a chave não estiver no cache.
+        """
+        caminho_pdf, caminho_json = self._caminhos(chave)
+        with self._trava:
+            if not (os.path.exists(caminho_pdf) and os.path.exists(caminho_json)):
+                return None
+            try:
+                with open(caminho_json, "r", encoding="utf-8") as f:
+                    resumo = json.load(f)
+                os.utime(caminho_pdf)  # marca como usado recentemente
+            except (OSError, ValueError) as e:
+                logging.warning(f"Entrada de cache corrompida {chave}: {e}")
+                self._remover(chave)
+                return None
+        shutil.copyfile(caminho_pdf, destino)
+        return resumo
+
+    def obter_dados(self, chave: str):
+        """Como obter(), mas devolve (bytes_do_pdf, resumo) em vez de copiar para um arquivo."""
+        caminho_pdf, caminho_json = self._caminhos(chave)
+        with self._trava:
+            try:
+                with open(caminho_json, "r", encoding="utf-8") as f:
+                    resumo = json.load(f)
+                with open(caminho_pdf, "rb") as f:
+                    dados = f.read()
+                os.utime(caminho_pdf)
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError) as e:
+                logging.warning(f"Entrada de cache corrompida {chave}: {e}")
+                self._remover(chave)
+                return None
+        return dados, resumo
+
+    def guardar(self, chave: str, resultado_pdf: str, resumo: dict):
+        """Guarda uma cópia de `resultado_pdf` e o resumo; depois aplica o limite de tamanho."""
+        temp_pdf = self._temporario(chave, ".pdf")
+        shutil.copyfile(resultado_pdf, temp_pdf)
+        self._publicar(chave, temp_pdf, resumo)
+
+    def guardar_dados(self, chave: str, dados: bytes, resumo: dict):
+        """Como guardar(), a partir dos bytes do PDF."""
+        temp_pdf = self._temporario(chave, ".pdf")
+        with open(temp_pdf, "wb") as f:
+            f.write(dados)
+        self._publicar(chave, temp_pdf, resumo)
+
+    def _temporario(self, chave, extensao):
+        # Um temporário por thread: dois arquivos do lote podem guardar a mesma chave
+        return os.path.join(self.pasta, f"{chave}{extensao}.{threading.get_ident()}.tmp")
+
+    def _publicar(self, chave, temp_pdf, resumo):
+        # Grava em temporários e renomeia: leitores nunca veem uma entrada pela metade
+        caminho_pdf, caminho_json = self._caminhos(chave)
+        temp_json = self._temporario(chave, ".json")
+        with open(temp_json, "w", encoding="utf-8") as f:
+            json.dump(resumo, f, ensure_ascii=False)
+        with self._trava:
+            os.replace(temp_json, caminho_json)
+            os.replace(temp_pdf, caminho_pdf)
+            self._aplicar_limite()
+
+    def _remover(self, chave):
+        for caminho in self._caminhos(chave):
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+
+    def _aplicar_limite(self):
+        if not self.tamanho_maximo:
+            return
+        entradas = []
+        for nome in os.listdir(self.pasta):
+            if nome.endswith(".pdf"):
+                estado = os.stat(os.path.join(self.pasta, nome))
+                entradas.append((estado.st_mtime, estado.st_size, nome[:-4]))
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        # Remove primeiro as entradas usadas há mais tempo
+        for _, tamanho, chave in sorted(entradas):
+            if total <= self.tamanho_maximo:
+                break
+            self._remover(chave)
+            total -= tamanho
+            logging.info(f"Cache: entrada {chave} removida (limite de {self.tamanho_maximo} bytes).")
+
+    def limpar(self) -> int:
+        """Remove todas as entradas. Retorna quantas foram removidas."""
+        with self._trava:
+            chaves = {os.path.splitext(nome)[0] for nome in os.listdir(self.pasta)
+                      if nome.endswith((".pdf", ".json"))}
+            for chave in chaves:
+                self._remover(chave)
+        return len(chaves)
@@ -0,0 +1,162 @@
+# cli.py
+# ------------------------------------------------------------------
+# Linha de comando do pipeline OCR -> CPF -> termos manuais -> compressão,
+# para servidores e agendamentos (cron) sem interface gráfica.
+#
+# Exemplo:
+#   python cli.py entrada/ "lotes/**/*.pdf" --saida saida/ --ocr mono \
+#                 --auto --termos manual_targets/partes.txt --comprimir --workers 4
+#
+# Ao final, imprime em stdout (e, com --resumo, grava em arquivo) um resumo
+# JSON com tempos e redações por arquivo.
+# Código de saída: 0 = tudo ok, 1 = algum arquivo falhou, 130 = cancelado.
+# ------------------------------------------------------------------
+
+import argparse
+import glob
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+import config_gui
+from batch_scheduler import configurar_limite_subprocessos
+from binarizer import METODOS_BINARIZACAO
+from ocr import MOTORES_OCR
+from anonymizer import POLITICAS_CPF
+from detectores import REGISTRO_IDENTIFICADORES, tipos_habilitados
+from config_gui import carregar_termos_de_txt
+from pipeline import abrir_cache, abrir_cache_paginas, carregar_opcoes_processamento, processar_lote
+from registro_log import configurar_logging
+from metricas import resumo_lote
+
+
+def expandir_entradas(entradas):
+    """Expande pastas (PDFs diretamente dentro delas), globs e arquivos em uma lista sem repetições."""
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            encontrados = sorted(glob.glob(os.path.join(entrada, "*.pdf")) + glob.glob(os.path.join(entrada, "*.PDF")))
+        elif glob.has_magic(entrada):
+            encontrados = sorted(glob.glob(entrada, recursive=True))
+        else:
+            encontrados = [entrada]
+        for arquivo in encontrados:
+            if arquivo.lower().endswith(".pdf") and arquivo not in arquivos:
+                arquivos.append(arquivo)
+    return arquivos
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(description="Anonimização de PDFs em lote (OCR, CPF, termos, compressão).")
+    parser.add_argument("entradas", nargs="+", help="Arquivos PDF, pastas ou globs (ex.: 'lotes/**/*.pdf')")
+    parser.add_argument("--saida", required=True, help="Pasta de saída dos arquivos _PROCESSADO.pdf")
+    parser.add_argument("--ocr", choices=["mono", "grayscale"], help="Executa OCR no modo indicado")
+    parser.add_argument("--auto", action="store_true", help="Anonimiza CPFs (e os demais identificadores habilitados) automaticamente")
+    parser.add_argument("--politica-cpf", choices=POLITICAS_CPF,
+                        help="validos = só CPFs com dígitos verificadores corretos; todos = redige e reporta os inválidos")
+    parser.add_argument("--identificadores",
+                        help=f"Tipos da etapa --auto, separados por vírgula ({', '.join(REGISTRO_IDENTIFICADORES)})")
+    parser.add_argument("--termos", help="Arquivo .txt com um termo por linha para anonimização manual")
+    parser.add_argument("--comprimir", action="store_true", help="Comprime a saída com Ghostscript")
+    parser.add_argument("--workers", type=int, help="Arquivos processados em paralelo (acelera só o OCR e a compressão pelo gs)")
+    parser.add_argument("--limite-subprocessos", type=int, help="Máximo de ocrmypdf/gs simultâneos")
+    parser.add_argument("--motor-ocr", choices=MOTORES_OCR, help="ocrmypdf (PDF/A) ou tesseract em processo")
+    parser.add_argument("--binarizacao", choices=sorted(METODOS_BINARIZACAO), help="Método de binarização do OCR mono")
+    parser.add_argument("--janela-paginas", type=int, help="Processa em janelas de N páginas (memória limitada)")
+    parser.add_argument("--rascunho", help="Pasta local para temporários de ocrmypdf/gs (padrão: /dev/shm ou temp do sistema)")
+    parser.add_argument("--sem-cache", action="store_true", help="Reprocessa tudo, sem consultar nem gravar o cache")
+    parser.add_argument("--limpar-cache", action="store_true", help="Apaga o cache de resultados antes de processar")
+    parser.add_argument("--metricas", help="Acrescenta as métricas por arquivo e do lote a este arquivo JSON lines")
+    parser.add_argument("--nivel-log", choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+                        help="Nível do log em arquivo (DEBUG registra cada match)")
+    parser.add_argument("--config", help="Caminho do config.json (padrão: config.json na pasta atual)")
+    parser.add_argument("--resumo", help="Também grava o resumo JSON neste arquivo")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = _criar_parser().parse_args(argv)
+    if args.config:
+        config_gui.CONFIG_FILE = args.config
+
+    config = config_gui.load_config()
+    opcoes = carregar_opcoes_processamento(config)
+    configurar_logging(config, "anonimizador_cli.log", nivel=args.nivel_log)
+    if args.workers is not None:
+        opcoes["workers_arquivos"] = args.workers
+    if args.limite_subprocessos is not None:
+        opcoes["limite_subprocessos"] = args.limite_subprocessos
+    if args.identificadores:
+        opcoes["identificadores"] = [n.strip() for n in args.identificadores.split(",") if n.strip()]
+    try:
+        tipos_habilitados(opcoes["identificadores"])
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.politica_cpf:
+        opcoes["politica_cpf"] = args.politica_cpf
+    if args.motor_ocr:
+        opcoes["motor_ocr"] = args.motor_ocr
+    if args.binarizacao:
+        opcoes["binarizacao"] = args.binarizacao
+    if args.janela_paginas is not None:
+        opcoes["janela_paginas"] = args.janela_paginas
+    if args.rascunho:
+        opcoes["pasta_rascunho"] = args.rascunho
+    if args.sem_cache:
+        opcoes["cache_ativo"] = False
+    if args.metricas:
+        opcoes["arquivo_metricas"] = args.metricas
+    configurar_limite_subprocessos(opcoes["limite_subprocessos"])
+
+    if args.limpar_cache:
+        for cache in (abrir_cache(dict(opcoes, cache_ativo=True)), abrir_cache_paginas(dict(opcoes, cache_ativo=True))):
+            if cache is not None:
+                print(f"Cache {cache.pasta}: {cache.limpar()} entradas removidas.", file=sys.stderr)
+
+    termos = carregar_termos_de_txt(args.termos) if args.termos else []
+    if args.termos and not termos:
+        print(f"Nenhum termo carregado de {args.termos}.", file=sys.stderr)
+        return 1
+
+    etapas = {"ocr": args.ocr, "auto": args.auto, "manual": bool(termos), "comp": args.comprimir}
+    arquivos = expandir_entradas(args.entradas)
+    if not arquivos:
+        print("Nenhum PDF encontrado nas entradas informadas.", file=sys.stderr)
+        return 1
+
+    # Ctrl+C / SIGTERM cancelam todos os arquivos, inclusive subprocessos em andamento
+    cancel_event = threading.Event()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sinal, lambda *_: cancel_event.set())
+
+    inicio = time.perf_counter()
+    resumos = processar_lote(arquivos, args.saida, etapas, termos, opcoes, cancel_event=cancel_event,
+                             avisar=lambda mensagem: print(f"Aviso: {mensagem}", file=sys.stderr))
+
+    contagem = {status: sum(1 for r in resumos if r["status"] == status) for status in ("ok", "erro", "cancelado")}
+    resumo_json = json.dumps({
+        "etapas": etapas,
+        "workers": opcoes["workers_arquivos"],
+        "tempo_total": time.perf_counter() - inicio,
+        "total_arquivos": len(resumos),
+        **contagem,
+        "cache": sum(1 for r in resumos if r["cache"]),
+        "metricas": resumo_lote(resumos, time.perf_counter() - inicio),
+        "arquivos": resumos,
+    }, ensure_ascii=False, indent=2)
+    print(resumo_json)
+    if args.resumo:
+        with open(args.resumo, "w", encoding="utf-8") as f:
+            f.write(resumo_json + "\n")
+
+    if cancel_event.is_set():
+        return 130
+    return 1 if contagem["erro"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
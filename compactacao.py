@@ -0,0 +1,176 @@
+# compactacao.py
+# ------------------------------------------------------------------
+# Compactação dos recursos compartilhados antes de salvar o PDF.
+#
+# Timbres e carimbos repetidos em cada página de um processo
+# digitalizado, e as fontes e imagens que cada janela do streaming.py
+# traz de novo, chegam como cópias do mesmo recurso que às vezes
+# diferem só na compressão ou em chaves irrelevantes (/Name, /Length).
+# Quanto disso o garbage=4 do MuPDF unifica depende da versão e das
+# flags do save; aqui a unificação é explícita e medida: imagens, fontes
+# e form XObjects, com todas as suas dependências indiretas (espaços de
+# cor e perfis ICC, SMask, FontFile*/ToUnicode//W, /Resources), são
+# agrupados pelo conteúdo decodificado e as referências às cópias passam
+# a apontar para um só objeto, das dependências para cima. As cópias,
+# sem referências, saem no garbage do save.
+# ------------------------------------------------------------------
+
+import hashlib
+import logging
+import re
+
+CLASSES_RECURSO = ("imagens", "fontes", "formularios")
+
+# Entradas do dicionário que não mudam o conteúdo do recurso (o valor vai junto)
+_ENTRADAS_IGNORADAS = re.compile(
+    r"/(?:Length|Filter|DecodeParms|Name)\b\s*"
+    r"(?:/[^\s/<>\[\]()]*|\d+ \d+ R|\d+|<<(?:[^<>]|<<[^<>]*>>)*>>|\[[^\]]*\]|null)")
+
+_COMPRIMENTO = re.compile(r"/Length\s*\d+(?: \d+ R)?")
+
+# Strings literais (ignoradas na troca) ou referências indiretas "N 0 R"
+_TOKEN_REFERENCIA = re.compile(r"(\((?:\\.|[^\\)])*\))|\b(\d+) 0 R\b")
+
+_SUBTIPO = re.compile(r"/Subtype\s*/(Image|Form)\b")
+_DICIONARIO_XOBJECT = re.compile(r"/XObject\s*(?:<<([^<>]*)>>|(\d+) 0 R)")
+
+# Referências que não levam a dependências: grupos de conteúdo opcional (/OC) têm
+# identidade própria mesmo quando iguais; /Parent e /P apontam para fora do recurso
+_REFERENCIA_EXCLUIDA = re.compile(r"/(?:OC|Parent|P)\s*\d+ 0 R")
+
+# Rodadas máximas: cada rodada unifica um nível da cadeia de dependências
+# (ex.: FontFile -> FontDescriptor -> CIDFont -> Type0 -> /Resources -> form XObject)
+_RODADAS_MAXIMAS = 8
+
+
+def _referencias(texto):
+    return [int(m.group(2)) for m in _TOKEN_REFERENCIA.finditer(texto) if m.group(2)]
+
+
+def _classificar(doc):
+    # {xref: classe} dos objetos candidatos; lê cada objeto como texto. Imagens e forms só
+    # contam se estiverem em algum /XObject de /Resources: as aparências de anotações já
+    # aplicadas (ex.: as de redação) ficam órfãs e saem no garbage de qualquer forma
+    classes = {}
+    usados = set()
+    dicionarios_indiretos = []
+    for xref in range(1, doc.xref_length()):
+        texto = doc.xref_object(xref, compressed=True)
+        if "/XObject" in texto:
+            for m in _DICIONARIO_XOBJECT.finditer(texto):
+                if m.group(1):
+                    usados.update(_referencias(m.group(1)))
+                else:
+                    dicionarios_indiretos.append(int(m.group(2)))
+        subtipo = _SUBTIPO.search(texto)
+        if subtipo and doc.xref_is_stream(xref):
+            classes[xref] = "imagens" if subtipo.group(1) == "Image" else "formularios"
+        elif "/Font" in texto and not doc.xref_is_stream(xref) and \
+                doc.xref_get_key(xref, "Type")[1] in ("/Font", "/FontDescriptor"):
+            classes[xref] = "fontes"
+    for xref in dicionarios_indiretos:
+        usados.update(_referencias(doc.xref_object(xref, compressed=True)))
+    classes = {xref: classe for xref, classe in classes.items() if classe == "fontes" or xref in usados}
+
+    # Dependências indiretas dos candidatos (espaços de cor e perfis ICC, SMask, /W e
+    # fluxos das fontes, /Resources dos forms...): as cópias de um recurso só ficam
+    # iguais depois que as suas dependências forem unificadas
+    pendentes = list(classes)
+    while pendentes:
+        xref = pendentes.pop()
+        texto = _REFERENCIA_EXCLUIDA.sub("", doc.xref_object(xref, compressed=True))
+        for ref in _referencias(texto):
+            if ref not in classes and 0 < ref < doc.xref_length():
+                classes[ref] = classes[xref]
+                pendentes.append(ref)
+    return classes
+
+
+def _assinatura(doc, xref, classe):
+    # Conteúdo decodificado (só Flate: imagens JPEG/CCITT são comparadas como estão) + dicionário
+    texto = doc.xref_object(xref, compressed=True)
+    if not doc.xref_is_stream(xref):
+        return hashlib.sha256((classe + texto).encode()).hexdigest()
+    filtro = doc.xref_get_key(xref, "Filter")[1]
+    decodificar = filtro in ("null", "/FlateDecode")
+    dados = doc.xref_stream(xref) if decodificar else doc.xref_stream_raw(xref)
+    if dados is None:
+        return None
+    # Fora do Flate o filtro e os parâmetros fazem parte do conteúdo
+    dicionario = _ENTRADAS_IGNORADAS.sub("", texto) if decodificar else _COMPRIMENTO.sub("", texto)
+    resumo = hashlib.sha256(classe.encode())
+    resumo.update(dicionario.encode())
+    resumo.update(dados)
+    return resumo.hexdigest()
+
+
+def _trocar_referencias(texto, mapa):
+    def trocar(m):
+        if m.group(1) is not None:
+            return m.group(1)
+        return f"{mapa.get(int(m.group(2)), int(m.group(2)))} 0 R"
+    return _TOKEN_REFERENCIA.sub(trocar, texto)
+
+
+def _redirecionar(doc, mapa, removidos):
+    # Reescreve as referências às cópias em todos os objetos; nos fluxos, chave a
+    # chave (update_object descartaria o conteúdo do fluxo). Retorna os xrefs alterados
+    alterados = set()
+    for xref in range(1, doc.xref_length()):
+        if xref in removidos:
+            continue
+        texto = doc.xref_object(xref, compressed=True)
+        if not any(ref in mapa for ref in _referencias(texto)):
+            continue
+        alterados.add(xref)
+        if not doc.xref_is_stream(xref):
+            doc.update_object(xref, _trocar_referencias(texto, mapa))
+            continue
+        for chave in doc.xref_get_keys(xref):
+            tipo, valor = doc.xref_get_key(xref, chave)
+            if tipo in ("xref", "array", "dict"):
+                novo = _trocar_referencias(valor, mapa)
+                if novo != valor:
+                    doc.xref_set_key(xref, chave, novo)
+    return alterados
+
+
+def compactar_recursos(doc) -> dict:
+    """
+    Aponta as cópias de imagens, fontes e form XObjects de `doc` para um único
+    objeto (as cópias somem no save com garbage). Retorna
+    {classe: {"objetos", "bytes"}} com as cópias removidas (ver CLASSES_RECURSO)
+    e o tamanho dos seus fluxos.
+    """
+    relatorio = {classe: {"objetos": 0, "bytes": 0} for classe in CLASSES_RECURSO}
+    classes = _classificar(doc)
+    removidos = set()
+    assinaturas = {}  # só muda nos objetos reescritos pela rodada anterior
+    for _ in range(_RODADAS_MAXIMAS):
+        canonicos = {}
+        mapa = {}
+        for xref, classe in sorted(classes.items()):
+            if xref in removidos:
+                continue
+            if xref not in assinaturas:
+                assinaturas[xref] = _assinatura(doc, xref, classe)
+            assinatura = assinaturas[xref]
+            if assinatura is None:
+                continue
+            canonico = canonicos.setdefault(assinatura, xref)
+            if canonico != xref:
+                mapa[xref] = canonico
+                relatorio[classe]["objetos"] += 1
+                relatorio[classe]["bytes"] += len(doc.xref_stream_raw(xref) or b"") if doc.xref_is_stream(xref) \
+                    else len(doc.xref_object(xref, compressed=True))
+        if not mapa:
+            break
+        removidos.update(mapa)
+        for xref in _redirecionar(doc, mapa, removidos):
+            assinaturas.pop(xref, None)
+
+    if removidos:
+        logging.info("Compactação: %d recursos duplicados, %d bytes (%s)", len(removidos),
+                     sum(c["bytes"] for c in relatorio.values()),
+                     ", ".join(f"{classe}: {c['objetos']}" for classe, c in relatorio.items() if c["objetos"]))
+    return relatorio
@@ -0,0 +1,197 @@
+# compressao_imagens.py
+# ------------------------------------------------------------------
+# Compressor em processo, alternativo ao preset único do Ghostscript:
+# percorre os XObjects de imagem do documento aberto e escolhe um
+# tratamento para cada um, sem tocar em texto nem em vetores.
+#   bilevel .... imagens de 1 bit -> CCITT G4 (ver binarizer._codificar_g4)
+#   cinza/cor .. 8 bits -> JPEG na qualidade alvo, reduzidas quando a
+#                resolução efetiva passa de dpi_maximo
+#   duplicada .. imagens com o mesmo conteúdo são processadas uma vez e
+#                recebem o mesmo fluxo (o garbage=4 do salvar_pdf as unifica)
+#   outras ..... imagens com máscara e as próprias máscaras (/SMask, /Mask: com
+#                perdas deixariam halos no contorno), paletas, CMYK, JPEG
+#                já dentro do limite: intactas
+# A nova versão só substitui a original quando fica menor.
+#
+# A leitura dos pixels e a gravação dos fluxos usam o MuPDF, que não é
+# thread-safe, e rodam sob a trava; a codificação (Pillow, que libera o
+# GIL) roda num pool de threads.
+# ------------------------------------------------------------------
+
+import hashlib
+import io
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from binarizer import G4_DISPONIVEL, _codificar_g4
+
+CLASSES_IMAGEM = ("bilevel", "cinza", "cor", "duplicada", "outras")
+QUALIDADE_JPEG_PADRAO = 75
+DPI_MAXIMO_PADRAO = 200
+
+# Chaves que indicam imagens que este compressor não reescreve
+_CHAVES_INTOCADAS = ("SMask", "Mask", "ImageMask", "Decode")
+# Chaves que apontam para imagens usadas como máscara de outra
+_CHAVES_MASCARA = ("SMask", "Mask")
+
+
+def _resolucao_efetiva(doc):
+    # Maior resolução (pixels por polegada) com que cada imagem aparece nas páginas
+    resolucao = {}
+    for page in doc:
+        for xref, _, largura, _, *_ in page.get_images(full=True):
+            for rect in page.get_image_rects(xref):
+                if rect.width > 0:
+                    resolucao[xref] = max(resolucao.get(xref, 0.0), largura / (rect.width / 72))
+    return resolucao
+
+
+def _espaco_suportado(doc, xref):
+    # Só DeviceGray/DeviceRGB e ICCBased: paleta (Indexed), Separation etc. ficam como estão
+    tipo, valor = doc.xref_get_key(xref, "ColorSpace")
+    if tipo == "name":
+        return valor in ("/DeviceGray", "/DeviceRGB")
+    if tipo == "xref":
+        valor = doc.xref_object(int(valor.split()[0]), compressed=True)
+    return tipo in ("xref", "array") and valor.lstrip("[ ").startswith("/ICCBased")
+
+
+def _mascaras(doc, xrefs):
+    # Imagens referenciadas como /SMask ou /Mask (a /Mask também pode ser um array de cores)
+    mascaras = set()
+    for xref in xrefs:
+        for chave in _CHAVES_MASCARA:
+            tipo, valor = doc.xref_get_key(xref, chave)
+            if tipo == "xref":
+                mascaras.add(int(valor.split()[0]))
+    return mascaras
+
+
+def _planejar(doc, xref, resolucao, dpi_maximo):
+    # Decide a classe e o tamanho alvo da imagem; devolve None se ela fica intacta.
+    # Roda sob a trava: as amostras são copiadas aqui, e o pool só recebe bytes
+    if any(doc.xref_get_key(xref, chave)[0] != "null" for chave in _CHAVES_INTOCADAS):
+        return None
+    if not _espaco_suportado(doc, xref):
+        return None
+    filtro = doc.xref_get_key(xref, "Filter")[1]
+    bits = doc.xref_get_key(xref, "BitsPerComponent")[1]
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha or pix.n not in (1, 3) or (pix.colorspace and pix.colorspace.n != pix.n):
+        return None
+    if bits == "1":
+        if filtro in ("/CCITTFaxDecode", "/JBIG2Decode") or not G4_DISPONIVEL:
+            return None
+        return "bilevel", pix.n, (pix.width, pix.height), pix.samples, pix.width, pix.height
+    escala = min(1.0, dpi_maximo / resolucao[xref]) if resolucao.get(xref) else 1.0
+    if filtro == "/DCTDecode" and escala >= 1.0:
+        return None
+    largura, altura = max(1, round(pix.width * escala)), max(1, round(pix.height * escala))
+    return ("cinza" if pix.n == 1 else "cor"), pix.n, (pix.width, pix.height), pix.samples, largura, altura
+
+
+def _codificar(classe, modo, tamanho, amostras, alvo, qualidade):
+    # Roda no pool: só Pillow, sem MuPDF
+    img = Image.frombytes(modo, tamanho, amostras)
+    if classe == "bilevel":
+        # O Pixmap de uma imagem de 1 bit já vem em 0/255: a conversão não dá pontilhado
+        dados, parametros = _codificar_g4(img.convert("1", dither=Image.NONE))
+        return dados, "/CCITTFaxDecode", parametros, 1
+    if alvo != img.size:
+        img = img.resize(alvo, Image.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=qualidade, optimize=True)
+    return buffer.getvalue(), "/DCTDecode", "null", 8
+
+
+def comprimir_imagens(doc, qualidade: int = QUALIDADE_JPEG_PADRAO, dpi_maximo: int = DPI_MAXIMO_PADRAO,
+                      workers: int = None, trava=None) -> dict:
+    """
+    Recomprime as imagens de `doc` (aberto, ainda não salvo) conforme a classe.
+    • qualidade ... qualidade JPEG das imagens em tons de cinza e coloridas
+    • dpi_maximo .. resolução efetiva acima da qual essas imagens são reduzidas
+    • workers ..... threads de codificação (padrão: núcleos da máquina)
+    • trava ....... trava do MuPDF (ex.: batch_scheduler.trava_mupdf) para leitura/gravação
+    Retorna {classe: {"imagens", "bytes_antes", "bytes_depois"}} (ver CLASSES_IMAGEM).
+    """
+    trava = trava or threading.RLock()
+    relatorio = {classe: {"imagens": 0, "bytes_antes": 0, "bytes_depois": 0} for classe in CLASSES_IMAGEM}
+
+    def contar(classe, antes, depois):
+        relatorio[classe]["imagens"] += 1
+        relatorio[classe]["bytes_antes"] += antes
+        relatorio[classe]["bytes_depois"] += depois
+
+    with trava:
+        resolucao = _resolucao_efetiva(doc)
+        imagens = [xref for xref in range(1, doc.xref_length())
+                   if doc.xref_get_key(xref, "Subtype")[1] == "/Image" and doc.xref_is_stream(xref)]
+        mascaras = _mascaras(doc, imagens)
+        # Agrupa as imagens pelo conteúdo: cada grupo é processado uma vez
+        grupos = {}
+        for xref in imagens:
+            if xref in mascaras:
+                tamanho = len(doc.xref_stream_raw(xref))
+                contar("outras", tamanho, tamanho)
+                continue
+            bruto = doc.xref_stream_raw(xref)
+            definicao = doc.xref_object(xref, compressed=True)
+            chave = hashlib.sha256(bruto + definicao.encode()).hexdigest()
+            grupos.setdefault(chave, []).append((xref, len(bruto)))
+
+    workers = workers or os.cpu_count() or 1
+    grupos = list(grupos.values())
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Blocos de 2 imagens por thread: limita os pixels descomprimidos em memória
+        for inicio in range(0, len(grupos), 2 * workers):
+            trabalhos = []
+            for membros in grupos[inicio:inicio + 2 * workers]:
+                xref, _ = membros[0]
+                with trava:
+                    try:
+                        plano = _planejar(doc, xref, resolucao, dpi_maximo)
+                    except (RuntimeError, ValueError) as e:
+                        logging.debug("Imagem %d ignorada na compressão: %s", xref, e)
+                        plano = None
+                if plano is None:
+                    for _, tamanho in membros:
+                        contar("outras", tamanho, tamanho)
+                    continue
+                classe, componentes, tamanho_original, amostras, largura, altura = plano
+                modo = "L" if componentes == 1 else "RGB"
+                futuro = executor.submit(_codificar, classe, modo, tamanho_original, amostras,
+                                         (largura, altura), qualidade)
+                trabalhos.append((classe, membros, largura, altura, futuro))
+
+            for classe, membros, largura, altura, futuro in trabalhos:
+                try:
+                    dados, filtro, parametros, bits = futuro.result()
+                except (OSError, ValueError) as e:
+                    logging.debug("Falha ao codificar a imagem %d: %s", membros[0][0], e)
+                    dados = None
+                for posicao, (xref, tamanho) in enumerate(membros):
+                    classe_membro = classe if posicao == 0 else "duplicada"
+                    if dados is None or len(dados) >= tamanho:
+                        contar(classe_membro, tamanho, tamanho)
+                        continue
+                    with trava:
+                        doc.update_stream(xref, dados, compress=False)
+                        # update_stream reescreve o /Filter, então os parâmetros vêm depois
+                        doc.xref_set_key(xref, "Filter", filtro)
+                        doc.xref_set_key(xref, "DecodeParms", parametros)
+                        doc.xref_set_key(xref, "Width", str(largura))
+                        doc.xref_set_key(xref, "Height", str(altura))
+                        doc.xref_set_key(xref, "BitsPerComponent", str(bits))
+                    # As cópias recebem o mesmo fluxo e somem no garbage=4 ao salvar
+                    contar(classe_membro, tamanho, 0 if posicao else len(dados))
+
+    economia = sum(c["bytes_antes"] - c["bytes_depois"] for c in relatorio.values())
+    logging.info("Compressão de imagens: %d bytes economizados (%s)", economia,
+                 ", ".join(f"{classe}: {c['bytes_antes'] - c['bytes_depois']}"
+                           for classe, c in relatorio.items() if c["imagens"]))
+    return relatorio
@@ -1,31 +1,243 @@
+# compressor.py
+# ------------------------------------------------------------------
+# Compressão de PDFs com o Ghostscript (pdfwrite).
+#
+# compress_pdf roda um gs por arquivo. O ServicoCompressao, usado pelo
+# pipeline em lote, resolve o gs uma única vez e mantém até `processos`
+# instâncias do gs abertas, recebendo os arquivos pelo stdin (PostScript):
+# a inicialização do gs (fontes, recursos, ICC) é paga uma vez por
+# lote, e não a cada arquivo, o que domina o tempo em PDFs pequenos.
+# Se a instância persistente falhar (versão do gs sem --permit-file-*,
+# processo encerrado), o serviço passa a rodar um gs por arquivo.
+#
+# Cada compressão devolve o tamanho antes/depois; se o ganho ficar
+# abaixo de ganho_minimo, o arquivo original é mantido.
+# ------------------------------------------------------------------
+
 import os
+import queue
+import shutil
+import logging
 import subprocess
+import threading
+import uuid
 
-def compress_pdf(input_path, output_path=None, quality='screen'):
-    """
-    Comprime um PDF usando Ghostscript.
-    """
-    # Aqui você pode colocar o caminho fixo para ghostscript portátil se quiser
-    # Ou adaptar para ler config.json, mas para teste coloque o caminho direto
+from batch_scheduler import ProcessamentoCancelado, executar_subprocesso
+from ocr import ghostscript_disponivel, resolver_ghostscript
 
-    gs_path = "ghostscript/gswin64c.exe"  # Ajuste conforme seu projeto
+# Ganho mínimo (fração do tamanho original) para ficar com a versão comprimida
+GANHO_MINIMO_PADRAO = 0.05
 
-    if not os.path.isfile(gs_path):
-        print("Executável do Ghostscript não encontrado em:", gs_path)
-        return
+# Intervalo de verificação do cancel_event enquanto o gs persistente trabalha
+_INTERVALO_POLL = 0.2
 
-    if not output_path:
-        base, ext = os.path.splitext(input_path)
-        output_path = f"{base}_comprimido{ext}"
 
-    gs_command = [
+def _argumentos_gs(gs_path, quality):
+    return [
         gs_path,
         "-sDEVICE=pdfwrite",
         "-dCompatibilityLevel=1.4",
         f"-dPDFSETTINGS=/{quality}",
-        "-dNOPAUSE", "-dQUIET", "-dBATCH",
-        f"-sOutputFile={output_path}",
-        input_path
+        "-dNOPAUSE", "-dQUIET",
     ]
-    subprocess.call(gs_command)
-    print(f"Compressão concluída: {output_path}")
+
+
+def compress_pdf(input_path, output_path=None, quality='screen', gs_path=None, cancel_event=None):
+    """
+    Comprime um PDF usando Ghostscript.
+    • gs_path ....... executável do Ghostscript; se omitido, usa ocr.resolver_ghostscript
+                      (config.json, versão portátil no Windows ou GS_PADRAO no PATH)
+    • cancel_event .. threading.Event opcional; encerra o gs se o processo for cancelado
+    Levanta FileNotFoundError se o executável não for encontrado.
+    """
+    gs_path = gs_path or resolver_ghostscript()
+    if not ghostscript_disponivel(gs_path):
+        raise FileNotFoundError(f"Executável do Ghostscript não encontrado em: {gs_path}")
+
+    if not output_path:
+        base, ext = os.path.splitext(input_path)
+        output_path = f"{base}_comprimido{ext}"
+
+    gs_command = _argumentos_gs(gs_path, quality) + ["-dBATCH", f"-sOutputFile={output_path}", input_path]
+    # Respeita o limite de subprocessos simultâneos do lote (ver batch_scheduler.py)
+    executar_subprocesso(gs_command, cancel_event)
+    logging.info(f"Compressão concluída: {output_path}")
+
+
+def _string_ps(texto: str) -> str:
+    # Literal de string PostScript: escapa ( ) \ e bytes fora do ASCII (caminhos com acento)
+    partes = []
+    for byte in texto.encode("utf-8"):
+        caractere = chr(byte)
+        if caractere in "()\\":
+            partes.append("\\" + caractere)
+        elif 32 <= byte < 127:
+            partes.append(caractere)
+        else:
+            partes.append(f"\\{byte:03o}")
+    return "(" + "".join(partes) + ")"
+
+
+class _ProcessoGs:
+    """
+    Um gs aberto lendo PostScript do stdin. Cada trabalho troca o OutputFile do
+    pdfwrite, executa o PDF de entrada dentro de `stopped` e volta para um
+    arquivo ocioso (o que fecha a saída), respondendo com uma linha marcadora.
+    """
+
+    def __init__(self, argumentos, pastas_permitidas, arquivo_ocioso):
+        self.argumentos = list(argumentos)
+        for pasta in pastas_permitidas:
+            curinga = os.path.join(pasta, "*")
+            self.argumentos += [f"--permit-file-read={curinga}", f"--permit-file-write={curinga}"]
+        self.argumentos += ["-dSAFER", f"-sOutputFile={arquivo_ocioso}", "-"]
+        self.arquivo_ocioso = arquivo_ocioso
+        self.processo = None
+        self.linhas = None
+        self.concluidos = 0
+
+    def _iniciar(self):
+        self.processo = subprocess.Popen(self.argumentos, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.STDOUT)
+        self.linhas = queue.Queue()
+
+        def ler(saida, linhas):
+            for linha in iter(saida.readline, b""):
+                linhas.put(linha.decode("utf-8", "replace").rstrip())
+            linhas.put(None)  # fim do processo
+        threading.Thread(target=ler, args=(self.processo.stdout, self.linhas), daemon=True).start()
+
+    def executar(self, entrada, saida, cancel_event=None):
+        """Comprime entrada -> saida. Levanta RuntimeError se o gs acusar erro ou encerrar."""
+        if self.processo is None or self.processo.poll() is not None:
+            self._iniciar()
+        marcador = uuid.uuid4().hex
+        # Trocar o OutputFile fecha (e finaliza) o arquivo anterior do pdfwrite
+        comando = (f"{{ << /OutputFile {_string_ps(saida)} >> setpagedevice {_string_ps(entrada)} run }} stopped\n"
+                   f"{{ (ERRO {marcador}) }} {{ (OK {marcador}) }} ifelse\n"
+                   f"{{ << /OutputFile {_string_ps(self.arquivo_ocioso)} >> setpagedevice }} stopped pop\n"
+                   f"= flush clear\n")
+        try:
+            self.processo.stdin.write(comando.encode("ascii"))
+            self.processo.stdin.flush()
+        except OSError as e:
+            self.encerrar()
+            raise RuntimeError(f"Ghostscript persistente indisponível: {e}") from None
+
+        mensagens = []
+        while True:
+            try:
+                linha = self.linhas.get(timeout=_INTERVALO_POLL)
+            except queue.Empty:
+                if cancel_event is not None and cancel_event.is_set():
+                    self.encerrar()
+                    raise ProcessamentoCancelado()
+                continue
+            if linha is None:
+                self.encerrar()
+                raise RuntimeError("Ghostscript persistente encerrou: " + " | ".join(mensagens[-5:]))
+            if linha.endswith(marcador):
+                if linha.startswith("ERRO"):
+                    raise RuntimeError("Ghostscript: " + (" | ".join(mensagens[-5:]) or "erro ao processar o PDF"))
+                self.concluidos += 1
+                return
+            mensagens.append(linha)
+
+    def encerrar(self):
+        if self.processo is None:
+            return
+        try:
+            if self.processo.poll() is None:
+                self.processo.stdin.close()
+                self.processo.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.processo.kill()
+            self.processo.wait()
+        self.processo = None
+
+
+class ServicoCompressao:
+    """
+    Compressão de um lote de arquivos com o Ghostscript resolvido uma vez.
+    • gs_path ........... executável do gs
+    • qualidade ......... -dPDFSETTINGS (screen, ebook, printer...)
+    • ganho_minimo ...... fração mínima de redução para aceitar a versão comprimida
+    • processos ......... instâncias do gs abertas ao mesmo tempo (limite de concorrência)
+    • pastas_permitidas . pastas (e subpastas) que o gs persistente pode ler/gravar sob
+                          -dSAFER; arquivos fora delas usam um gs por arquivo
+    • persistente ....... False roda sempre um gs por arquivo (compress_pdf)
+    Seguro para as threads do lote; chame encerrar() ao final.
+    """
+
+    def __init__(self, gs_path: str, qualidade: str = "screen", ganho_minimo: float = GANHO_MINIMO_PADRAO,
+                 processos: int = 1, pastas_permitidas=(), persistente: bool = True):
+        self.gs_path = gs_path
+        self.qualidade = qualidade
+        self.ganho_minimo = ganho_minimo
+        self.pastas_permitidas = [os.path.realpath(p) for p in pastas_permitidas if p and os.path.isdir(p)]
+        self.persistente = persistente and bool(self.pastas_permitidas)
+        self._ocioso = os.path.join(self.pastas_permitidas[0], f".gs_ocioso_{os.getpid()}.pdf") \
+            if self.pastas_permitidas else None
+        self._livres = queue.Queue()
+        self._todos = []
+        for _ in range(max(1, processos)):
+            processo = _ProcessoGs(_argumentos_gs(gs_path, qualidade), self.pastas_permitidas, self._ocioso)
+            self._todos.append(processo)
+            self._livres.put(processo)
+
+    def _permitido(self, caminho):
+        real = os.path.realpath(caminho)
+        return any(os.path.commonpath([real, pasta]) == pasta for pasta in self.pastas_permitidas)
+
+    def comprimir(self, entrada: str, saida: str, cancel_event=None) -> dict:
+        """
+        Comprime `entrada` em `saida`. Se o ganho ficar abaixo de ganho_minimo,
+        `saida` recebe uma cópia da entrada.
+        Retorna {"bytes_antes", "bytes_depois", "aplicada"}.
+        """
+        if self.persistente and self._permitido(entrada) and self._permitido(saida):
+            self._comprimir_persistente(entrada, saida, cancel_event)
+        else:
+            compress_pdf(entrada, saida, quality=self.qualidade, gs_path=self.gs_path, cancel_event=cancel_event)
+
+        antes = os.path.getsize(entrada)
+        depois = os.path.getsize(saida) if os.path.exists(saida) else antes
+        aplicada = depois <= antes * (1 - self.ganho_minimo)
+        if not aplicada:
+            logging.info(f"Compressão descartada para {os.path.basename(entrada)}: "
+                         f"{antes} -> {depois} bytes (ganho abaixo de {self.ganho_minimo:.0%}).")
+            shutil.copyfile(entrada, saida)
+            depois = antes
+        return {"bytes_antes": antes, "bytes_depois": depois, "aplicada": aplicada}
+
+    def _comprimir_persistente(self, entrada, saida, cancel_event):
+        processo = None
+        while processo is None:
+            try:
+                processo = self._livres.get(timeout=_INTERVALO_POLL)
+            except queue.Empty:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ProcessamentoCancelado()
+        try:
+            processo.executar(entrada, saida, cancel_event)
+        except RuntimeError as e:
+            # Erro do arquivo ou do gs persistente: refaz com um gs próprio, que dá o erro definitivo.
+            # Se o processo morreu sem concluir nenhum trabalho, a versão do gs não serve para o modo persistente.
+            if processo.processo is None and not processo.concluidos:
+                logging.warning(f"{e}. Usando um Ghostscript por arquivo.")
+                self.persistente = False
+            else:
+                logging.warning(f"{e}. Repetindo {os.path.basename(entrada)} com um Ghostscript próprio.")
+            compress_pdf(entrada, saida, quality=self.qualidade, gs_path=self.gs_path, cancel_event=cancel_event)
+        finally:
+            self._livres.put(processo)
+
+    def encerrar(self):
+        """Fecha as instâncias do gs."""
+        for processo in self._todos:
+            processo.encerrar()
+        if self._ocioso and os.path.exists(self._ocioso):
+            try:
+                os.remove(self._ocioso)
+            except OSError:
+                pass
@@ -1,5 +1,6 @@
 import json
 import os
+import sys
 
 CONFIG_FILE = "config.json"
 
@@ -8,13 +9,13 @@ def load_config():
     Carrega o arquivo de configuração config.json.
     """
     if not os.path.exists(CONFIG_FILE):
-        print("Arquivo config.json não encontrado.")
+        print("Arquivo config.json não encontrado.", file=sys.stderr)
         return {}
     try:
         with open(CONFIG_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
     except json.JSONDecodeError as e:
-        print("Erro ao ler config.json:", e)
+        print("Erro ao ler config.json:", e, file=sys.stderr)
         return {}
 
 def salvar_config(config, caminho=CONFIG_FILE):
@@ -33,11 +34,11 @@ def carregar_termos_de_txt(caminho_txt):
     Lê um arquivo .txt com uma expressão por linha e retorna como lista.
     """
     if not os.path.isfile(caminho_txt):
-        print("Arquivo de termos não encontrado:", caminho_txt)
+        print("Arquivo de termos não encontrado:", caminho_txt, file=sys.stderr)
         return []
     try:
         with open(caminho_txt, "r", encoding="utf-8") as f:
             return [linha.strip() for linha in f if linha.strip()]
     except Exception as e:
-        print(f"Erro ao carregar termos do arquivo .txt: {e}")
+        print(f"Erro ao carregar termos do arquivo .txt: {e}", file=sys.stderr)
         return []
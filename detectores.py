@@ -0,0 +1,189 @@
+# detectores.py
+# ------------------------------------------------------------------
+# Registro de identificadores brasileiros detectáveis (CPF, CNPJ, RG,
+# PIS/NIS, CNH, título de eleitor). Cada tipo tem uma regex de linha
+# única, uma variante opcional tolerante a quebra de linha (como a
+# cpf_regex_quebra_linha) e um validador opcional de dígitos
+# verificadores (ver validacao.py).
+#
+# Os tipos habilitados são combinados em uma única regex, de modo que
+# cada página é varrida uma só vez; cada trecho encontrado é então
+# atribuído aos tipos cujo padrão ele satisfaz e validado em lote, por
+# tipo, antes do mapeamento para as caixas das palavras.
+# Quais tipos ficam ativos vem de "processamento.identificadores" no
+# config.json.
+# ------------------------------------------------------------------
+
+import re
+import logging
+from functools import lru_cache
+
+from anonymizer import (cpf_regex_linha_unica, cpf_regex_quebra_linha, mapear_palavras,
+                        palavras_do_intervalo, retangulos_das_palavras, DIGITOS_CPF, POLITICA_CPF_PADRAO,
+                        POLITICAS_CPF, VERSAO_DETECTOR_CPF)
+from validacao import validar_cnhs, validar_cnpjs, validar_cpfs, validar_pis, validar_titulos_eleitor
+
+
+class TipoIdentificador:
+    """
+    Um tipo de identificador do registro.
+    • nome ................ chave usada no config.json e nos resumos
+    • padrao .............. regex de linha única
+    • padrao_quebra_linha . variante que aceita o número partido entre duas linhas
+    • validador ........... função(lista de textos) -> array de bool, ou None
+    • versao .............. incrementar ao mudar padrões/validador (invalida o cache)
+    • digitos_minimos ..... menor número de dígitos de um identificador do tipo, para o
+                            pré-filtro de páginas (ver redaction_engine); 0 desliga
+    """
+
+    def __init__(self, nome, padrao, padrao_quebra_linha=None, validador=None, versao=1, digitos_minimos=0):
+        self.nome = nome
+        self.padrao = re.compile(padrao) if isinstance(padrao, str) else padrao
+        self.padrao_quebra_linha = (re.compile(padrao_quebra_linha) if isinstance(padrao_quebra_linha, str)
+                                    else padrao_quebra_linha)
+        self.validador = validador
+        self.versao = versao
+        self.digitos_minimos = digitos_minimos
+
+    def padroes(self):
+        return [p for p in (self.padrao, self.padrao_quebra_linha) if p is not None]
+
+    def aceita(self, texto: str) -> bool:
+        return any(p.fullmatch(texto) for p in self.padroes())
+
+    def assinatura(self):
+        """O que identifica o comportamento do tipo (entra na chave do cache de resultados)."""
+        return [self.nome, self.versao] + [p.pattern for p in self.padroes()]
+
+
+REGISTRO_IDENTIFICADORES = {}
+
+
+def registrar_identificador(tipo: TipoIdentificador):
+    """Adiciona (ou substitui) um tipo no registro."""
+    REGISTRO_IDENTIFICADORES[tipo.nome] = tipo
+    _compilar_varredura.cache_clear()
+    return tipo
+
+
+def tipos_habilitados(nomes):
+    """Resolve nomes do config.json em tipos do registro (ValueError para nomes desconhecidos)."""
+    desconhecidos = [n for n in nomes if n not in REGISTRO_IDENTIFICADORES]
+    if desconhecidos:
+        raise ValueError(f"Identificadores desconhecidos: {', '.join(desconhecidos)}. "
+                         f"Disponíveis: {', '.join(REGISTRO_IDENTIFICADORES)}")
+    return [REGISTRO_IDENTIFICADORES[n] for n in nomes]
+
+
+@lru_cache(maxsize=16)
+def _compilar_varredura(nomes):
+    # Uma regex só com todos os padrões habilitados: linha única primeiro,
+    # variantes com quebra de linha depois (só são tentadas quando a de linha
+    # única não casa na mesma posição).
+    tipos = tipos_habilitados(nomes)
+    alternativas = [t.padrao.pattern for t in tipos]
+    alternativas += [t.padrao_quebra_linha.pattern for t in tipos if t.padrao_quebra_linha is not None]
+    return re.compile("|".join(f"(?:{a})" for a in alternativas))
+
+
+registrar_identificador(TipoIdentificador(
+    "cpf", cpf_regex_linha_unica, cpf_regex_quebra_linha, validar_cpfs, versao=VERSAO_DETECTOR_CPF,
+    digitos_minimos=DIGITOS_CPF))
+
+# 00.000.000/0000-00
+registrar_identificador(TipoIdentificador(
+    "cnpj",
+    r'\b\d{2}\.?\s?\d{3}\.?\s?\d{3}\s?/?\s?\d{4}[-–]?\s?\d{2}\b',
+    r'(\d{2}[.\s]?\d{3}[.\s]?\d{3}\s?/?\s?\d{4})(?:\s*[-–]?\s*\n\s*)(\d{2})',
+    validar_cnpjs, digitos_minimos=14))
+
+# 000.00000.00-0
+registrar_identificador(TipoIdentificador(
+    "pis",
+    r'\b\d{3}\.?\s?\d{5}\.?\s?\d{2}[-–]?\s?\d\b',
+    r'(\d{3}[.\s]?\d{5}[.\s]?\d{2})(?:\s*[-–]?\s*\n\s*)(\d)',
+    validar_pis, digitos_minimos=11))
+
+# Registro da CNH: 11 dígitos sem pontuação
+registrar_identificador(TipoIdentificador("cnh", r'\b\d{11}\b', None, validar_cnhs, digitos_minimos=11))
+
+# 0000 0000 0000
+registrar_identificador(TipoIdentificador(
+    "titulo_eleitor",
+    r'\b\d{4}\s?\d{4}\s?\d{4}\b',
+    r'(\d{4}\s?\d{4})(?:\s*\n\s*)(\d{4})',
+    validar_titulos_eleitor, digitos_minimos=12))
+
+# RG não tem dígito verificador nacional: só o formato pontuado (00.000.000-0 / X)
+registrar_identificador(TipoIdentificador(
+    "rg",
+    r'\b\d{1,2}\.\d{3}\.\d{3}[-–]?[\dXx]\b',
+    r'(\d{1,2}\.\d{3}\.\d{3})(?:\s*[-–]?\s*\n\s*)([\dXx])\b',
+    digitos_minimos=7))
+
+
+def localizar_identificadores(word_list, nomes, politica=POLITICA_CPF_PADRAO, estatisticas=None, page_number=None):
+    """
+    Varre o texto linear das palavras uma única vez com a regex combinada dos
+    tipos `nomes` e devolve os retângulos a redigir.
+    • politica ...... "todos" (redige tudo que tem o formato e conta os inválidos)
+                      ou "validos" (só redige o que passa no validador do tipo);
+                      tipos sem validador são sempre redigidos
+    • estatisticas .. dict opcional; acumula {tipo: {"validos": n, "invalidos": n}}
+    """
+    if politica not in POLITICAS_CPF:
+        raise ValueError(f"Política desconhecida: {politica}")
+    nomes = tuple(nomes)
+    if not nomes:
+        return []
+    texto_linear, inicios = mapear_palavras(word_list)
+    matches = list(_compilar_varredura(nomes).finditer(texto_linear))
+    if not matches:
+        return []
+
+    # Cada trecho pode ter o formato de mais de um tipo (ex.: 11 dígitos = CPF ou CNH)
+    tipos = tipos_habilitados(nomes)
+    candidatos_por_tipo = {t.nome: [] for t in tipos}
+    for posicao, match in enumerate(matches):
+        for tipo in tipos:
+            if tipo.aceita(match.group(0)):
+                candidatos_por_tipo[tipo.nome].append(posicao)
+
+    aceitos = set()
+    for tipo in tipos:
+        posicoes = candidatos_por_tipo[tipo.nome]
+        if not posicoes:
+            continue
+        if tipo.validador is None:
+            aceitos.update(posicoes)
+            continue
+        validos = tipo.validador([matches[p].group(0) for p in posicoes])
+        for posicao, valido in zip(posicoes, validos):
+            if valido or politica == "todos":
+                aceitos.add(posicao)
+        if estatisticas is not None:
+            contagem = estatisticas.setdefault(tipo.nome, {"validos": 0, "invalidos": 0})
+            contagem["validos"] += int(validos.sum())
+            contagem["invalidos"] += len(posicoes) - int(validos.sum())
+
+    palavras_marcadas = set()
+    for posicao in sorted(aceitos):
+        match = matches[posicao]
+        palavras_marcadas.update(palavras_do_intervalo(inicios, match.start(), match.end()))
+    if aceitos:
+        logging.debug("Identificadores marcados (Pág %s): %d de %d candidatos", page_number, len(aceitos), len(matches))
+    return retangulos_das_palavras(word_list, palavras_marcadas)
+
+
+def criar_detector_identificadores(nomes, politica=POLITICA_CPF_PADRAO, estatisticas=None):
+    """
+    Detector (ver redaction_engine) para os tipos `nomes`, com uma varredura por página.
+    Declara digitos_minimos (o menor dos tipos) para o pré-filtro de páginas.
+    """
+    nomes = tuple(nomes)
+    tipos = tipos_habilitados(nomes)  # falha cedo para nomes desconhecidos
+
+    def detectar(page, word_list):
+        return localizar_identificadores(word_list, nomes, politica, estatisticas, page.number)
+    detectar.digitos_minimos = min((t.digitos_minimos for t in tipos), default=0)
+    return detectar
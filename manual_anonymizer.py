@@ -5,24 +5,93 @@
 # depois, ser convertido para PDF/A‑1b em tons de cinza.
 # ------------------------------------------------------------------
 
-import fitz  # PyMuPDF
 import re
 import os
 
+from anonymizer import mapear_palavras, palavras_do_intervalo, retangulos_das_palavras
+from redaction_engine import redigir_pdf
+from aho_corasick import compilar_automato
+
+# Incrementar ao mudar a lógica dos detectores de termos: invalida os
+# resultados guardados em cache (ver cache_resultados.py).
+VERSAO_DETECTOR_TERMOS = 1
+
 # Pré‑compila regex opcional para caso deseje busca sem exata maiúsc‑minúsc.
 # (Se não precisar, remova e use termos literais diretamente.)
 def _make_regex(term):
     # Escapa metacaracteres e ignora maiúsc/minúsc.
     return re.compile(re.escape(term), flags=re.IGNORECASE)
 
+def detector_termos(termos):
+    """
+    Cria um detector (ver redaction_engine) que localiza cada termo literal
+    com page.search_for.
+    """
+    def detectar(page, word_list):
+        rects = []
+        for termo in termos:
+            rects.extend(page.search_for(termo))
+        return rects
+    return detectar
+
+
+def detector_termos_palavras(termos):
+    """
+    Como detector_termos, mas casando os termos no texto linear das palavras
+    (sem caixa, qualquer espaço/quebra de linha entre as palavras do termo)
+    em vez de page.search_for. Usado sobre as caixas do OCR, em que o
+    espaçamento reconstruído faz o search_for perder ocorrências.
+    """
+    padroes = [re.compile(r"\s+".join(re.escape(parte) for parte in termo.split()), re.IGNORECASE)
+               for termo in termos if termo.strip()]
+    return detector_regex(padroes)
+
+
+def detector_regex(padroes):
+    """
+    Cria um detector (ver redaction_engine) para regexes já compiladas.
+    Os matches são feitos sobre o texto linear das palavras da página e os
+    retângulos vêm direto das bounding boxes das palavras casadas.
+    """
+    def detectar(page, word_list):
+        texto_linear, inicios = mapear_palavras(word_list)
+        indices = set()
+        for pad in padroes:
+            for m in pad.finditer(texto_linear):
+                indices.update(palavras_do_intervalo(inicios, m.start(), m.end()))
+        return retangulos_das_palavras(word_list, indices)
+    return detectar
+
+
+def detector_automato(automato):
+    """
+    Cria um detector (ver redaction_engine) a partir de um AutomatoTermos:
+    todos os termos são encontrados em uma única passada pelo texto linear
+    das palavras da página e mapeados de volta para as bounding boxes.
+    """
+    def detectar(page, word_list):
+        texto_linear, inicios = mapear_palavras(word_list)
+        indices = set()
+        for inicio, fim in automato.buscar(texto_linear):
+            indices.update(palavras_do_intervalo(inicios, inicio, fim))
+        return retangulos_das_palavras(word_list, indices)
+    return detectar
+
+
 def anonymize_manual(input_pdf_path: str,
                      output_pdf_path: str,
                      termos: list[str],
-                     usar_regex: bool = False) -> None:
+                     usar_regex: bool = False,
+                     usar_automato: bool = False,
+                     janela_paginas: int = None) -> None:
     """
     Aplica tarja preta sobre cada termo informado.
     • termos ........ lista de strings
     • usar_regex .... se True, converte cada termo em regex IGNORECASE
+    • usar_automato . se True, busca todos os termos de uma vez com um autômato
+                      Aho-Corasick (sem caixa/acento, palavras inteiras), indicado
+                      para listas grandes; o autômato fica em cache entre arquivos
+    • janela_paginas  se informado, processa em janelas de páginas com memória limitada
     """
     if not os.path.exists(input_pdf_path):
         raise FileNotFoundError(f"Arquivo não encontrado: {input_pdf_path}")
@@ -31,36 +100,15 @@ def anonymize_manual(input_pdf_path: str,
         raise ValueError("Lista de termos vazia.")
 
     # Converte termos em padrões de busca
-    padroes = [_make_regex(t) for t in termos] if usar_regex else termos
-
-    doc = fitz.open(input_pdf_path)
-
-    for page in doc:
-        texto_pagina = page.get_text()
-
-        for idx, pad in enumerate(padroes):
-            if usar_regex:
-                for m in pad.finditer(texto_pagina):
-                    trecho = m.group()
-                    for rect in page.search_for(trecho):
-                        page.add_redact_annot(rect, fill=(0, 0, 0))
-            else:
-                # termo literal
-                encontrados = page.search_for(pad)
-                for rect in encontrados:
-                    page.add_redact_annot(rect, fill=(0, 0, 0))
-
-        page.apply_redactions()
+    if usar_automato:
+        detector = detector_automato(compilar_automato(termos))
+    elif usar_regex:
+        detector = detector_regex([_make_regex(t) for t in termos])
+    else:
+        detector = detector_termos(termos)
 
     # Salva com mesmas flags que usamos no anonymizer.py
-    doc.save(
-        output_pdf_path,
-        garbage=4,       # remove objetos soltos
-        deflate=True,    # compacta sem perdas (Flate)
-        clean=True,
-        incremental=False
-    )
-    doc.close()
+    redigir_pdf(input_pdf_path, output_pdf_path, [detector], janela_paginas=janela_paginas)
 
 
 # --------------------------- teste rápido --------------------------
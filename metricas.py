@@ -0,0 +1,171 @@
+# metricas.py
+# ------------------------------------------------------------------
+# Instrumentação do pipeline: tempo por etapa (binarização, OCR,
+# detecção, aplicação das redações, compressão das imagens, gravação,
+# compressão pelo Ghostscript) e contadores (páginas, candidatos,
+# retângulos, bytes de entrada/saída) de cada arquivo, exportados em
+# JSON lines junto com um resumo do lote.
+#
+# As taxas medidas (segundos por página de cada etapa) alimentam o
+# EstimadorEtapas, que substitui os pesos fixos do progresso: a fração
+# de cada etapa dentro do arquivo, e de cada arquivo dentro do lote, é
+# proporcional ao tempo previsto, de modo que o "tempo restante"
+# calculado pela GUI (decorrido / progresso) acompanha o tempo real.
+# As taxas são guardadas em disco (processamento.arquivo_taxas) para
+# que o próximo lote já comece com estimativas medidas.
+# ------------------------------------------------------------------
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+ETAPAS_METRICAS = ("binarizacao", "ocr", "deteccao", "aplicacao", "compressao_imagens", "salvamento",
+                   "compressao")
+
+# Estimativas iniciais (segundos por página), usadas até haver medições
+SEGUNDOS_POR_PAGINA_PADRAO = {
+    "binarizacao": 0.15,
+    "ocr": 1.0,
+    "deteccao": 0.01,
+    "aplicacao": 0.02,
+    "compressao_imagens": 0.05,
+    "salvamento": 0.01,
+    "compressao": 0.15,
+}
+
+# Peso de cada nova medição na média móvel exponencial das taxas
+SUAVIZACAO_TAXAS = 0.3
+
+
+class MetricasArquivo:
+    """
+    Tempos e contadores de um arquivo. Usado por uma thread do lote de cada
+    vez (o mesmo arquivo não é processado em paralelo).
+    """
+
+    def __init__(self):
+        self.tempos = {}
+        self.contadores = {}
+
+    @contextmanager
+    def etapa(self, nome: str):
+        """Acumula em tempos[nome] a duração do bloco with."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.somar_tempo(nome, time.perf_counter() - inicio)
+
+    def somar_tempo(self, nome: str, segundos: float):
+        self.tempos[nome] = self.tempos.get(nome, 0.0) + segundos
+
+    def contar(self, nome: str, quantidade: int = 1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+
+def _paginas_da_etapa(resumo, etapa):
+    # O OCR só conta as páginas que passaram por ele (as demais tinham texto ou estavam no cache)
+    if etapa == "ocr" and resumo.get("paginas_ocr") is not None:
+        return resumo["paginas_ocr"]
+    return resumo.get("paginas") or 0
+
+
+def resumo_lote(resumos, tempo_total: float = None) -> dict:
+    """
+    Agrega os resumos por arquivo: totais de páginas, bytes e contadores,
+    tempo somado de cada etapa e páginas por segundo de cada etapa.
+    """
+    processados = [r for r in resumos if r.get("status") == "ok" and not r.get("cache")]
+    tempos = {}
+    paginas_por_etapa = {}
+    contadores = {}
+    for resumo in processados:
+        for etapa in ETAPAS_METRICAS:
+            if etapa in resumo.get("tempos", {}):
+                tempos[etapa] = tempos.get(etapa, 0.0) + resumo["tempos"][etapa]
+                paginas_por_etapa[etapa] = paginas_por_etapa.get(etapa, 0) + _paginas_da_etapa(resumo, etapa)
+        for nome, valor in resumo.get("contadores", {}).items():
+            contadores[nome] = contadores.get(nome, 0) + valor
+    return {
+        "arquivos": len(resumos),
+        "processados": len(processados),
+        "cache": sum(1 for r in resumos if r.get("cache")),
+        "erros": sum(1 for r in resumos if r.get("status") == "erro"),
+        "paginas": sum(r.get("paginas") or 0 for r in processados),
+        "tempo_total": tempo_total,
+        "tempos": tempos,
+        "paginas_por_segundo": {etapa: paginas_por_etapa[etapa] / segundos
+                                for etapa, segundos in tempos.items() if segundos > 0},
+        "contadores": contadores,
+    }
+
+
+def exportar_metricas(caminho: str, resumos, tempo_total: float = None) -> dict:
+    """
+    Acrescenta ao arquivo JSON lines uma linha {"tipo": "arquivo", ...} por
+    resumo e uma linha final {"tipo": "lote", ...} com resumo_lote().
+    Retorna o resumo do lote.
+    """
+    lote = resumo_lote(resumos, tempo_total)
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    momento = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(caminho, "a", encoding="utf-8") as f:
+        for resumo in resumos:
+            f.write(json.dumps({"tipo": "arquivo", "momento": momento, **resumo}, ensure_ascii=False) + "\n")
+        f.write(json.dumps({"tipo": "lote", "momento": momento, **lote}, ensure_ascii=False) + "\n")
+    return lote
+
+
+class EstimadorEtapas:
+    """
+    Segundos por página de cada etapa, começando em SEGUNDOS_POR_PAGINA_PADRAO
+    (ou no arquivo de taxas) e atualizados com cada arquivo processado.
+    Compartilhado pelas threads do lote.
+    """
+
+    def __init__(self, caminho: str = None):
+        self.caminho = caminho
+        self.taxas = dict(SEGUNDOS_POR_PAGINA_PADRAO)
+        self._trava = threading.Lock()
+        if caminho and os.path.exists(caminho):
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    self.taxas.update({etapa: float(taxa) for etapa, taxa in json.load(f).items()
+                                       if etapa in ETAPAS_METRICAS})
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                logging.warning(f"Taxas das etapas ignoradas ({caminho}): {e}")
+
+    def prever(self, etapas, paginas: int) -> dict:
+        """Segundos previstos para cada etapa em `etapas` num arquivo de `paginas` páginas."""
+        paginas = max(1, paginas or 1)
+        with self._trava:
+            return {etapa: self.taxas[etapa] * paginas for etapa in etapas}
+
+    def atualizar(self, resumo: dict):
+        """Incorpora os tempos medidos de um arquivo processado (acertos de cache são ignorados)."""
+        if resumo.get("status") != "ok" or resumo.get("cache"):
+            return
+        with self._trava:
+            for etapa in ETAPAS_METRICAS:
+                segundos = resumo.get("tempos", {}).get(etapa)
+                paginas = _paginas_da_etapa(resumo, etapa)
+                if segundos is None or not paginas:
+                    continue
+                self.taxas[etapa] += SUAVIZACAO_TAXAS * (segundos / paginas - self.taxas[etapa])
+
+    def salvar(self):
+        """Grava as taxas atuais em self.caminho (se houver)."""
+        if not self.caminho:
+            return
+        with self._trava:
+            taxas = dict(self.taxas)
+        try:
+            with open(self.caminho, "w", encoding="utf-8") as f:
+                json.dump(taxas, f, indent=2)
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar as taxas das etapas em {self.caminho}: {e}")
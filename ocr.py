@@ -0,0 +1,474 @@
+# ocr.py
+# ------------------------------------------------------------------
+# Etapa de OCR do pipeline, sem dependência da interface gráfica:
+# binarização (modo "mono"), resolução dos executáveis externos
+# (Ghostscript, Tesseract, ocrmypdf) e execução do ocrmypdf.
+# Avisos ao usuário são entregues pelo callback `avisar(mensagem)`;
+# a GUI mostra uma messagebox, a CLI apenas registra no log.
+# ------------------------------------------------------------------
+
+import os
+import hashlib
+import shutil
+import subprocess
+import logging
+
+import fitz  # PyMuPDF
+
+from binarizer import binarizar_pagina
+from ocr_tesseract import executar_ocr_tesseract
+from batch_scheduler import ProcessamentoCancelado, executar_subprocesso, trava_mupdf
+from config_gui import load_config
+from streaming import processar_em_janelas
+from metricas import MetricasArquivo
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Nomes dos executáveis quando não há caminho configurado nem versão portátil
+GS_PADRAO = "gswin64c.exe" if os.name == "nt" else "gs"
+TESSERACT_PADRAO = "tesseract.exe" if os.name == "nt" else "tesseract"
+
+# Resolução da renderização no modo "mono"
+DPI_BINARIZACAO = 300
+
+# Pré-varredura das páginas (ver classificar_pagina)
+MIN_CARACTERES_TEXTO = 10    # abaixo disso a página é tratada como sem camada de texto
+# Fração da página coberta por imagens acima da qual uma página com texto vai ao OCR.
+# 0 = qualquer imagem: um RG/CPF digitalizado pequeno numa página digital também é lido
+AREA_MINIMA_IMAGEM = 0.0
+
+# Incrementar ao mudar os parâmetros do ocrmypdf: invalida o cache de páginas
+VERSAO_OCR = 1
+
+# "ocrmypdf" = subprocesso por arquivo (saída PDF/A); "tesseract" = em processo (ver ocr_tesseract.py)
+MOTORES_OCR = ("ocrmypdf", "tesseract")
+
+
+def _avisar_log(mensagem):
+    logging.warning(mensagem)
+
+
+def _executavel(caminho) -> bool:
+    return bool(caminho) and os.path.isfile(caminho) and os.access(caminho, os.X_OK)
+
+
+def ghostscript_disponivel(gs_path) -> bool:
+    """True se gs_path é um arquivo executável ou um comando encontrado no PATH."""
+    return bool(gs_path) and (_executavel(gs_path) or shutil.which(gs_path) is not None)
+
+
+def resolver_ghostscript(avisar=None):
+    """
+    Resolve o executável do Ghostscript: caminho do config.json, depois a
+    versão portátil em ghostscript/bin (gswin64c.exe, só no Windows) e, por
+    último, GS_PADRAO no PATH do sistema. Só aceita arquivos executáveis.
+    """
+    avisar = avisar or _avisar_log
+    portable_gs_path = os.path.join(SCRIPT_DIR, "ghostscript", "bin", "gswin64c.exe") if os.name == "nt" else None
+    try:
+        cfg = load_config()
+        configured_gs_path = cfg.get("paths", {}).get("ghostscript_path")
+        if _executavel(configured_gs_path):
+            return configured_gs_path
+        if _executavel(portable_gs_path):
+            return portable_gs_path
+        avisar("Ghostscript não encontrado no caminho configurado nem no caminho portátil padrão. OCR pode falhar. Verifique 'config.json' ou a pasta 'ghostscript/bin'.")
+        logging.warning(f"Ghostscript not found at configured path {configured_gs_path} or default portable path {portable_gs_path}. Relying on system PATH.")
+    except Exception as caught_e_gs: # Captura a exceção com um nome diferente
+        logging.error(f"Erro ao carregar caminho do Ghostscript do config: {caught_e_gs}")
+        if _executavel(portable_gs_path):
+            return portable_gs_path
+        avisar(f"Erro ao verificar Ghostscript: {caught_e_gs}. OCR pode falhar. Tente configurar manualmente.")
+    # Última tentativa: confia no PATH do sistema
+    return GS_PADRAO
+
+
+def resolver_tesseract(avisar=None):
+    """
+    Resolve o executável do Tesseract (config.json, depois a pasta portátil 'tesseract').
+    Retorna None para deixar o ocrmypdf usar o Tesseract do PATH.
+    """
+    avisar = avisar or _avisar_log
+    try:
+        cfg = load_config()
+        configured_tesseract_path = cfg.get("paths", {}).get("tesseract_path")
+        if configured_tesseract_path and os.path.isfile(configured_tesseract_path):
+            return configured_tesseract_path
+        portable_tesseract_path = os.path.join(SCRIPT_DIR, "tesseract", "tesseract.exe")
+        if os.path.isfile(portable_tesseract_path):
+            return portable_tesseract_path
+        avisar("Tesseract não encontrado no caminho configurado nem no caminho portátil padrão. OCR pode falhar. Verifique 'config.json' ou a pasta 'tesseract'.")
+        logging.warning(f"Tesseract not found at configured path {configured_tesseract_path} or default portable path {portable_tesseract_path}. Relying on system PATH for Tesseract.")
+    except Exception as caught_e_tess: # Captura a exceção com um nome diferente
+        logging.error(f"Erro ao carregar caminho do Tesseract do config: {caught_e_tess}")
+        avisar(f"Erro ao verificar Tesseract: {caught_e_tess}. OCR pode falhar. Tente configurar manualmente.")
+    return None
+
+
+def resolver_tessdata(avisar=None):
+    """
+    Pasta de idiomas do Tesseract para o motor em processo: TESSDATA_PREFIX,
+    "tessdata_path" do config.json, a pasta 'tessdata' ao lado do executável
+    resolvido e, por fim, a detecção do PyMuPDF. Retorna None se não encontrar.
+    """
+    avisar = avisar or _avisar_log
+    if os.environ.get("TESSDATA_PREFIX"):
+        return os.environ["TESSDATA_PREFIX"]
+    configurado = load_config().get("paths", {}).get("tessdata_path")
+    if configurado and os.path.isdir(configurado):
+        return configurado
+    tesseract_path = resolver_tesseract(avisar)
+    if tesseract_path and os.path.isdir(os.path.join(os.path.dirname(tesseract_path), "tessdata")):
+        return os.path.join(os.path.dirname(tesseract_path), "tessdata")
+    try:
+        return fitz.get_tessdata()
+    except Exception as e:
+        logging.warning(f"Tessdata não encontrado: {e}")
+        return None
+
+
+def _resolver_ocrmypdf(env):
+    # O venv fica um nível acima da pasta dos scripts
+    venv_scripts_dir = os.path.join(os.path.dirname(SCRIPT_DIR), "venv", "Scripts")
+    ocrmypdf_executable = os.path.join(venv_scripts_dir, "ocrmypdf.exe")
+
+    # Se ocrmypdf.exe não for encontrado no venv, então confia no PATH.
+    if not os.path.isfile(ocrmypdf_executable):
+        logging.warning(f"ocrmypdf.exe não encontrado nos scripts do venv: {ocrmypdf_executable}. Tentando usar do PATH do sistema.")
+        return "ocrmypdf" # O nome do comando, que será resolvido via PATH
+    logging.info(f"Usando ocrmypdf do venv: {ocrmypdf_executable}")
+    # Garante que o diretório do ocrmypdf do venv esteja no PATH para subprocessos
+    env["PATH"] = venv_scripts_dir + os.pathsep + env["PATH"]
+    return ocrmypdf_executable
+
+
+def _opcoes_subprocesso():
+    # Evita abrir uma janela de console para cada subprocesso no Windows
+    if os.name != "nt":
+        return {}
+    si = subprocess.STARTUPINFO()
+    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return {"startupinfo": si}
+
+
+def executar_ocr(input_file: str, output_file: str, cancel_event=None, avisar=None):
+    """Executa o ocrmypdf (PDF/A, português, --force-ocr) sobre input_file."""
+    logging.info(f"Iniciando OCR em: {os.path.basename(input_file)}")
+
+    env = os.environ.copy()
+    ghostscript_exec_path = resolver_ghostscript(avisar)
+    # Adiciona o diretório do Ghostscript ao PATH se o caminho resolvido for um diretório válido
+    if os.path.dirname(ghostscript_exec_path) and os.path.isdir(os.path.dirname(ghostscript_exec_path)):
+        env["PATH"] = os.path.dirname(ghostscript_exec_path) + os.pathsep + env["PATH"]
+    logging.info(f"Usando Ghostscript de: {ghostscript_exec_path}")
+
+    command = [
+        _resolver_ocrmypdf(env), # Usa o caminho resolvido para o executável
+        "-l", "por", "--output-type", "pdfa",
+        "-O", "1", "--force-ocr", input_file, output_file,
+    ]
+    tesseract_path = resolver_tesseract(avisar)
+    if tesseract_path:
+        command.extend(["--tesseract-executable", tesseract_path])
+
+    logging.info(f"Executando comando OCR: {' '.join(command)}")
+    # Respeita o limite de subprocessos do lote e é encerrado se o usuário cancelar
+    executar_subprocesso(command, cancel_event, env=env, **_opcoes_subprocesso())
+    logging.info(f"OCR concluído: {os.path.basename(output_file)}")
+
+
+def resolver_motor_ocr(motor: str, avisar=None):
+    """
+    Motor de OCR que será usado de fato e a pasta tessdata dele: o "tesseract"
+    sem dados de idioma cai para o ocrmypdf, com aviso.
+    Retorna (motor, tessdata); tessdata é None no ocrmypdf.
+    """
+    if motor == "tesseract":
+        tessdata = resolver_tessdata(avisar)
+        if tessdata:
+            return motor, tessdata
+        (avisar or _avisar_log)("Dados de idioma do Tesseract (tessdata) não encontrados; usando o ocrmypdf.")
+        return "ocrmypdf", None
+    if motor != "ocrmypdf":
+        raise ValueError(f"Motor de OCR desconhecido: {motor}")
+    return motor, None
+
+
+def executar_motor_ocr(motor: str, input_file: str, output_file: str, cancel_event=None,
+                       avisar=None, workers: int = 2, tessdata: str = None):
+    """
+    OCR de todas as páginas com o motor escolhido (ver MOTORES_OCR).
+    • tessdata ..... pasta já resolvida por resolver_motor_ocr; sem ela, o motor é resolvido aqui
+    Retorna as palavras reconhecidas por página (formato de page.get_text("words"))
+    quando o motor as fornece ("tesseract"), ou None (ocrmypdf).
+    """
+    if motor != "tesseract" or tessdata is None:
+        motor, tessdata = resolver_motor_ocr(motor, avisar)
+    if motor == "tesseract":
+        return executar_ocr_tesseract(input_file, output_file, tessdata, cancel_event, workers)
+    executar_ocr(input_file, output_file, cancel_event, avisar)
+    return None
+
+
+def classificar_pagina(page, area_minima_imagem: float = AREA_MINIMA_IMAGEM) -> str:
+    """
+    Classifica a página pelo conteúdo, sem renderizar:
+    "texto" (camada de texto, sem imagens relevantes), "imagem" (só imagens),
+    "mista" (texto e imagens cobrindo mais que area_minima_imagem da página) ou "vazia".
+    """
+    tem_texto = len(page.get_text("text").strip()) >= MIN_CARACTERES_TEXTO
+    area_pagina = abs(page.rect) or 1
+    area_imagens = 0.0
+    for info in page.get_image_info():
+        area_imagens += abs(fitz.Rect(info["bbox"]) & page.rect)
+    cobertura = min(area_imagens / area_pagina, 1.0)
+
+    if not tem_texto:
+        return "imagem" if cobertura > 0 else "vazia"
+    return "mista" if cobertura > area_minima_imagem else "texto"
+
+
+def precisa_ocr(classe: str) -> bool:
+    return classe in ("imagem", "mista")
+
+
+def hash_conteudo_pagina(page, motor: str = "ocrmypdf") -> str:
+    """
+    Hash do que a página desenha: geometria, content streams, XObjects e
+    imagens (dicionário + dados brutos), mais o motor de OCR. Mesma página
+    em outro documento gera o mesmo hash, o que permite reaproveitar o OCR dela.
+    """
+    doc = page.parent
+    h = hashlib.sha256(f"{VERSAO_OCR}|{motor}|{tuple(page.rect)}|{page.rotation}".encode())
+    xrefs = list(page.get_contents())
+    xrefs += [x[0] for x in page.get_xobjects()]
+    xrefs += [img[0] for img in page.get_images(full=True)]
+    for xref in xrefs:
+        h.update(doc.xref_object(xref, compressed=True).encode())
+        h.update(doc.xref_stream_raw(xref) or b"")
+    return h.hexdigest()
+
+
+def executar_ocr_por_pagina(input_file: str, output_file: str, cancel_event=None, avisar=None,
+                            cache_paginas=None, motor: str = "ocrmypdf", workers: int = 2,
+                            area_minima_imagem: float = AREA_MINIMA_IMAGEM) -> dict:
+    """
+    OCR só das páginas que precisam (ver classificar_pagina). As páginas com
+    camada de texto são copiadas como estão; as demais vêm do cache de páginas
+    (cache_paginas, um CacheResultados indexado por hash_conteudo_pagina) ou
+    vão numa única chamada ao motor de OCR (ocrmypdf com --force-ocr ou o
+    Tesseract em processo), e o resultado de cada uma é guardado no cache.
+    Se todas precisarem de OCR e nenhuma estiver no cache, o arquivo inteiro
+    vai direto ao motor (com ocrmypdf a saída é PDF/A, como antes).
+    Retorna {"paginas_ocr": enviadas ao OCR, "paginas_cache": reaproveitadas,
+    "motor": motor usado de fato (ver resolver_motor_ocr),
+    "palavras": {página: palavras}}; "palavras" só traz as páginas cujas
+    caixas o motor forneceu (também guardadas no cache), para a redação usá-las
+    sem extrair o texto de novo. Nas páginas "mista" a camada de texto original
+    continua na página, então as palavras dela vêm junto com as do OCR (ver
+    _combinar_palavras); só nas páginas "imagem" a lista é apenas a do OCR.
+    """
+    motor, tessdata = resolver_motor_ocr(motor, avisar)
+    with trava_mupdf:
+        with fitz.open(input_file) as doc:
+            classes = [classificar_pagina(page, area_minima_imagem) for page in doc]
+            hashes = {i: hash_conteudo_pagina(doc[i], motor) for i, classe in enumerate(classes) if precisa_ocr(classe)}
+            nativas = {i: doc[i].get_text("words") for i, classe in enumerate(classes) if classe == "mista"}
+
+    em_cache = {}
+    palavras = {}
+    if cache_paginas is not None:
+        for i, chave in hashes.items():
+            encontrado = cache_paginas.obter_dados(chave)
+            if encontrado is not None:
+                em_cache[i] = encontrado[0]
+                if encontrado[1].get("palavras") is not None:
+                    palavras[i] = [tuple(w) for w in encontrado[1]["palavras"]]
+    pendentes = [i for i in hashes if i not in em_cache]
+    logging.info(f"Pré-varredura de {os.path.basename(input_file)}: {len(classes)} páginas, "
+                 f"{len(hashes)} precisam de OCR, {len(em_cache)} no cache.")
+
+    if len(pendentes) == len(classes):
+        palavras_motor = executar_motor_ocr(motor, input_file, output_file, cancel_event, avisar, workers,
+                                            tessdata)
+        paginas_ocr = {i: i for i in pendentes}
+        caminho_ocr = output_file
+    elif pendentes:
+        # Só as páginas pendentes vão ao OCR, num documento temporário
+        caminho_pendentes = os.path.splitext(output_file)[0] + "_pendentes.pdf"
+        caminho_ocr = os.path.splitext(output_file)[0] + "_pendentes_ocr.pdf"
+        with trava_mupdf:
+            with fitz.open(input_file) as doc, fitz.open() as parcial:
+                for i in pendentes:
+                    parcial.insert_pdf(doc, from_page=i, to_page=i)
+                parcial.save(caminho_pendentes, garbage=3, deflate=True)
+        try:
+            palavras_motor = executar_motor_ocr(motor, caminho_pendentes, caminho_ocr, cancel_event, avisar,
+                                                workers, tessdata)
+        finally:
+            os.remove(caminho_pendentes)
+        paginas_ocr = {i: posicao for posicao, i in enumerate(pendentes)}
+    else:
+        paginas_ocr = {}
+        caminho_ocr = None
+        palavras_motor = None
+    if palavras_motor is not None:
+        palavras.update({i: palavras_motor[posicao] for i, posicao in paginas_ocr.items()})
+
+    if cancel_event is not None and cancel_event.is_set():
+        raise ProcessamentoCancelado()
+
+    if not paginas_ocr and not em_cache:
+        # Nenhuma página precisa de OCR: o arquivo segue como está
+        shutil.copyfile(input_file, output_file)
+        return {"paginas_ocr": 0, "paginas_cache": 0, "motor": motor, "palavras": {}}
+
+    with trava_mupdf:
+        abrir_ocr = caminho_ocr and (cache_paginas is not None or caminho_ocr != output_file)
+        doc_ocr = fitz.open(caminho_ocr) if abrir_ocr else None
+        try:
+            if cache_paginas is not None and doc_ocr is not None:
+                for i, posicao in paginas_ocr.items():
+                    with fitz.open() as pagina:
+                        pagina.insert_pdf(doc_ocr, from_page=posicao, to_page=posicao)
+                        cache_paginas.guardar_dados(hashes[i], pagina.tobytes(garbage=3, deflate=True),
+                                                    {"classe": classes[i], "palavras": palavras.get(i)})
+            if caminho_ocr != output_file:
+                _montar_documento(input_file, output_file, doc_ocr, paginas_ocr, em_cache)
+        finally:
+            if doc_ocr is not None:
+                doc_ocr.close()
+            if caminho_ocr and caminho_ocr != output_file:
+                os.remove(caminho_ocr)
+
+    for i in palavras.keys() & nativas.keys():
+        palavras[i] = _combinar_palavras(nativas[i], palavras[i])
+    return {"paginas_ocr": len(pendentes), "paginas_cache": len(em_cache), "motor": motor,
+            "palavras": palavras}
+
+
+def _combinar_palavras(nativas, reconhecidas):
+    # Palavras da camada de texto original seguidas das do OCR; os blocos do OCR são
+    # renumerados depois dos nativos para que nenhuma linha junte palavras das duas listas
+    if not nativas:
+        return reconhecidas
+    deslocamento = max(w[5] for w in nativas) + 1
+    return [tuple(w[:8]) for w in nativas] + [(*w[:5], w[5] + deslocamento, *w[6:8]) for w in reconhecidas]
+
+
+def _montar_documento(input_file, output_file, doc_ocr, paginas_ocr, em_cache):
+    # Página a página: original, resultado do ocrmypdf ou cópia do cache.
+    # Páginas originais consecutivas são copiadas num único insert_pdf.
+    with fitz.open(input_file) as doc, fitz.open() as saida:
+        inicio_trecho = None
+        for i in range(len(doc) + 1):
+            substituida = i < len(doc) and (i in paginas_ocr or i in em_cache)
+            if (i == len(doc) or substituida) and inicio_trecho is not None:
+                saida.insert_pdf(doc, from_page=inicio_trecho, to_page=i - 1)
+                inicio_trecho = None
+            if i == len(doc):
+                break
+            if i in paginas_ocr:
+                saida.insert_pdf(doc_ocr, from_page=paginas_ocr[i], to_page=paginas_ocr[i])
+            elif i in em_cache:
+                with fitz.open("pdf", em_cache[i]) as pagina:
+                    saida.insert_pdf(pagina)
+            elif inicio_trecho is None:
+                inicio_trecho = i
+        saida.set_metadata(doc.metadata)
+        saida.set_toc(doc.get_toc(simple=False))
+        saida.save(output_file, garbage=4, deflate=True)
+
+
+def binarizar_pdf(input_path: str, output_path: str, dpi: int = DPI_BINARIZACAO, janela_paginas: int = None,
+                  metodo: str = "floyd", cancel_event=None, reportar=None, peso_progresso: float = 0.3):
+    """
+    Converte o PDF em páginas de imagem 1 bit (modo OCR "mono").
+    • janela_paginas .. processa em janelas com memória limitada (ver streaming.py)
+    • metodo .......... ver binarizer.METODOS_BINARIZACAO
+    • reportar ........ callback (mensagem, fracao); a binarização vai de 0 a peso_progresso
+    """
+    logging.info(f"Iniciando binarização para: {os.path.basename(input_path)}")
+
+    progress_weight_for_binarization = peso_progresso
+
+    def binarizar_paginas(source_doc, output_doc, inicio, fim):
+        num_pages = len(source_doc)
+        for i in range(inicio, fim):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if reportar:
+                reportar(f"Binarizando {os.path.basename(input_path)} (Pág. {i+1}/{num_pages})",
+                         ((i + 1) / num_pages) * progress_weight_for_binarization)
+            binarizar_pagina(source_doc[i], output_doc, dpi, metodo)
+
+    if janela_paginas:
+        # Modo streaming: cada janela de páginas vira um documento parcial que é
+        # anexado ao arquivo de saída e liberado, mantendo a memória constante.
+        def gerar_janela(source_doc, inicio, fim):
+            parte = fitz.open()
+            binarizar_paginas(source_doc, parte, inicio, fim)
+            return parte
+
+        processar_em_janelas(input_path, output_path, gerar_janela, janela_paginas,
+                             compactar=False, cancel_event=cancel_event)
+    else:
+        source_doc = fitz.open(input_path)
+        output_doc = fitz.open()
+        binarizar_paginas(source_doc, output_doc, 0, len(source_doc))
+        output_doc.save(output_path)
+        output_doc.close()
+        source_doc.close()
+    logging.info(f"Binarização concluída: {os.path.basename(output_path)}")
+
+
+def run_full_ocr_pipeline(input_path: str, final_output_path: str, mode: str,
+                          cancel_event=None, reportar=None, avisar=None,
+                          janela_paginas: int = None, metodo_binarizacao: str = "floyd",
+                          cache_paginas=None, motor_ocr: str = "ocrmypdf", workers_ocr: int = 2,
+                          metricas=None, peso_binarizacao: float = 0.3,
+                          area_minima_imagem: float = AREA_MINIMA_IMAGEM) -> dict:
+    """
+    Orquestra a etapa de OCR no modo 'mono' (binarização + OCR) ou 'grayscale'.
+    No modo 'grayscale' só as páginas sem camada de texto vão ao OCR; no 'mono'
+    todas são binarizadas (perdem o texto) e portanto todas precisam de OCR,
+    mas ambos reaproveitam páginas já reconhecidas via cache_paginas.
+    • motor_ocr .... ver MOTORES_OCR; workers_ocr = processos do motor "tesseract"
+    • reportar ..... callback (mensagem, fracao da etapa de OCR 0..1)
+    • metricas ..... MetricasArquivo opcional: tempos de "binarizacao" e "ocr"
+    • peso_binarizacao fração do progresso da etapa atribuída à binarização (modo mono)
+    • area_minima_imagem  cobertura por imagens a partir da qual uma página com texto vai ao
+                      OCR no modo 'grayscale' (ver classificar_pagina)
+    As etapas com PyMuPDF rodam dentro de batch_scheduler.trava_mupdf.
+    Retorna o resultado de executar_ocr_por_pagina (contagens e palavras do OCR).
+    """
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    reportar = reportar or (lambda mensagem, fracao: None)
+    metricas = metricas or MetricasArquivo()
+
+    if mode == 'mono':
+        temp_binarized_path = os.path.splitext(final_output_path)[0] + "_binarized.pdf"
+        try:
+            with trava_mupdf, metricas.etapa("binarizacao"):
+                binarizar_pdf(input_path, temp_binarized_path, janela_paginas=janela_paginas,
+                              metodo=metodo_binarizacao, cancel_event=cancel_event, reportar=reportar,
+                              peso_progresso=peso_binarizacao)
+            if cancel_event is not None and cancel_event.is_set():
+                raise ProcessamentoCancelado()
+
+            # Progresso já inclui o peso da binarização; o restante é do OCR
+            reportar(f"Aplicando OCR - {base_name}", peso_binarizacao)
+            with metricas.etapa("ocr"):
+                return executar_ocr_por_pagina(temp_binarized_path, final_output_path, cancel_event, avisar,
+                                               cache_paginas, motor_ocr, workers_ocr, area_minima_imagem)
+        finally:
+            if os.path.exists(temp_binarized_path):
+                os.remove(temp_binarized_path)
+    elif mode == 'grayscale':
+        # Para grayscale, não há binarização.
+        reportar(f"Executando OCR em Tons de Cinza - {base_name}", 0.0)
+        with metricas.etapa("ocr"):
+            return executar_ocr_por_pagina(input_path, final_output_path, cancel_event, avisar,
+                                           cache_paginas, motor_ocr, workers_ocr, area_minima_imagem)
+    else:
+        raise ValueError(f"Modo OCR desconhecido: {mode}")
@@ -0,0 +1,154 @@
+# ocr_tesseract.py
+# ------------------------------------------------------------------
+# Motor de OCR em processo, alternativo ao ocrmypdf: as páginas são
+# renderizadas e reconhecidas pelo Tesseract embutido no PyMuPDF
+# (page.get_textpage_ocr) num pool de processos persistente, reaproveitado
+# entre arquivos, e a camada de texto invisível é inserida aqui mesmo
+# sobre a página original. Evita subir ocrmypdf + Ghostscript + um
+# Tesseract por página, o que domina o tempo em PDFs de poucas páginas.
+#
+# Diferente do ocrmypdf, a saída não é convertida para PDF/A e o
+# conteúdo original da página não é rasterizado. As caixas das palavras
+# reconhecidas são devolvidas no formato de page.get_text("words"), para
+# que a redação rode sobre elas sem extrair o texto de novo.
+# ------------------------------------------------------------------
+
+import os
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import fitz  # PyMuPDF
+
+from batch_scheduler import ProcessamentoCancelado, trava_mupdf
+
+DPI_OCR = 300
+IDIOMA_OCR = "por"
+
+# Folga (em pontos) nas caixas devolvidas para a redação: as caixas do
+# Tesseract costumam cortar a borda do último glifo da palavra
+MARGEM_CAIXA_OCR = 1.5
+
+_pool = None
+_workers_pool = 0
+_trava_pool = threading.Lock()
+
+
+def _obter_pool(workers: int) -> ProcessPoolExecutor:
+    # Reaproveitado entre arquivos até encerrar_pool (fim do lote, ou do programa):
+    # os workers já carregaram o PyMuPDF e os dados de idioma do Tesseract.
+    # Um pedido com outro número de workers recria o pool com o novo tamanho.
+    global _pool, _workers_pool
+    workers = max(1, workers)
+    with _trava_pool:
+        if _pool is not None and _workers_pool != workers:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _workers_pool = workers
+        return _pool
+
+
+def encerrar_pool():
+    """Encerra o pool de workers do OCR (é recriado na próxima chamada)."""
+    global _pool
+    with _trava_pool:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(encerrar_pool)
+
+
+def _reconhecer_pagina(input_file, numero, dpi, idioma, tessdata):
+    # Roda no worker: devolve as palavras (x0, y0, x1, y1, texto, bloco, linha, palavra) reconhecidas.
+    # Exceções do MuPDF não atravessam o pool (não são serializáveis): viram RuntimeError.
+    try:
+        with fitz.open(input_file) as doc:
+            page = doc[numero]
+            textpage = page.get_textpage_ocr(language=idioma, dpi=dpi, full=True, tessdata=tessdata)
+            return [tuple(w[:8]) for w in page.get_text("words", textpage=textpage)]
+    except Exception as e:
+        raise RuntimeError(f"OCR da página {numero + 1} falhou: {e}") from None
+
+
+def inserir_camada_texto(page, palavras, fonte=None):
+    """
+    Escreve as palavras (saída de page.get_text("words")) como texto invisível
+    (render_mode=3) sobre a página, cada uma ajustada à largura da sua caixa,
+    para que busca, seleção e os detectores de redação encontrem o texto no
+    lugar da imagem. As palavras de uma linha do OCR compartilham a linha de
+    base, para que a extração as devolva como uma linha só.
+    Retorna as palavras com a caixa ampliada para cobrir também o texto
+    invisível escrito, de modo que redigir essas caixas remove a palavra da
+    imagem e da camada de texto.
+    """
+    if not palavras:
+        return []
+    fonte = fonte or fitz.Font("helv")
+    altura_fonte = fonte.ascender - fonte.descender
+    base_da_linha = {}
+    for palavra in palavras:
+        linha = tuple(palavra[5:7])
+        base_da_linha[linha] = max(base_da_linha.get(linha, palavra[3]), palavra[3])
+
+    escrita = fitz.TextWriter(page.rect)
+    caixas = []
+    for x0, y0, x1, y1, texto, *linha in palavras:
+        # As caixas vêm no espaço da página exibida, o mesmo usado pelo TextWriter
+        rect = fitz.Rect(x0, y0, x1, y1)
+        largura = fonte.text_length(texto, fontsize=1)
+        if largura <= 0 or rect.is_empty:
+            continue
+        # A largura manda: a caixa extraída depois precisa cobrir a palavra inteira
+        # na imagem, senão a redação deixa letras visíveis. O teto evita letras
+        # estreitas ("l", "1") com corpo desproporcional.
+        tamanho = min(rect.width / largura, 2 * rect.height / altura_fonte)
+        base = base_da_linha.get(tuple(linha[:2]), y1)
+        escrita.append((rect.x0, base + fonte.descender * tamanho), texto, font=fonte, fontsize=tamanho)
+        escrito = fitz.Rect(rect.x0, base - altura_fonte * tamanho, rect.x0 + largura * tamanho, base)
+        caixas.append((*((rect | escrito) + (-MARGEM_CAIXA_OCR, 0, MARGEM_CAIXA_OCR, 0)), texto, *linha))
+    escrita.write_text(page, render_mode=3)
+    return caixas
+
+
+def executar_ocr_tesseract(input_file: str, output_file: str, tessdata: str, cancel_event=None,
+                           workers: int = 2, dpi: int = DPI_OCR, idioma: str = IDIOMA_OCR):
+    """
+    OCR de todas as páginas de input_file, equivalente ao executar_ocr com --force-ocr,
+    mas sem subprocessos por arquivo. As páginas são distribuídas no pool persistente
+    (workers processos, fixado na primeira chamada); o cancel_event é verificado
+    enquanto elas são reconhecidas.
+    Retorna, por página, as palavras no formato de page.get_text("words")
+    (ver inserir_camada_texto).
+    """
+    logging.info(f"Iniciando OCR em processo (Tesseract) em: {os.path.basename(input_file)}")
+    with trava_mupdf:
+        with fitz.open(input_file) as doc:
+            total_paginas = len(doc)
+
+    pool = _obter_pool(workers)
+    futuros = [pool.submit(_reconhecer_pagina, input_file, i, dpi, idioma, tessdata)
+               for i in range(total_paginas)]
+    pendentes = set(futuros)
+    try:
+        while pendentes:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ProcessamentoCancelado()
+            concluidos, pendentes = wait(pendentes, timeout=0.2, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                futuro.result()  # propaga erros do worker
+    finally:
+        for futuro in pendentes:
+            futuro.cancel()
+
+    with trava_mupdf:
+        with fitz.open(input_file) as doc:
+            fonte = fitz.Font("helv")
+            palavras = [inserir_camada_texto(page, futuro.result(), fonte) for page, futuro in zip(doc, futuros)]
+            doc.save(output_file, garbage=3, deflate=True)
+    logging.info(f"OCR em processo concluído: {os.path.basename(output_file)}")
+    return palavras
@@ -0,0 +1,584 @@
+# pipeline.py
+# ------------------------------------------------------------------
+# Pipeline completo OCR -> CPF/termos -> compressão, sem interface
+# gráfica. Usado pela GUI (gui_anonymizer.py) e pela linha de comando
+# (cli.py). Cada arquivo gera um resumo com tempos por etapa e
+# contadores (ver metricas.py); o progresso é proporcional ao tempo
+# previsto de cada etapa, a partir das taxas medidas nos arquivos anteriores.
+# ------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import time
+import logging
+
+import fitz  # PyMuPDF
+
+from detectores import criar_detector_identificadores, tipos_habilitados
+from manual_anonymizer import VERSAO_DETECTOR_TERMOS, detector_automato, detector_termos, detector_termos_palavras
+from aho_corasick import compilar_automato
+from redaction_engine import redigir_documento, redigir_pdf, salvar_pdf
+from batch_scheduler import AgendadorLote, ProcessamentoCancelado, trava_mupdf
+from compressor import ServicoCompressao
+from compressao_imagens import comprimir_imagens
+from config_gui import load_config
+from ocr import DPI_BINARIZACAO, ghostscript_disponivel, resolver_ghostscript, run_full_ocr_pipeline
+from ocr_tesseract import encerrar_pool
+from cache_resultados import CacheResultados, hash_termos
+from registro_log import registrar_resumo_arquivo
+from metricas import EstimadorEtapas, MetricasArquivo, exportar_metricas
+
+# Valores padrão da seção "processamento" do config.json
+OPCOES_PADRAO = {
+    "janela_paginas": 0,         # 0 = documento inteiro em memória (ver streaming.py)
+    "compactar_janelas": False,  # reescrita final no modo em janelas (memória volta a crescer com as páginas)
+    "binarizacao": "floyd",      # método do OCR Mono (ver binarizer.py)
+    "motor_ocr": "ocrmypdf",     # "ocrmypdf" ou "tesseract" em processo (ver ocr.py)
+    "workers_ocr": 2,            # processos do motor "tesseract"
+    "area_minima_imagem_ocr": 0.0,  # páginas com texto vão ao OCR se imagens cobrem mais que isso (0 = qualquer)
+    "politica_cpf": "todos",     # "todos" ou "validos" (ver anonymizer.POLITICAS_CPF)
+    "identificadores": ["cpf"],  # tipos da etapa automática (ver detectores.REGISTRO_IDENTIFICADORES)
+    "limite_termos_automato": 50,  # acima disso os termos manuais usam o autômato Aho-Corasick (0 = sempre)
+    # Arquivos processados em paralelo. Só o OCR e o Ghostscript se sobrepõem: redação,
+    # binarização, gravação e leitura/escrita das imagens passam por batch_scheduler.trava_mupdf
+    "workers_arquivos": 2,
+    "limite_subprocessos": 2,    # ocrmypdf/gs simultâneos
+    "pasta_rascunho": "",        # temporários de ocrmypdf/gs ("" = automático, ver resolver_pasta_rascunho)
+    "qualidade_compressao": "screen",  # -dPDFSETTINGS do Ghostscript
+    "ganho_minimo_compressao": 0.05,   # abaixo dessa redução o arquivo fica sem comprimir
+    "processos_ghostscript": 1,  # instâncias do gs abertas durante o lote (ver compressor.py)
+    "ghostscript_persistente": True,   # False = um gs por arquivo
+    "motor_compressao": "ghostscript",  # "ghostscript", "imagens" (em processo) ou "ambos"
+    "qualidade_jpeg": 75,        # imagens em cinza/cor recomprimidas pelo motor "imagens"
+    "dpi_maximo_imagens": 200,   # acima disso o motor "imagens" reduz a resolução
+    "workers_imagens": 0,        # threads de codificação do motor "imagens" (0 = núcleos da máquina)
+    "cache_ativo": True,         # reaproveita resultados de entradas já processadas
+    "pasta_cache": "cache_resultados",
+    "cache_tamanho_mb": 2048,    # limite do cache; as entradas menos usadas saem primeiro
+    "cache_paginas_ocr_mb": 1024,  # limite do cache de páginas já reconhecidas pelo OCR
+    "nivel_log": "INFO",         # "DEBUG" registra cada match/página (ver registro_log.py)
+    "arquivo_metricas": "",      # JSON lines com as métricas de cada lote ("" = não exporta)
+    "arquivo_taxas": "taxas_etapas.json",  # taxas medidas por etapa, para progresso/ETA ("" = só em memória)
+}
+
+# Motores de compressão que usam o Ghostscript / o compressor de imagens em processo
+MOTORES_GHOSTSCRIPT = ("ghostscript", "ambos")
+MOTORES_IMAGENS = ("imagens", "ambos")
+
+# Pasta em memória (tmpfs) preferida para os temporários dos subprocessos, quando existir
+PASTA_TMPFS = "/dev/shm"
+# Só usa o tmpfs se couber com folga: binarização + OCR + compressão podem
+# gerar alguns arquivos do tamanho do original ao mesmo tempo
+FATOR_ESPACO_RASCUNHO = 4
+
+
+
+def carregar_opcoes_processamento(config=None) -> dict:
+    """Lê a seção "processamento" do config.json, completando com OPCOES_PADRAO."""
+    if config is None:
+        config = load_config()
+    opcoes = dict(OPCOES_PADRAO)
+    opcoes.update(config.get("processamento", {}))
+    return opcoes
+
+
+def etapas_previstas(etapas: dict, termos=None, opcoes=None) -> list:
+    """Etapas de metricas.ETAPAS_METRICAS pelas quais um arquivo vai passar (opcoes: motor_compressao)."""
+    nomes = []
+    if etapas.get("ocr") == "mono":
+        nomes.append("binarizacao")
+    if etapas.get("ocr"):
+        nomes.append("ocr")
+    if etapas.get("auto") or (etapas.get("manual") and termos):
+        nomes += ["deteccao", "aplicacao", "salvamento"]
+    if etapas.get("comp"):
+        motor = (opcoes or OPCOES_PADRAO)["motor_compressao"]
+        if motor in MOTORES_IMAGENS:
+            # O documento com as imagens recomprimidas também é gravado
+            nomes += ["compressao_imagens"] + ([] if "salvamento" in nomes else ["salvamento"])
+        if motor in MOTORES_GHOSTSCRIPT:
+            nomes.append("compressao")
+    return nomes
+
+
+def abrir_estimador(opcoes: dict) -> EstimadorEtapas:
+    """Estimador de tempo por etapa, com as taxas guardadas em opcoes["arquivo_taxas"]."""
+    return EstimadorEtapas(opcoes.get("arquivo_taxas") or None)
+
+
+def resolver_pasta_rascunho(opcoes=None, tamanho_estimado: int = 0) -> str:
+    """
+    Escolhe a pasta local para os temporários dos subprocessos (ocrmypdf, gs).
+    Ordem: variável ANONIMIZADOR_RASCUNHO, opcoes["pasta_rascunho"], /dev/shm
+    (se houver espaço livre para FATOR_ESPACO_RASCUNHO x tamanho_estimado) e,
+    por fim, a pasta temporária do sistema. Nunca usa a pasta de saída, que
+    pode estar em um compartilhamento de rede.
+    """
+    configurada = os.environ.get("ANONIMIZADOR_RASCUNHO") or (opcoes or {}).get("pasta_rascunho")
+    if configurada:
+        os.makedirs(configurada, exist_ok=True)
+        return configurada
+
+    if os.path.isdir(PASTA_TMPFS) and os.access(PASTA_TMPFS, os.W_OK):
+        try:
+            livre = shutil.disk_usage(PASTA_TMPFS).free
+        except OSError:
+            livre = 0
+        if livre > tamanho_estimado * FATOR_ESPACO_RASCUNHO:
+            return PASTA_TMPFS
+        logging.info(f"{PASTA_TMPFS} sem espaço para {tamanho_estimado} bytes; usando a pasta temporária do sistema.")
+    return tempfile.gettempdir()
+
+
+def abrir_cache(opcoes=None):
+    """Cria o CacheResultados descrito nas opções, ou None se o cache estiver desativado."""
+    opcoes = opcoes or carregar_opcoes_processamento()
+    if not opcoes["cache_ativo"] or not opcoes["pasta_cache"]:
+        return None
+    return CacheResultados(opcoes["pasta_cache"], int(opcoes["cache_tamanho_mb"]) * 1024 * 1024)
+
+
+def abrir_cache_paginas(opcoes=None):
+    """Cache das páginas já reconhecidas pelo OCR (subpasta paginas_ocr), ou None se desativado."""
+    opcoes = opcoes or carregar_opcoes_processamento()
+    if not opcoes["cache_ativo"] or not opcoes["pasta_cache"]:
+        return None
+    return CacheResultados(os.path.join(opcoes["pasta_cache"], "paginas_ocr"),
+                           int(opcoes["cache_paginas_ocr_mb"]) * 1024 * 1024)
+
+
+def configuracao_do_cache(etapas: dict, termos, opcoes: dict) -> dict:
+    """
+    Parte da chave de cache que vem das configurações: só entra o que altera
+    o arquivo de saída (janela de páginas e paralelismo não alteram).
+    """
+    configuracao = {"ocr": etapas.get("ocr")}
+    if etapas.get("ocr"):
+        configuracao["motor_ocr"] = opcoes["motor_ocr"]
+        configuracao["area_minima_imagem"] = opcoes["area_minima_imagem_ocr"]
+    if etapas.get("ocr") == "mono":
+        configuracao["binarizacao"] = opcoes["binarizacao"]
+        configuracao["dpi"] = DPI_BINARIZACAO
+    if etapas.get("auto"):
+        configuracao["identificadores"] = [t.assinatura() for t in tipos_habilitados(opcoes["identificadores"])]
+        configuracao["politica"] = opcoes["politica_cpf"]
+    if etapas.get("manual") and termos:
+        configuracao["termos"] = [VERSAO_DETECTOR_TERMOS, hash_termos(termos)]
+        if usar_automato(termos, opcoes):
+            # Palavras inteiras, sem caixa/acento: outro resultado que o search_for
+            configuracao["termos"].append("automato")
+    if etapas.get("comp"):
+        configuracao["compressao"] = [opcoes["motor_compressao"], opcoes["qualidade_compressao"],
+                                      opcoes["ganho_minimo_compressao"]]
+        if opcoes["motor_compressao"] in MOTORES_IMAGENS:
+            configuracao["compressao_imagens"] = [opcoes["qualidade_jpeg"], opcoes["dpi_maximo_imagens"]]
+    return configuracao
+
+
+def usar_automato(termos, opcoes: dict) -> bool:
+    """True se a lista de termos passa de opcoes["limite_termos_automato"]."""
+    return len(termos) > opcoes["limite_termos_automato"]
+
+
+def criar_detector_termos(termos, opcoes: dict, palavras_ocr: bool = False):
+    """
+    Detector da anonimização manual. Listas grandes (ver usar_automato) vão
+    para o autômato Aho-Corasick, compilado uma vez por conjunto de termos e
+    reaproveitado pelos arquivos do lote (ver aho_corasick.compilar_automato);
+    as demais usam page.search_for ou, sobre caixas do OCR, o fluxo de palavras.
+    """
+    if usar_automato(termos, opcoes):
+        return detector_automato(compilar_automato(termos))
+    return detector_termos_palavras(termos) if palavras_ocr else detector_termos(termos)
+
+
+def abrir_compressor(opcoes=None, avisar=None, persistente=None):
+    """
+    Resolve o Ghostscript uma vez (ver ocr.resolver_ghostscript) e cria o
+    ServicoCompressao do lote, ou None se o gs não for encontrado. O gs
+    persistente só lê/grava nas pastas de rascunho possíveis.
+    """
+    opcoes = opcoes or carregar_opcoes_processamento()
+    gs_path = resolver_ghostscript(avisar)
+    if not ghostscript_disponivel(gs_path):
+        return None
+    if persistente is None:
+        persistente = opcoes["ghostscript_persistente"]
+    pastas = [os.environ.get("ANONIMIZADOR_RASCUNHO"), opcoes.get("pasta_rascunho"), PASTA_TMPFS,
+              tempfile.gettempdir()]
+    return ServicoCompressao(gs_path, opcoes["qualidade_compressao"], opcoes["ganho_minimo_compressao"],
+                             processos=opcoes["processos_ghostscript"], persistente=persistente,
+                             pastas_permitidas=[p for p in dict.fromkeys(pastas) if p])
+
+
+def processar_arquivo(pdf_original: str,
+                      pasta_saida: str,
+                      etapas: dict,
+                      termos=None,
+                      opcoes=None,
+                      indice: int = 0,
+                      total: int = 1,
+                      cancel_event=None,
+                      reportar=None,
+                      avisar=None,
+                      cache=None,
+                      cache_paginas=None,
+                      estimador=None,
+                      compressor=None) -> dict:
+    """
+    Executa o pipeline para um único arquivo e grava <nome>_PROCESSADO.pdf em pasta_saida.
+    • etapas .... {"ocr": None|'mono'|'grayscale', "auto": bool, "manual": bool, "comp": bool}
+    • termos .... termos da anonimização manual
+    • reportar .. callback (mensagem, fracao_do_arquivo)
+    • avisar .... callback (mensagem) para avisos não fatais
+    • cache ..... CacheResultados opcional; num acerto o resultado anterior é copiado
+    • cache_paginas .. CacheResultados das páginas reconhecidas pelo OCR (ver ocr.py)
+    • estimador .. EstimadorEtapas: divide o progresso do arquivo pelo tempo previsto de
+                   cada etapa e recebe os tempos medidos ao final
+    • compressor . ServicoCompressao do lote (ver abrir_compressor); se omitido e a
+                   compressão estiver ativa, usa um gs só para este arquivo
+    As etapas em PyMuPDF trocam o fitz.Document aberto entre si; só os
+    subprocessos (ocrmypdf, gs) passam por disco, na pasta de rascunho local
+    (ver resolver_pasta_rascunho). A pasta de saída só recebe o arquivo final.
+    Levanta ProcessamentoCancelado se o cancel_event for acionado.
+    Retorna o resumo do arquivo (status, saída, tempos por etapa, contadores, redações).
+    """
+    opcoes = opcoes or carregar_opcoes_processamento()
+    estimador = estimador or EstimadorEtapas()
+    termos = termos or []
+    reportar = reportar or (lambda mensagem, fracao: None)
+    avisar = avisar or logging.warning
+
+    nome_base = os.path.splitext(os.path.basename(pdf_original))[0]
+    prefixo = f"Arquivo {indice+1}/{total}"
+    nome_final = os.path.join(pasta_saida, f"{nome_base}_PROCESSADO.pdf")
+    caminho_atual = pdf_original
+    doc = None  # documento em memória passado entre as etapas PyMuPDF
+    palavras_ocr = {}
+    rascunho = None
+    resumo = {"arquivo": pdf_original, "saida": None, "status": "ok", "erro": None,
+              "tempos": {}, "redacoes": 0, "paginas": None, "cache": False}
+    metricas = MetricasArquivo()
+    inicio_arquivo = time.perf_counter()
+
+    # Fração do arquivo já concluída; cada etapa avança proporcionalmente ao seu tempo previsto
+    completed_weights_sum = 0.0
+    previsao = {}
+
+    def peso(*nomes):
+        total_previsto = sum(previsao.values())
+        return sum(previsao.get(nome, 0.0) for nome in nomes) / total_previsto if total_previsto else 0.0
+
+    def reportar_etapa(mensagem, fracao):
+        reportar(f"{prefixo}: {mensagem}", fracao)
+
+    def verificar_cancelamento():
+        if cancel_event is not None and cancel_event.is_set():
+            raise ProcessamentoCancelado()
+
+    def caminho_rascunho(sufixo):
+        # Pasta própria por arquivo: evita colisão entre homônimos do mesmo lote
+        nonlocal rascunho
+        if rascunho is None:
+            base = resolver_pasta_rascunho(opcoes, os.path.getsize(pdf_original))
+            rascunho = tempfile.mkdtemp(prefix="anonimizador_", dir=base)
+        return os.path.join(rascunho, f"{nome_base}_{sufixo}.pdf")
+
+    def fechar_documento():
+        nonlocal doc
+        if doc is not None:
+            with trava_mupdf:
+                doc.close()
+            doc = None
+
+    try:
+        chave_cache = None
+        if cache is not None and any(etapas.values()):
+            chave_cache = cache.chave(pdf_original, configuracao_do_cache(etapas, termos, opcoes))
+            anterior = cache.obter(chave_cache, nome_final)
+            if anterior is not None:
+                logging.info(f"Cache: {nome_base} já processado com as mesmas configurações.")
+                resumo.update(redacoes=anterior["redacoes"], paginas=anterior["paginas"],
+                              saida=nome_final, cache=True)
+                reportar_etapa("Resultado reaproveitado do cache.", 1.0)
+                return resumo
+
+        metricas.contar("bytes_entrada", os.path.getsize(pdf_original))
+        with trava_mupdf:
+            doc = fitz.open(pdf_original)
+            resumo["paginas"] = len(doc)
+        previsao = estimador.prever(etapas_previstas(etapas, termos, opcoes), resumo["paginas"])
+
+        # --- 1. Etapa de OCR ---
+        if etapas.get("ocr"):
+            # O OCR é um subprocesso: parte do arquivo original e grava no rascunho
+            fechar_documento()
+            saida_ocr = caminho_rascunho("ocr")
+            peso_ocr = peso("binarizacao", "ocr")
+            inicio_ocr = completed_weights_sum
+            contagem_ocr = run_full_ocr_pipeline(caminho_atual, saida_ocr, etapas["ocr"],
+                                                 cancel_event=cancel_event,
+                                                 reportar=lambda mensagem, fracao: reportar_etapa(
+                                                     mensagem, inicio_ocr + fracao * peso_ocr),
+                                                 avisar=avisar,
+                                                 janela_paginas=opcoes["janela_paginas"],
+                                                 metodo_binarizacao=opcoes["binarizacao"],
+                                                 cache_paginas=cache_paginas,
+                                                 motor_ocr=opcoes["motor_ocr"],
+                                                 workers_ocr=opcoes["workers_ocr"],
+                                                 area_minima_imagem=opcoes["area_minima_imagem_ocr"],
+                                                 metricas=metricas,
+                                                 peso_binarizacao=peso("binarizacao") / peso_ocr if peso_ocr else 0.0)
+            # Caixas das palavras do OCR em processo (nas páginas mistas, junto com as da camada de
+            # texto original): a redação usa direto, sem extrair de novo
+            palavras_ocr = contagem_ocr.pop("palavras", None) or {}
+            if contagem_ocr.pop("motor", opcoes["motor_ocr"]) != opcoes["motor_ocr"]:
+                # A chave do cache cita um motor que não foi usado (ver ocr.resolver_motor_ocr)
+                chave_cache = None
+            resumo.update(contagem_ocr)
+            caminho_atual = saida_ocr
+            verificar_cancelamento()
+
+            completed_weights_sum += peso_ocr
+            reportar_etapa("OCR Concluído.", completed_weights_sum)
+
+        # --- 2/3. Etapa de Redação (CPF + Termos manuais) ---
+        # Um único motor de redação: os detectores de CPF e de termos manuais
+        # rodam na mesma passada pelas páginas, com um apply_redactions por
+        # página, sobre o documento já aberto.
+        detectores = []
+        if etapas.get("auto"):
+            # Todos os identificadores habilitados numa varredura por página; candidatos com
+            # dígito verificador inválido são ignorados ou redigidos e contados (politica_cpf)
+            estatisticas_identificadores = {}
+            detectores.append(criar_detector_identificadores(opcoes["identificadores"], opcoes["politica_cpf"],
+                                                             estatisticas_identificadores))
+        if etapas.get("manual") and termos:
+            # Listas grandes num autômato só; sobre caixas do OCR, casados no fluxo de palavras
+            detectores.append(criar_detector_termos(termos, opcoes, bool(palavras_ocr)))
+
+        # O gs é resolvido uma vez: decide onde a redação grava o resultado
+        usar_gs = etapas.get("comp") and opcoes["motor_compressao"] in MOTORES_GHOSTSCRIPT
+        if usar_gs and compressor is None:
+            compressor = abrir_compressor(opcoes, avisar, persistente=False)
+        comprimir = usar_gs and compressor is not None
+
+        if detectores:
+            peso_redacao = peso("deteccao", "aplicacao")
+            inicio_redacao = completed_weights_sum
+
+            def progresso_redacao(pagina, total_paginas):
+                reportar_etapa(f"Anonimizando (Pág. {pagina}/{total_paginas})...",
+                               inicio_redacao + peso_redacao * pagina / total_paginas)
+
+            reportar_etapa("Anonimizando (CPFs/termos)...", completed_weights_sum)
+            inicio = time.perf_counter()
+            if opcoes["janela_paginas"]:
+                # Streaming com memória limitada precisa gravar em disco a cada janela
+                fechar_documento()
+                saida_redacao = caminho_rascunho("redacao")
+                with trava_mupdf:
+                    resumo["redacoes"] = redigir_pdf(caminho_atual, saida_redacao, detectores,
+                                                     cancel_event=cancel_event,
+                                                     janela_paginas=opcoes["janela_paginas"],
+                                                     metricas=metricas,
+                                                     compactar_janelas=opcoes["compactar_janelas"])
+                caminho_atual = saida_redacao
+            else:
+                with trava_mupdf:
+                    if doc is None:
+                        doc = fitz.open(caminho_atual)
+                    resumo["redacoes"] = redigir_documento(doc, detectores, cancel_event=cancel_event,
+                                                           progress_callback=progresso_redacao,
+                                                           palavras_por_pagina=palavras_ocr, metricas=metricas)
+            resumo["tempos"]["redacao"] = time.perf_counter() - inicio
+            if etapas.get("auto"):
+                resumo["identificadores"] = estatisticas_identificadores
+                metricas.contar("candidatos", sum(c["validos"] + c["invalidos"]
+                                                  for c in estatisticas_identificadores.values()))
+            verificar_cancelamento()
+
+            completed_weights_sum += peso_redacao
+            reportar_etapa("Anonimização concluída.", completed_weights_sum)
+
+        # Compressão das imagens em processo, no documento aberto, antes de gravá-lo
+        imagens_comprimidas = False
+        if etapas.get("comp") and opcoes["motor_compressao"] in MOTORES_IMAGENS:
+            reportar_etapa("Comprimindo imagens...", completed_weights_sum)
+            if doc is None:
+                with trava_mupdf:
+                    doc = fitz.open(caminho_atual)
+            with metricas.etapa("compressao_imagens"):
+                resumo["compressao_imagens"] = comprimir_imagens(doc, opcoes["qualidade_jpeg"],
+                                                                 opcoes["dpi_maximo_imagens"],
+                                                                 workers=opcoes["workers_imagens"] or None,
+                                                                 trava=trava_mupdf)
+            imagens_comprimidas = any(c["bytes_depois"] < c["bytes_antes"]
+                                      for c in resumo["compressao_imagens"].values())
+            verificar_cancelamento()
+            completed_weights_sum += peso("compressao_imagens")
+
+        # Documento alterado em memória: é gravado uma única vez, no rascunho
+        # se o gs ainda vai lê-lo, senão direto no destino.
+        if doc is not None and (detectores or imagens_comprimidas):
+            caminho_atual = caminho_rascunho("redacao") if comprimir else nome_final
+            with trava_mupdf, metricas.etapa("salvamento"):
+                resumo["compactacao"] = salvar_pdf(doc, caminho_atual)
+            metricas.contar("bytes_duplicados", sum(c["bytes"] for c in resumo["compactacao"].values()))
+            completed_weights_sum += peso("salvamento")
+        fechar_documento()
+
+        # --- 4. Etapa de Compressão ---
+        if usar_gs:
+            reportar_etapa("Finalizando e comprimindo...", completed_weights_sum)
+            if comprimir:
+                saida_comp = caminho_rascunho("comp")
+                try:
+                    with metricas.etapa("compressao"):
+                        resumo["compressao"] = compressor.comprimir(caminho_atual, saida_comp, cancel_event)
+                    caminho_atual = saida_comp
+                except ProcessamentoCancelado:
+                    raise
+                except Exception as e_comp:
+                    # O resultado redigido já está gravado: o arquivo sai sem comprimir, fora do cache
+                    avisar(f"Compressão de {nome_base} falhou ({e_comp}); o arquivo foi gravado sem comprimir.")
+                    logging.error(f"Compression failed for {nome_base}: {e_comp}")
+                    tamanho = os.path.getsize(caminho_atual)
+                    resumo["compressao"] = {"bytes_antes": tamanho, "bytes_depois": tamanho, "aplicada": False,
+                                            "erro": str(e_comp)}
+                    chave_cache = None
+            else:
+                avisar("Compressão não executada: Ghostscript não encontrado ou caminho inválido. Verifique o config.json ou a pasta 'ghostscript/bin'.")
+                logging.error("Compression skipped: Ghostscript not found or invalid path.")
+                # A chave do cache pede um arquivo comprimido: este fica fora do cache
+                chave_cache = None
+
+        # Levar o resultado para o destino. Se nenhuma operação foi feita,
+        # 'caminho_atual' ainda é o 'pdf_original', então precisamos copiar, não mover.
+        if caminho_atual == pdf_original:
+            shutil.copy(pdf_original, nome_final)
+        elif caminho_atual != nome_final:
+            shutil.move(caminho_atual, nome_final)
+        resumo["saida"] = nome_final
+        metricas.contar("bytes_saida", os.path.getsize(nome_final))
+
+        if chave_cache is not None:
+            try:
+                cache.guardar(chave_cache, nome_final, {"redacoes": resumo["redacoes"],
+                                                        "paginas": resumo["paginas"]})
+            except OSError as e_cache:
+                logging.warning(f"Não foi possível guardar {nome_base} no cache: {e_cache}")
+
+    except ProcessamentoCancelado:
+        resumo["status"] = "cancelado"
+        raise
+    except Exception as caught_e: # Captura a exceção com um nome diferente
+        logging.error(f"Falha ao processar {nome_base}: {caught_e}")
+        resumo["status"] = "erro"
+        resumo["erro"] = str(caught_e)
+    finally:
+        fechar_documento()
+        # Limpa os temporários do rascunho
+        if rascunho is not None:
+            shutil.rmtree(rascunho, ignore_errors=True)
+        resumo["tempos"].update(metricas.tempos)
+        resumo["tempos"]["total"] = time.perf_counter() - inicio_arquivo
+        resumo["contadores"] = metricas.contadores
+        estimador.atualizar(resumo)
+        # Uma linha por arquivo (contagens e tempos) no lugar de uma por match
+        registrar_resumo_arquivo(resumo)
+
+    return resumo
+
+
+def processar_lote(pdf_paths,
+                   pasta_saida: str,
+                   etapas: dict,
+                   termos=None,
+                   opcoes=None,
+                   cancel_event=None,
+                   progress_callback=None,
+                   avisar=None,
+                   cache=None,
+                   cache_paginas=None,
+                   estimador=None) -> list:
+    """
+    Processa vários arquivos com o AgendadorLote (opcoes["workers_arquivos"] em paralelo).
+    • progress_callback .. função (mensagem, progresso_total 0..1); cada arquivo pesa
+                           no total o seu tempo previsto (páginas x taxas das etapas)
+    • cache .............. CacheResultados; se omitido, usa abrir_cache(opcoes)
+    • cache_paginas ...... idem, para as páginas do OCR (abrir_cache_paginas)
+    • estimador .......... EstimadorEtapas; se omitido, usa abrir_estimador(opcoes)
+                           e grava as taxas atualizadas ao final
+    Com a compressão ativa, o Ghostscript é resolvido e aberto uma vez para o lote
+    (ver abrir_compressor).
+    Se opcoes["arquivo_metricas"] estiver definido, acrescenta a ele as métricas
+    de cada arquivo e o resumo do lote (ver metricas.exportar_metricas).
+    Retorna um resumo por arquivo, na ordem de pdf_paths; arquivos não
+    processados por cancelamento ficam com status "cancelado".
+    """
+    opcoes = opcoes or carregar_opcoes_processamento()
+    pdf_paths = list(pdf_paths)
+    os.makedirs(pasta_saida, exist_ok=True)
+    inicio_lote = time.perf_counter()
+    if cache is None:
+        cache = abrir_cache(opcoes)
+    if cache_paginas is None:
+        cache_paginas = abrir_cache_paginas(opcoes)
+    salvar_taxas = estimador is None
+    if estimador is None:
+        estimador = abrir_estimador(opcoes)
+    nomes_etapas = etapas_previstas(etapas, termos, opcoes)
+    pesos = [sum(estimador.prever(nomes_etapas, _contar_paginas(pdf)).values()) for pdf in pdf_paths]
+
+    # Um gs resolvido (e mantido aberto) para o lote inteiro
+    compressor = abrir_compressor(opcoes, avisar) \
+        if etapas.get("comp") and opcoes["motor_compressao"] in MOTORES_GHOSTSCRIPT else None
+
+    agendador = AgendadorLote(workers=opcoes["workers_arquivos"], cancel_event=cancel_event,
+                              progress_callback=progress_callback)
+    try:
+        resultados = agendador.executar(
+            pdf_paths,
+            lambda i, pdf, reportar: processar_arquivo(pdf, pasta_saida, etapas, termos, opcoes,
+                                                       indice=i, total=len(pdf_paths),
+                                                       cancel_event=agendador.cancel_event,
+                                                       reportar=reportar, avisar=avisar, cache=cache,
+                                                       cache_paginas=cache_paginas, estimador=estimador,
+                                                       compressor=compressor),
+            pesos=pesos)
+    finally:
+        if compressor is not None:
+            compressor.encerrar()
+        # Workers do motor "tesseract": reaproveitados entre os arquivos do lote, não além dele
+        encerrar_pool()
+
+    resumos = []
+    for pdf, resultado in zip(pdf_paths, resultados):
+        if resultado is None:
+            resultado = {"arquivo": pdf, "saida": None, "status": "cancelado", "erro": None,
+                         "tempos": {}, "redacoes": 0, "paginas": None, "cache": False}
+        elif isinstance(resultado, Exception):
+            resultado = {"arquivo": pdf, "saida": None, "status": "erro", "erro": str(resultado),
+                         "tempos": {}, "redacoes": 0, "paginas": None, "cache": False}
+        resumos.append(resultado)
+
+    if salvar_taxas:
+        estimador.salvar()
+    if opcoes.get("arquivo_metricas"):
+        try:
+            exportar_metricas(opcoes["arquivo_metricas"], resumos, time.perf_counter() - inicio_lote)
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar as métricas em {opcoes['arquivo_metricas']}: {e}")
+    return resumos
+
+
+def _contar_paginas(pdf_path: str) -> int:
+    # Só para dividir o progresso do lote; arquivos ilegíveis contam como 1 página
+    try:
+        with trava_mupdf:
+            with fitz.open(pdf_path) as doc:
+                return len(doc)
+    except Exception:
+        return 1
@@ -0,0 +1,322 @@
+# redaction_engine.py
+# ------------------------------------------------------------------
+# Motor único de redação: recebe uma lista de detectores (CPF, termos
+# literais, regexes do usuário...), percorre o PDF uma única vez,
+# junta os retângulos de todos eles por página, aplica as redações
+# uma vez por página e salva o documento uma única vez.
+#
+# Um detector é qualquer função  detector(page, word_list) -> [fitz.Rect]
+# onde word_list é a saída de page.get_text("words"), extraída uma vez
+# por página e compartilhada entre todos os detectores. Em páginas que
+# acabaram de passar pelo OCR em processo, word_list são as próprias
+# caixas do OCR (ver ocr_tesseract.py) e a extração é dispensada.
+#
+# Antes das anotações, os retângulos de todos os detectores passam por
+# coalescer_retangulos: repetidos, contidos em outros e sobrepostos na
+# mesma linha viram um só, para que o apply_redactions não processe
+# centenas de anotações sobrepostas em páginas densas. Cada página
+# recebe um único apply_redactions (aplicar_redacoes), com as opções
+# escolhidas pelo que de fato está sob os retângulos (opcoes_redacao).
+#
+# Detectores de identificadores numéricos declaram digitos_minimos
+# (atributo da função): se nenhum trecho de dígitos da página chega a
+# esse tamanho, a página é pulada sem rodar detector nem apply.
+# ------------------------------------------------------------------
+
+import fitz  # PyMuPDF
+import os
+import re
+import time
+import logging
+from collections import defaultdict
+
+from streaming import copiar_janela, documento_estruturado, processar_em_janelas
+from compactacao import compactar_recursos
+
+# Lado (em pontos) das células do índice espacial de coalescer_retangulos
+CELULA_INDICE = 36.0
+# Distância horizontal máxima (pontos) entre retângulos da mesma linha que são fundidos
+FOLGA_FUSAO = 1.0
+# Fração mínima da altura do menor retângulo em sobreposição vertical para a "mesma linha"
+SOBREPOSICAO_LINHA = 0.5
+
+
+def _celulas(rect):
+    x0, x1 = int(rect.x0 // CELULA_INDICE), int(rect.x1 // CELULA_INDICE)
+    y0, y1 = int(rect.y0 // CELULA_INDICE), int(rect.y1 // CELULA_INDICE)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def _fundir(a, b, folga):
+    # Mesma linha (sobreposição vertical suficiente) e encostados/sobrepostos na horizontal
+    sobreposicao = min(a.y1, b.y1) - max(a.y0, b.y0)
+    if sobreposicao < SOBREPOSICAO_LINHA * min(a.height, b.height):
+        return False
+    return max(a.x0, b.x0) - min(a.x1, b.x1) <= folga
+
+
+def _uniao(a, b):
+    # Em Python: o `|` do PyMuPDF passa por float32 e pode encolher a borda em ~1e-7
+    return fitz.Rect(min(a.x0, b.x0), min(a.y0, b.y0), max(a.x1, b.x1), max(a.y1, b.y1))
+
+
+def coalescer_retangulos(rects, folga: float = FOLGA_FUSAO) -> list:
+    """
+    Reduz os retângulos de redação de uma página: descarta vazios, repetidos e
+    contidos em outros e funde os que se sobrepõem (ou distam até `folga`
+    pontos) na mesma linha. Um índice em grade (CELULA_INDICE) limita as
+    comparações aos vizinhos. A área coberta nunca diminui.
+    """
+    ativos = {}
+    grade = defaultdict(set)
+    for proximo, rect in enumerate(sorted((fitz.Rect(r) for r in rects), key=lambda r: (r.y0, r.x0))):
+        if rect.is_empty:
+            continue
+        absorvido = False
+        fundiu = True
+        while fundiu and not absorvido:
+            fundiu = False
+            vizinhos = set().union(*(grade.get(c, ()) for c in _celulas(rect + (-folga, -folga, folga, folga))))
+            for chave in vizinhos:
+                outro = ativos[chave]
+                if outro.contains(rect):
+                    absorvido = True
+                    break
+                if rect.contains(outro) or _fundir(rect, outro, folga):
+                    rect = _uniao(rect, outro)
+                    for celula in _celulas(outro):
+                        grade[celula].discard(chave)
+                    del ativos[chave]
+                    fundiu = True
+        if not absorvido:
+            ativos[proximo] = rect
+            for celula in _celulas(rect):
+                grade[celula].add(proximo)
+    return list(ativos.values())
+
+
+# Trecho de dígitos unidos pelos separadores que os padrões de identificadores aceitam
+_TRECHO_DIGITOS = re.compile(r"\d[\d.\s/\-–]*")
+
+
+def pode_conter_identificador(word_list, digitos_minimos: int) -> bool:
+    """
+    Pré-filtro barato: False se nenhum trecho de dígitos e separadores
+    (. - – / espaço, quebra de linha) do texto das palavras tem ao menos
+    `digitos_minimos` dígitos. Nesse caso nenhum identificador com esse
+    número de dígitos pode estar na página.
+    """
+    if digitos_minimos <= 0:
+        return True
+    texto = " ".join(word[4] for word in word_list)
+    for trecho in _TRECHO_DIGITOS.findall(texto):
+        if len(trecho) >= digitos_minimos and sum(c.isdigit() for c in trecho) >= digitos_minimos:
+            return True
+    return False
+
+
+def _digitos_minimos(detectores):
+    # O menor digitos_minimos dos detectores, ou 0 se algum não declara (ex.: termos manuais)
+    minimos = [getattr(detector, "digitos_minimos", 0) for detector in detectores]
+    return min(minimos) if minimos else 0
+
+
+# Operações do page.get_bboxlog() que desenham imagens / arte vetorial
+_OPERACOES_IMAGEM = ("fill-image", "fill-imagemask")
+# Tudo o que o MuPDF trata como line art no apply_redactions, inclusive sombreamentos (sh)
+_OPERACOES_VETOR = ("fill-path", "stroke-path", "fill-shade")
+# O argumento text do apply_redactions (e a constante) só existe nas versões recentes do
+# PyMuPDF (requirements.txt); nas anteriores o texto sob a redação é sempre removido
+_TEXTO_REMOVIDO = getattr(fitz, "PDF_REDACT_TEXT_REMOVE", None)
+
+
+def opcoes_redacao(page, rects) -> dict:
+    """
+    Opções do apply_redactions para a página, pelo que está sob os retângulos
+    (uma leitura de page.get_bboxlog(), sem extrair imagens nem desenhos):
+    • texto sempre removido (PDF_REDACT_TEXT_REMOVE, quando a versão do PyMuPDF tem a opção)
+    • imagens sob algum retângulo têm os pixels apagados (PDF_REDACT_IMAGE_PIXELS);
+      sem imagem sob os retângulos, as imagens não são tocadas (PDF_REDACT_IMAGE_NONE)
+    • arte vetorial (caminhos e sombreamentos) tocada por algum retângulo é removida
+      (PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED, o padrão do PyMuPDF); só quando nenhum
+      vetor cruza os retângulos, PDF_REDACT_LINE_ART_NONE
+    """
+    area = fitz.Rect()
+    for rect in rects:
+        area |= rect
+    imagens = vetores = False
+    for operacao, caixa in page.get_bboxlog():
+        if operacao not in _OPERACOES_IMAGEM and operacao not in _OPERACOES_VETOR:
+            continue
+        caixa = fitz.Rect(caixa)
+        # O bboxlog dá caixa infinita a sombreamentos (sh) pintados sob clipe: contam como tocados
+        if not caixa.is_infinite and (not caixa.intersects(area) or not any(caixa.intersects(rect) for rect in rects)):
+            continue
+        if operacao in _OPERACOES_IMAGEM:
+            imagens = True
+        else:
+            vetores = True
+        if imagens and vetores:
+            break
+    opcoes = {
+        "images": fitz.PDF_REDACT_IMAGE_PIXELS if imagens else fitz.PDF_REDACT_IMAGE_NONE,
+        "graphics": fitz.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED if vetores else fitz.PDF_REDACT_LINE_ART_NONE,
+    }
+    if _TEXTO_REMOVIDO is not None:
+        opcoes["text"] = _TEXTO_REMOVIDO
+    return opcoes
+
+
+def aplicar_redacoes(page, rects) -> dict:
+    """
+    Anota os retângulos e aplica as redações da página com um único
+    apply_redactions (opções de opcoes_redacao). Retorna as opções usadas,
+    ou None se não havia retângulos.
+    """
+    if not rects:
+        return None
+    opcoes = opcoes_redacao(page, rects)
+    for rect in rects:
+        page.add_redact_annot(rect, fill=(0, 0, 0))
+    page.apply_redactions(**opcoes)
+    return opcoes
+
+
+def redigir_pagina(page, detectores, word_list=None, metricas=None) -> int:
+    """
+    Roda todos os detectores sobre a página e aplica as redações de uma vez.
+    • word_list .. palavras já conhecidas (ex.: caixas do OCR); se omitido, extrai da página
+    • metricas ... MetricasArquivo opcional: soma os tempos de "deteccao" (extração +
+                   detectores) e "aplicacao" (anotações + apply_redactions) e conta os
+                   retângulos antes ("retangulos_detectados") e depois da coalescência,
+                   as páginas redigidas com imagens/vetores sob os retângulos e as
+                   páginas puladas pelo pré-filtro ("paginas_puladas")
+    Retorna a quantidade de retângulos redigidos (já coalescidos).
+    """
+    inicio = time.perf_counter()
+    if word_list is None:
+        word_list = page.get_text("words")
+
+    if not pode_conter_identificador(word_list, _digitos_minimos(detectores)):
+        if metricas is not None:
+            metricas.somar_tempo("deteccao", time.perf_counter() - inicio)
+            metricas.contar("paginas_puladas")
+        return 0
+
+    detectados = []
+    for detector in detectores:
+        detectados.extend(detector(page, word_list))
+    rects = coalescer_retangulos(detectados)
+    if len(rects) != len(detectados):
+        logging.debug("Página %s: %d retângulos detectados, %d após a coalescência",
+                      page.number, len(detectados), len(rects))
+    deteccao = time.perf_counter()
+
+    opcoes = aplicar_redacoes(page, rects)
+
+    if metricas is not None:
+        metricas.somar_tempo("deteccao", deteccao - inicio)
+        metricas.somar_tempo("aplicacao", time.perf_counter() - deteccao)
+        metricas.contar("retangulos_detectados", len(detectados))
+        metricas.contar("retangulos", len(rects))
+        if opcoes is not None:
+            metricas.contar("paginas_redigidas")
+            metricas.contar("paginas_redigidas_com_imagem", int(opcoes["images"] != fitz.PDF_REDACT_IMAGE_NONE))
+            metricas.contar("paginas_redigidas_com_vetores", int(opcoes["graphics"] != fitz.PDF_REDACT_LINE_ART_NONE))
+    return len(rects)
+
+
+def redigir_documento(doc, detectores, cancel_event=None, progress_callback=None,
+                      palavras_por_pagina=None, metricas=None) -> int:
+    """
+    Aplica redigir_pagina em todas as páginas de um documento já aberto.
+    • cancel_event ...... threading.Event opcional; interrompe entre páginas
+    • progress_callback . função opcional chamada com (pagina_atual, total_paginas)
+    • palavras_por_pagina dict opcional {número da página: word_list} (ex.: caixas do OCR)
+    • metricas .......... MetricasArquivo opcional (ver redigir_pagina)
+    Retorna o total de retângulos redigidos.
+    """
+    total = 0
+    num_pages = len(doc)
+    palavras_por_pagina = palavras_por_pagina or {}
+    for page in doc:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        total += redigir_pagina(page, detectores, palavras_por_pagina.get(page.number), metricas)
+        if progress_callback:
+            progress_callback(page.number + 1, num_pages)
+    return total
+
+
+def salvar_pdf(doc, output_path: str) -> dict:
+    """
+    Salva o documento redigido com as mesmas flags de anonymizer.py / manual_anonymizer.py,
+    depois de unificar os recursos duplicados. Retorna o relatório de compactacao.compactar_recursos.
+    """
+    compactacao = compactar_recursos(doc)
+    doc.save(output_path, garbage=4, deflate=True, clean=True, incremental=False)
+    return compactacao
+
+
+def redigir_pdf(input_path: str,
+                output_path: str,
+                detectores,
+                cancel_event=None,
+                progress_callback=None,
+                janela_paginas: int = None,
+                metricas=None,
+                compactar_janelas: bool = False) -> int:
+    """
+    Abre o PDF, redige com todos os detectores em uma única passada e salva uma vez.
+    • janela_paginas .... se informado, processa em janelas de páginas com memória
+                          limitada (ver streaming.processar_em_janelas); documentos com
+                          estrutura que as janelas perderiam são redigidos inteiros
+    • metricas .......... MetricasArquivo opcional (ver redigir_pagina); nas janelas,
+                          a gravação incremental fica dentro da etapa de quem chamou
+    • compactar_janelas . nas janelas, reescreve o arquivo no final (memória proporcional
+                          ao documento, ver streaming.GravadorIncremental.finalizar)
+    Retorna o total de retângulos redigidos.
+    """
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Arquivo não encontrado: {input_path}")
+
+    if janela_paginas:
+        nao_remontada = documento_estruturado(input_path)
+        if nao_remontada:
+            logging.info(f"{os.path.basename(input_path)} tem {', '.join(nao_remontada)}: redação sem janelas")
+            janela_paginas = None
+    if janela_paginas:
+        return _redigir_pdf_em_janelas(input_path, output_path, detectores,
+                                       cancel_event, progress_callback, janela_paginas, metricas,
+                                       compactar_janelas)
+
+    doc = fitz.open(input_path)
+    try:
+        logging.info(f"Iniciando redação unificada ({len(detectores)} detectores): {os.path.basename(input_path)}")
+        total = redigir_documento(doc, detectores, cancel_event, progress_callback, metricas=metricas)
+
+        inicio = time.perf_counter()
+        salvar_pdf(doc, output_path)
+        if metricas is not None:
+            metricas.somar_tempo("salvamento", time.perf_counter() - inicio)
+        logging.info(f"Redação unificada concluída ({total} retângulos): {os.path.basename(output_path)}")
+        return total
+    finally:
+        doc.close()
+
+
+def _redigir_pdf_em_janelas(input_path, output_path, detectores,
+                            cancel_event, progress_callback, janela_paginas, metricas=None,
+                            compactar=False) -> int:
+    total = 0
+
+    def gerar_janela(source_doc, inicio, fim):
+        nonlocal total
+        parte = copiar_janela(source_doc, inicio, fim)
+        total += redigir_documento(parte, detectores, cancel_event, metricas=metricas)
+        return parte
+
+    processar_em_janelas(input_path, output_path, gerar_janela, janela_paginas, compactar=compactar,
+                         cancel_event=cancel_event, progress_callback=progress_callback)
+    logging.info(f"Redação unificada em janelas concluída ({total} retângulos): {os.path.basename(output_path)}")
+    return total
@@ -0,0 +1,120 @@
+# registro_log.py
+# ------------------------------------------------------------------
+# Configuração única do logging do anonimizador, feita pelos pontos de
+# entrada (GUI, CLI, testes diretos) e nunca na importação dos módulos.
+#
+# Os registros vão para uma fila (QueueHandler) e são gravados no
+# arquivo por uma thread própria (QueueListener): as threads do lote e o
+# laço de páginas não esperam pelo disco.
+#
+# No caminho quente (um evento por match/retângulo/página) os módulos
+# usam logging.debug com argumentos %-formatados, que só são montados se
+# o nível DEBUG estiver ativo, ou um AmostradorLog, que deixa passar só
+# uma amostra dos eventos repetidos. Por padrão (INFO) o log tem uma
+# linha de resumo por arquivo (contagens e tempos), em JSON, em vez de
+# uma linha por CPF.
+# ------------------------------------------------------------------
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+FORMATO_LOG = "%(asctime)s - %(levelname)s - %(threadName)s - %(message)s"
+NIVEL_LOG_PADRAO = "INFO"
+ARQUIVO_LOG_PADRAO = "anonimizador.log"
+
+# Prefixo das linhas de resumo por arquivo: o restante da linha é um objeto JSON
+PREFIXO_RESUMO = "RESUMO "
+
+_listener = None
+_trava = threading.Lock()
+
+
+def configurar_logging(config=None, arquivo: str = ARQUIVO_LOG_PADRAO, nivel=None, modo: str = "a"):
+    """
+    Configura o logger raiz com um QueueHandler e inicia a thread que grava
+    no arquivo. Chamadas seguintes apenas ajustam o nível.
+    • config .. dict do config.json: a pasta vem de paths.log_path e o nível
+                de processamento.nivel_log (DEBUG ativa o registro por match)
+    • arquivo . nome do arquivo dentro da pasta de log (ou caminho absoluto)
+    • nivel ... sobrepõe o nível do config ("DEBUG", "INFO", ... ou int)
+    • modo .... "a" acrescenta, "w" recomeça o arquivo
+    Retorna o caminho do arquivo de log.
+    """
+    global _listener
+    config = config or {}
+    nivel = nivel or config.get("processamento", {}).get("nivel_log", NIVEL_LOG_PADRAO)
+    if isinstance(nivel, str):
+        nivel = logging.getLevelName(nivel.upper())
+        if not isinstance(nivel, int):
+            raise ValueError(f"Nível de log desconhecido: {nivel}")
+
+    pasta = config.get("paths", {}).get("log_path", "")
+    caminho = os.path.join(pasta, arquivo) if pasta else arquivo
+
+    raiz = logging.getLogger()
+    with _trava:
+        raiz.setLevel(nivel)
+        if _listener is not None:
+            return _listener.handlers[0].baseFilename
+
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        arquivo_handler = logging.FileHandler(caminho, mode=modo, encoding="utf-8")
+        arquivo_handler.setFormatter(logging.Formatter(FORMATO_LOG))
+        fila = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(fila, arquivo_handler, respect_handler_level=True)
+        _listener.start()
+        raiz.addHandler(logging.handlers.QueueHandler(fila))
+        atexit.register(encerrar_logging)
+    return arquivo_handler.baseFilename
+
+
+def encerrar_logging():
+    """Grava o que ainda está na fila e para a thread do arquivo de log."""
+    global _listener
+    with _trava:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in list(logging.getLogger().handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                logging.getLogger().removeHandler(handler)
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def registrar_resumo_arquivo(resumo: dict):
+    """Uma linha INFO por arquivo processado: o resumo (status, tempos, contagens) em JSON."""
+    if logging.getLogger().isEnabledFor(logging.INFO):
+        logging.info("%s%s", PREFIXO_RESUMO, json.dumps(resumo, ensure_ascii=False, default=str))
+
+
+class AmostradorLog:
+    """
+    Limita eventos repetidos do caminho quente: registra os `primeiros`
+    eventos e depois um a cada `intervalo`, informando quantos já ocorreram.
+    Seguro para as threads do lote; o custo quando o nível está desligado é
+    só o isEnabledFor.
+    """
+
+    def __init__(self, nivel=logging.DEBUG, primeiros: int = 20, intervalo: int = 1000):
+        self.nivel = nivel
+        self.primeiros = primeiros
+        self.intervalo = intervalo
+        self._contagem = 0
+        self._trava = threading.Lock()
+
+    def registrar(self, mensagem: str, *args):
+        if not logging.getLogger().isEnabledFor(self.nivel):
+            return
+        with self._trava:
+            self._contagem += 1
+            contagem = self._contagem
+        if contagem <= self.primeiros or contagem % self.intervalo == 0:
+            logging.log(self.nivel, f"{mensagem} [ocorrência %d]", *args, contagem)
@@ -0,0 +1,163 @@
+# streaming.py
+# ------------------------------------------------------------------
+# Processamento em janelas de páginas para PDFs muito grandes.
+# Em vez de manter o documento inteiro (e, na binarização, um segundo
+# documento de saída) em memória até um único save final, cada janela
+# de páginas é processada, anexada ao arquivo de saída com um save
+# incremental e liberada. O pico de memória passa a depender do
+# tamanho da janela, não do número de páginas.
+# A compactação final (reescrita completa, opcional) abre o arquivo
+# inteiro e volta a fazer a memória crescer com o número de páginas.
+# Metadados e sumário são levados para a saída; o resto da estrutura do
+# documento (links entre janelas, formulário, rótulos de página...) não,
+# e quem chama deve processar esses documentos inteiros (ver
+# estrutura_nao_remontada).
+# ------------------------------------------------------------------
+
+import fitz  # PyMuPDF
+import os
+import logging
+
+from compactacao import compactar_recursos
+
+
+# Entradas do catálogo que a remontagem por insert_pdf (janelas, modo paralelo) não leva:
+# formulário, rótulos de página, anexos/JavaScript/destinos nomeados (Names), ações, camadas
+_CATALOGO_NAO_REMONTADO = ("AcroForm", "PageLabels", "Names", "Dests", "OpenAction", "AA", "OCProperties")
+
+
+def estrutura_nao_remontada(doc):
+    """
+    Lista o que o documento tem e a remontagem por partes (janelas ou modo
+    paralelo) perderia: entradas de _CATALOGO_NAO_REMONTADO e "Annots" (links
+    entre partes, widgets). Lista vazia = a remontagem preserva o documento,
+    com metadados e sumário copiados à parte.
+    """
+    catalogo = doc.pdf_catalog()
+    presentes = [chave for chave in _CATALOGO_NAO_REMONTADO if doc.xref_get_key(catalogo, chave)[0] != "null"]
+    if any(doc.xref_get_key(doc.page_xref(i), "Annots")[0] != "null" for i in range(len(doc))):
+        presentes.append("Annots")
+    return presentes
+
+
+def documento_estruturado(input_path: str):
+    """Mesma lista de estrutura_nao_remontada, abrindo o arquivo só para consultá-la."""
+    with fitz.open(input_path) as doc:
+        return estrutura_nao_remontada(doc)
+
+
+def _liberar_memoria():
+    # Esvazia o cache de objetos do MuPDF (páginas, fontes, imagens decodificadas)
+    fitz.TOOLS.store_shrink(100)
+
+
+class GravadorIncremental:
+    """
+    Monta o PDF de saída por partes: a primeira parte cria o arquivo e as
+    seguintes são anexadas com save incremental, sem recarregar as anteriores.
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.total_paginas = 0
+
+    def anexar(self, parte) -> None:
+        if len(parte) == 0:
+            return
+        if self.total_paginas == 0:
+            parte.save(self.output_path)
+        else:
+            doc = fitz.open(self.output_path)
+            try:
+                doc.insert_pdf(parte)
+                doc.saveIncr()
+            finally:
+                doc.close()
+        self.total_paginas += len(parte)
+
+    def finalizar(self, compactar: bool = False, metadados=None, sumario=None) -> None:
+        """
+        Grava os metadados e o sumário do documento original (get_toc(simple=False);
+        entradas de páginas que não chegaram a ser gravadas, após um cancelamento,
+        são descartadas).
+        Com compactar=True, reescreve o arquivo com as mesmas flags do
+        anonymizer.py (garbage=4, deflate, clean), removendo as revisões
+        incrementais e recursos duplicados entre janelas (ver compactacao.py).
+        A reescrita carrega o documento inteiro: em 1000 páginas digitalizadas
+        o pico foi de 195 MB, contra 66 MB sem ela (100 páginas: 81 e 63 MB).
+        """
+        if self.total_paginas == 0 or not (compactar or metadados or sumario):
+            return
+        temp_path = self.output_path + ".compactando"
+        doc = fitz.open(self.output_path)
+        try:
+            if metadados:
+                doc.set_metadata(metadados)
+            if sumario:
+                doc.set_toc([item for item in sumario if item[2] <= self.total_paginas])
+            if compactar:
+                compactar_recursos(doc)
+                doc.save(temp_path, garbage=4, deflate=True, clean=True, incremental=False)
+            else:
+                doc.saveIncr()
+        finally:
+            doc.close()
+        if compactar:
+            os.replace(temp_path, self.output_path)
+
+
+def copiar_janela(source_doc, inicio: int, fim: int):
+    """Copia as páginas [inicio, fim) de source_doc para um documento novo."""
+    parte = fitz.open()
+    parte.insert_pdf(source_doc, from_page=inicio, to_page=fim - 1)
+    return parte
+
+
+def processar_em_janelas(input_path: str,
+                         output_path: str,
+                         gerar_janela,
+                         janela_paginas: int = 50,
+                         compactar: bool = False,
+                         cancel_event=None,
+                         progress_callback=None) -> int:
+    """
+    Processa o PDF em janelas de `janela_paginas` páginas. Metadados e sumário do
+    original vão para a saída; a demais estrutura do documento, não (ver
+    estrutura_nao_remontada).
+    • gerar_janela ...... função (source_doc, inicio, fim) -> fitz.Document com as
+                          páginas de saída da janela (ex.: copiar_janela + redação)
+    • compactar ......... reescrita final com garbage=4/deflate/clean; a memória volta a
+                          crescer com o número de páginas (ver GravadorIncremental.finalizar)
+    • cancel_event ...... threading.Event opcional; interrompe entre janelas
+    • progress_callback . função opcional chamada com (paginas_concluidas, total_paginas)
+    Retorna o número de páginas gravadas.
+    """
+    if janela_paginas < 1:
+        raise ValueError("janela_paginas deve ser >= 1.")
+
+    source_doc = fitz.open(input_path)
+    gravador = GravadorIncremental(output_path)
+    try:
+        metadados = source_doc.metadata
+        sumario = source_doc.get_toc(simple=False)
+        total = len(source_doc)
+        logging.info(f"Processamento em janelas de {janela_paginas} páginas: "
+                     f"{os.path.basename(input_path)} ({total} páginas)")
+        for inicio in range(0, total, janela_paginas):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            fim = min(inicio + janela_paginas, total)
+            parte = gerar_janela(source_doc, inicio, fim)
+            try:
+                gravador.anexar(parte)
+            finally:
+                parte.close()
+            _liberar_memoria()
+            if progress_callback:
+                progress_callback(fim, total)
+    finally:
+        source_doc.close()
+
+    gravador.finalizar(compactar, metadados, sumario)
+    _liberar_memoria()
+    return gravador.total_paginas
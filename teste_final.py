@@ -6,8 +6,7 @@ import subprocess
 import logging
 import os
 import fitz  # PyMuPDF
-from PIL import Image
-import io
+from binarizer import binarizar_pagina
 
 # Configuração do logging
 logging.basicConfig(level=logging.INFO, 
@@ -21,12 +20,7 @@ def _binarize_pdf(input_path: str, temp_output_path: str, dpi: int = 300):
     source_doc = fitz.open(input_path)
     output_doc = fitz.open()
     for page in source_doc:
-        pix = page.get_pixmap(dpi=dpi)
-        img = Image.open(io.BytesIO(pix.tobytes("png"))).convert('1', dither=Image.Dither.FLOYDSTEINBERG)
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format="PNG")
-        new_page = output_doc.new_page(width=page.rect.width, height=page.rect.height)
-        new_page.insert_image(page.rect, stream=img_buffer.getvalue())
+        binarizar_pagina(page, output_doc, dpi)
     output_doc.save(temp_output_path)
     output_doc.close()
     source_doc.close()
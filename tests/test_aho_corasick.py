@@ -0,0 +1,63 @@
+import fitz
+import pytest
+
+from aho_corasick import AutomatoTermos, compilar_automato, normalizar_texto
+from manual_anonymizer import detector_automato
+
+
+def _trechos(automato, texto):
+    return sorted(texto[inicio:fim] for inicio, fim in automato.buscar(texto))
+
+
+def test_normalizacao_preserva_offsets():
+    texto = "JOÃO da\nConceição"
+    normalizado = normalizar_texto(texto)
+    assert normalizado == "joao da conceicao"
+    assert len(normalizado) == len(texto)
+
+
+@pytest.mark.parametrize("texto", ["Autor: JOSÉ DA SILVA", "autor: jose da silva", "Autor: Jose da SILVA"])
+def test_ignora_acento_e_caixa(texto):
+    automato = AutomatoTermos(["José da Silva"])
+    trechos = _trechos(automato, texto)
+    assert len(trechos) == 1 and trechos[0].lower().startswith("jos")
+
+
+def test_espacos_internos_do_termo_sao_colapsados():
+    # O termo é normalizado com um espaço só; no texto, a quebra de linha conta como espaço
+    automato = AutomatoTermos(["Maria   Souza"])
+    assert _trechos(automato, "Parte: Maria\nSouza") == ["Maria\nSouza"]
+
+
+def test_palavras_inteiras():
+    automato = AutomatoTermos(["Ana"])
+    assert _trechos(automato, "Banana, Ana e Anabela; (ana)") == ["Ana", "ana"]
+    assert len(AutomatoTermos(["Ana"], palavras_inteiras=False).buscar("Banana e Ana")) == 3
+
+
+def test_termos_sobrepostos_e_sufixos():
+    automato = AutomatoTermos(["Silva", "Maria Silva", "Maria Silva Santos", "Santos"])
+    assert _trechos(automato, "Requerente Maria Silva Santos") == \
+        ["Maria Silva", "Maria Silva Santos", "Santos", "Silva"]
+
+
+def test_termos_repetidos_e_vazios():
+    automato = AutomatoTermos(["Ana", "ANA", " ana ", "", "   "])
+    assert automato.total_termos == 1
+    assert automato.buscar("") == []
+
+
+def test_compilacao_em_cache_ignora_ordem_e_repeticoes():
+    assert compilar_automato(["Ana", "Bia"]) is compilar_automato(["Bia", "Ana", "Bia"])
+    assert compilar_automato(["Ana"]) is not compilar_automato(["Ana"], palavras_inteiras=False)
+
+
+def test_detector_redige_as_palavras_do_termo():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Autor: JOSÉ DA SILVA")
+    page.insert_text((72, 100), "Testemunha: Josefa da Silveira")
+    detectar = detector_automato(compilar_automato(["José da Silva"]))
+    rects = detectar(page, page.get_text("words"))
+    assert len(rects) == 1
+    assert rects[0].y1 < 90 and rects[0].x0 > 100
@@ -0,0 +1,65 @@
+import fitz
+
+from anonymizer import anonymize_pdf, localizar_cpfs
+from streaming import estrutura_nao_remontada
+
+
+def _documento(caminho, paginas=20, link=False, rotulos=False):
+    doc = fitz.open()
+    for i in range(paginas):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Página {i + 1}: CPF 529.982.247-25")
+    if link:
+        doc[0].insert_link({"kind": fitz.LINK_GOTO, "from": fitz.Rect(72, 400, 200, 420), "page": paginas - 1})
+    if rotulos:
+        doc.set_page_labels([{"startpage": 0, "prefix": "A-", "style": "D", "firstpagenum": 1}])
+    doc.save(caminho)
+    doc.close()
+
+
+def test_estrutura_nao_remontada(tmp_path):
+    simples, com_link, com_rotulos = (str(tmp_path / nome) for nome in ("simples.pdf", "link.pdf", "rotulos.pdf"))
+    _documento(simples)
+    _documento(com_link, link=True)
+    _documento(com_rotulos, rotulos=True)
+    with fitz.open(simples) as doc:
+        assert estrutura_nao_remontada(doc) == []
+    with fitz.open(com_link) as doc:
+        assert estrutura_nao_remontada(doc) == ["Annots"]
+    with fitz.open(com_rotulos) as doc:
+        assert estrutura_nao_remontada(doc) == ["PageLabels"]
+
+
+def test_workers_preserva_links_e_rotulos(tmp_path):
+    entrada, saida = str(tmp_path / "entrada.pdf"), str(tmp_path / "saida.pdf")
+    _documento(entrada, link=True, rotulos=True)
+    anonymize_pdf(entrada, saida, workers=2)
+    with fitz.open(saida) as doc:
+        assert [link["page"] for link in doc[0].get_links()] == [19]
+        assert doc[3].get_label() == "A-4"
+        assert "529.982.247-25" not in doc[0].get_text()
+
+
+def test_trecho_casado_pelas_duas_regexes_conta_uma_vez():
+    # "529.982.247 25" tem o formato das duas regexes, com o mesmo início e fim
+    palavras = [(72, 100, 120, 112, "529.982.247", 0, 0, 0), (122, 100, 140, 112, "25", 0, 0, 1),
+                (72, 130, 200, 142, "111.444.777-00", 1, 0, 0)]
+    estatisticas = {}
+    rects = localizar_cpfs(palavras, 0, estatisticas=estatisticas)
+    assert len(rects) == 2
+    assert estatisticas == {"cpfs_validos": 1, "cpfs_invalidos": 1}
+
+
+def test_politica_de_cpf_chega_a_anonymize_pdf(tmp_path):
+    entrada = str(tmp_path / "entrada.pdf")
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Válido 529.982.247-25 e inválido 111.444.777-00")
+    doc.save(entrada)
+    doc.close()
+    for politica, restante in (("todos", ""), ("validos", "111.444.777-00")):
+        saida = str(tmp_path / f"{politica}.pdf")
+        anonymize_pdf(entrada, saida, politica=politica)
+        with fitz.open(saida) as doc:
+            texto = doc[0].get_text()
+        assert "529.982.247-25" not in texto
+        assert ("111.444.777-00" in texto) == bool(restante)
@@ -0,0 +1,68 @@
+import io
+
+import fitz
+from PIL import Image
+
+from compactacao import compactar_recursos
+
+
+def _documento_com_timbre():
+    # Uma página com texto (fonte embutida) e um timbre em imagem
+    doc = fitz.open()
+    page = doc.new_page()
+    buffer = io.BytesIO()
+    Image.radial_gradient("L").resize((128, 128)).save(buffer, format="PNG")
+    page.insert_image(fitz.Rect(72, 72, 200, 200), stream=buffer.getvalue())
+    page.insert_text((72, 260), "Processo 0001234-56.2024", fontname="cour")
+    page.insert_font(fontname="F0", fontbuffer=fitz.Font("helv").buffer)
+    page.insert_text((72, 300), "Timbre do tribunal", fontname="F0")
+    return fitz.open("pdf", doc.tobytes())
+
+
+def _renderizacoes(doc):
+    return [page.get_pixmap(dpi=50).samples for page in doc]
+
+
+def _objetos_apos_salvar(doc):
+    # garbage=3 só descarta objetos sem referência: a contagem mede a unificação feita
+    # pela compactação (o garbage=4 de algumas versões do MuPDF também unifica cópias exatas)
+    return fitz.open("pdf", doc.tobytes(garbage=3, deflate=True)).xref_length()
+
+
+def test_duplicatas_de_insert_pdf_sao_unificadas():
+    # Dois documentos iguais juntados com insert_pdf: cada um traz a própria cópia
+    # da imagem (com o perfil ICC) e das fontes
+    juntado = fitz.open()
+    for _ in range(2):
+        juntado.insert_pdf(_documento_com_timbre())
+    dados = juntado.tobytes()
+    original = fitz.open("pdf", dados)
+    doc = fitz.open("pdf", dados)
+
+    relatorio = compactar_recursos(doc)
+
+    assert relatorio["imagens"]["objetos"] >= 1
+    assert relatorio["fontes"]["objetos"] >= 1
+    assert _objetos_apos_salvar(doc) < _objetos_apos_salvar(original)
+    compactado = fitz.open("pdf", doc.tobytes(garbage=4, deflate=True))
+    assert _renderizacoes(compactado) == _renderizacoes(original)
+
+
+def test_carimbos_em_form_xobject_sao_unificados():
+    # O mesmo carimbo aplicado com show_pdf_page a partir de duas aberturas do arquivo
+    # vira dois form XObjects iguais
+    carimbo = _documento_com_timbre().tobytes()
+    montado = fitz.open()
+    for _ in range(2):
+        page = montado.new_page()
+        page.show_pdf_page(fitz.Rect(0, 0, 298, 421), fitz.open("pdf", carimbo), 0)
+    dados = montado.tobytes()
+    original = fitz.open("pdf", dados)
+    doc = fitz.open("pdf", dados)
+
+    relatorio = compactar_recursos(doc)
+
+    assert relatorio["formularios"]["objetos"] >= 1
+    assert _objetos_apos_salvar(doc) < _objetos_apos_salvar(original)
+    compactado = fitz.open("pdf", doc.tobytes(garbage=4, deflate=True))
+    assert _renderizacoes(compactado) == _renderizacoes(original)
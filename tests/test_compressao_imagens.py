@@ -0,0 +1,65 @@
+import random
+
+import fitz
+
+from compressao_imagens import comprimir_imagens
+
+
+def _amostras(largura, altura, componentes, semente):
+    gerador = random.Random(semente)
+    return bytes(min(255, (x + y) // 2 + gerador.randrange(40))
+                 for y in range(altura) for x in range(largura) for _ in range(componentes))
+
+
+def _documento_com_mascara():
+    # Uma foto sem máscara e uma com transparência (o PyMuPDF grava o alfa como /SMask)
+    doc = fitz.open()
+    page = doc.new_page()
+    foto = fitz.Pixmap(fitz.csGRAY, 256, 256, _amostras(256, 256, 1, 1), False)
+    page.insert_image(fitz.Rect(72, 72, 272, 272), pixmap=foto)
+    com_alfa = fitz.Pixmap(fitz.Pixmap(fitz.csRGB, 256, 256, _amostras(256, 256, 3, 2), False), 1)
+    com_alfa.set_alpha(_amostras(256, 256, 1, 3))
+    page.insert_image(fitz.Rect(72, 300, 272, 500), pixmap=com_alfa)
+    return fitz.open("pdf", doc.tobytes(deflate=True))
+
+
+def _imagens(doc):
+    return {xref: doc.xref_get_key(xref, "SMask") for xref in range(1, doc.xref_length())
+            if doc.xref_get_key(xref, "Subtype")[1] == "/Image"}
+
+
+def test_mascaras_nao_sao_recomprimidas():
+    doc = _documento_com_mascara()
+    imagens = _imagens(doc)
+    mascaras = {int(valor.split()[0]) for tipo, valor in imagens.values() if tipo == "xref"}
+    assert len(imagens) == 3 and len(mascaras) == 1
+    brutos = {xref: doc.xref_stream_raw(xref) for xref in imagens}
+
+    relatorio = comprimir_imagens(doc, workers=2)
+
+    for xref in imagens:
+        com_mascara = imagens[xref][0] == "xref"
+        if xref in mascaras or com_mascara:
+            # Máscara e imagem mascarada ficam intactas: JPEG na máscara deixaria halos
+            assert doc.xref_stream_raw(xref) == brutos[xref]
+        else:
+            assert doc.xref_get_key(xref, "Filter")[1] == "/DCTDecode"
+    assert relatorio["cinza"]["imagens"] == 1
+    assert relatorio["outras"]["imagens"] == 2
+
+
+def test_imagem_referenciada_por_mask_fica_intacta():
+    doc = fitz.open()
+    page = doc.new_page()
+    for posicao, semente in enumerate((4, 5)):
+        foto = fitz.Pixmap(fitz.csGRAY, 256, 256, _amostras(256, 256, 1, semente), False)
+        page.insert_image(fitz.Rect(72, 72 + 250 * posicao, 272, 272 + 250 * posicao), pixmap=foto)
+    doc = fitz.open("pdf", doc.tobytes(deflate=True))
+    mascara, mascarada = sorted(_imagens(doc))
+    # A segunda imagem usa a primeira como /Mask explícita
+    doc.xref_set_key(mascarada, "Mask", f"{mascara} 0 R")
+    bruto = doc.xref_stream_raw(mascara)
+
+    relatorio = comprimir_imagens(doc, workers=1)
+    assert doc.xref_stream_raw(mascara) == bruto
+    assert relatorio["outras"]["imagens"] == 2
@@ -0,0 +1,42 @@
+from detectores import localizar_identificadores
+
+CPF_VALIDO = "52998224725"   # 11 dígitos: formato de CPF, PIS e CNH; só o CPF é válido
+CNH_VALIDA = "92140385100"   # idem; só a CNH é válida
+
+
+def _palavras(*textos):
+    # Uma palavra por linha, empilhadas na página
+    return [(72, 100 + 20 * i, 200, 112 + 20 * i, texto, i, 0, 0) for i, texto in enumerate(textos)]
+
+
+def _linhas_redigidas(rects):
+    return sorted(round((r.y0 - 100) / 20) for r in rects)
+
+
+def test_trecho_com_formato_de_varios_tipos_vale_por_qualquer_um_valido():
+    palavras = _palavras(CPF_VALIDO, CNH_VALIDA)
+    estatisticas = {}
+    rects = localizar_identificadores(palavras, ("cpf", "cnh"), estatisticas=estatisticas)
+    assert _linhas_redigidas(rects) == [0, 1]
+    assert estatisticas == {"cpf": {"validos": 1, "invalidos": 1}, "cnh": {"validos": 1, "invalidos": 1}}
+
+
+def test_tipo_nao_habilitado_nao_valida_o_trecho():
+    palavras = _palavras(CPF_VALIDO, CNH_VALIDA)
+    assert _linhas_redigidas(localizar_identificadores(palavras, ("cpf",), politica="validos")) == [0]
+    assert _linhas_redigidas(localizar_identificadores(palavras, ("cnh",), politica="validos")) == [1]
+
+
+def test_politica_todos_redige_o_formato_mesmo_invalido():
+    palavras = _palavras("12345678901")
+    assert localizar_identificadores(palavras, ("cpf", "cnh"), politica="validos") == []
+    assert _linhas_redigidas(localizar_identificadores(palavras, ("cpf", "cnh"), politica="todos")) == [0]
+    # "todos" é o padrão: o formato basta para a redação
+    assert _linhas_redigidas(localizar_identificadores(palavras, ("cpf", "cnh"))) == [0]
+
+
+def test_cpf_pontuado_nao_casa_com_cnh():
+    # A CNH só tem o formato de 11 dígitos seguidos: o CPF pontuado só conta como CPF
+    estatisticas = {}
+    localizar_identificadores(_palavras("529.982.247-25"), ("cpf", "cnh"), estatisticas=estatisticas)
+    assert estatisticas == {"cpf": {"validos": 1, "invalidos": 0}}
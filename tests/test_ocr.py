@@ -0,0 +1,90 @@
+import shutil
+
+import fitz
+
+import ocr
+import ocr_tesseract
+from anonymizer import detector_cpf, mapear_palavras
+from redaction_engine import redigir_documento
+
+
+def _pagina_mista(caminho):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 50), "CPF do autor 529.982.247-25, texto nativo acima do mínimo de caracteres")
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64))
+    pix.clear_with(200)
+    page.insert_image(fitz.Rect(0, 100, 595, 800), pixmap=pix)
+    doc.save(caminho)
+    doc.close()
+
+
+def test_pagina_mista_mantem_palavras_nativas(tmp_path, monkeypatch):
+    entrada = str(tmp_path / "mista.pdf")
+    _pagina_mista(entrada)
+
+    def motor_falso(motor, input_file, output_file, *args, **kwargs):
+        shutil.copyfile(input_file, output_file)
+        return [[(10, 300, 80, 310, "111.444.777-35", 0, 0, 0)]]
+
+    monkeypatch.setattr(ocr, "executar_motor_ocr", motor_falso)
+    resultado = ocr.executar_ocr_por_pagina(entrada, str(tmp_path / "ocr.pdf"), motor="tesseract")
+
+    texto, _ = mapear_palavras(resultado["palavras"][0])
+    assert "529.982.247-25" in texto.split("\n")[0]
+    # As palavras do OCR ficam numa linha própria, depois das nativas
+    assert texto.split("\n")[-1] == "111.444.777-35"
+
+
+def test_cpf_digitalizado_pequeno_em_pagina_de_texto_e_redigido(tmp_path, monkeypatch):
+    entrada = str(tmp_path / "texto_com_recorte.pdf")
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 50), "Declaração com camada de texto digital, sem identificadores")
+    # Recorte digitalizado de um documento: bem menos que metade da página
+    pix = fitz.Pixmap(fitz.csRGB, 64, 16, bytes(range(256)) * 12, False)
+    page.insert_image(fitz.Rect(50, 200, 250, 250), pixmap=pix)
+    doc.save(entrada)
+    doc.close()
+
+    with fitz.open(entrada) as doc:
+        assert ocr.classificar_pagina(doc[0]) == "mista"
+
+    enviados = []
+
+    def motor_falso(motor, input_file, output_file, *args, **kwargs):
+        enviados.append(input_file)
+        shutil.copyfile(input_file, output_file)
+        return [[(60, 215, 200, 235, "529.982.247-25", 0, 0, 0)]]
+
+    monkeypatch.setattr(ocr, "executar_motor_ocr", motor_falso)
+    saida = str(tmp_path / "ocr.pdf")
+    resultado = ocr.executar_ocr_por_pagina(entrada, saida, motor="tesseract")
+    assert enviados and resultado["paginas_ocr"] == 1
+
+    with fitz.open(saida) as doc:
+        assert redigir_documento(doc, [detector_cpf], palavras_por_pagina=resultado["palavras"]) == 1
+        # Os pixels da imagem sob a caixa do CPF são apagados
+        assert doc[0].get_pixmap(clip=fitz.Rect(62, 217, 198, 233)).is_unicolor
+
+
+def test_limiar_de_cobertura_e_opcional(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 50), "Página de texto com um logotipo pequeno no rodapé")
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8))
+    pix.clear_with(100)
+    page.insert_image(fitz.Rect(500, 780, 540, 820), pixmap=pix)
+    assert ocr.classificar_pagina(page) == "mista"
+    assert ocr.classificar_pagina(page, area_minima_imagem=0.5) == "texto"
+
+
+def test_pool_do_tesseract_recriado_com_outro_tamanho():
+    try:
+        pool = ocr_tesseract._obter_pool(1)
+        assert ocr_tesseract._obter_pool(1) is pool
+        maior = ocr_tesseract._obter_pool(2)
+        assert maior is not pool and maior._max_workers == 2
+    finally:
+        ocr_tesseract.encerrar_pool()
+    assert ocr_tesseract._pool is None
@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import fitz
+
+import ocr
+import pipeline
+from cache_resultados import CacheResultados
+
+
+def _documento(caminho, imagem=False):
+    doc = fitz.open()
+    page = doc.new_page()
+    if imagem:
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 32, 32))
+        pix.clear_with(180)
+        page.insert_image(page.rect, pixmap=pix)
+    else:
+        page.insert_text((72, 72), "CPF do requerente 529.982.247-25")
+    doc.save(caminho)
+    doc.close()
+
+
+def _processar(tmp_path, entrada, etapas, **opcoes):
+    cache = CacheResultados(str(tmp_path / "cache"))
+    opcoes = dict(pipeline.OPCOES_PADRAO, pasta_rascunho=str(tmp_path), **opcoes)
+    pasta_saida = str(tmp_path / "saida")
+    os.makedirs(pasta_saida, exist_ok=True)
+    resumo = pipeline.processar_arquivo(entrada, pasta_saida, etapas, opcoes=opcoes, cache=cache)
+    return resumo, [nome for nome in os.listdir(cache.pasta) if nome.endswith(".pdf")]
+
+
+def test_sem_ghostscript_nao_guarda_no_cache(tmp_path, monkeypatch):
+    entrada = str(tmp_path / "entrada.pdf")
+    _documento(entrada)
+    monkeypatch.setattr(pipeline, "abrir_compressor", lambda *args, **kwargs: None)
+    resumo, guardados = _processar(tmp_path, entrada, {"ocr": None, "auto": True, "manual": False, "comp": True})
+    assert resumo["redacoes"] >= 1
+    assert guardados == []
+
+
+def test_motor_ocr_substituido_nao_guarda_no_cache(tmp_path, monkeypatch):
+    entrada = str(tmp_path / "digitalizado.pdf")
+    _documento(entrada, imagem=True)
+    monkeypatch.setattr(ocr, "resolver_tessdata", lambda avisar=None: None)
+    monkeypatch.setattr(ocr, "executar_ocr", lambda entrada, saida, *args, **kwargs: shutil.copyfile(entrada, saida))
+    etapas = {"ocr": "grayscale", "auto": True, "manual": False, "comp": False}
+
+    _, guardados = _processar(tmp_path, entrada, etapas, motor_ocr="tesseract")
+    assert guardados == []
+    # Com o motor pedido de fato usado, o resultado vai para o cache
+    _, guardados = _processar(tmp_path, entrada, etapas, motor_ocr="ocrmypdf")
+    assert len(guardados) == 1
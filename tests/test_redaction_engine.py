@@ -0,0 +1,129 @@
+import random
+
+import fitz
+import pytest
+
+from anonymizer import detector_cpf
+from metricas import MetricasArquivo
+import redaction_engine
+from redaction_engine import FOLGA_FUSAO, coalescer_retangulos, opcoes_redacao, pode_conter_identificador, \
+    redigir_pagina
+
+
+def _cobre(resultado, rects):
+    # Cada retângulo de entrada fica inteiro dentro de algum da saída: a área coberta não diminui
+    return all(any(saida.contains(fitz.Rect(r)) for saida in resultado) for r in rects if not fitz.Rect(r).is_empty)
+
+
+def _pagina_com_sombreamento(doc):
+    # Sombreamento (operador sh) recortado ao quadrado (100, 642)-(200, 742)
+    page = doc.new_page()
+    sombreamento = doc.get_new_xref()
+    doc.update_object(sombreamento, "<< /ShadingType 2 /ColorSpace /DeviceGray /Coords [0 0 1 0] "
+                                    "/Function << /FunctionType 2 /Domain [0 1] /C0 [0] /C1 [1] /N 1 >> >>")
+    conteudo = doc.get_new_xref()
+    doc.update_object(conteudo, "<<>>")
+    doc.update_stream(conteudo, b"q 100 0 0 100 100 100 cm 0 0 1 1 re W n /Sh1 sh Q")
+    doc.xref_set_key(page.xref, "Resources", f"<< /Shading << /Sh1 {sombreamento} 0 R >> >>")
+    doc.xref_set_key(page.xref, "Contents", f"{conteudo} 0 R")
+    return doc[page.number]
+
+
+def test_vetor_tocado_remove_se_tocado():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.draw_rect(fitz.Rect(100, 100, 200, 120), fill=(0, 0, 0))
+    # O retângulo só encosta no fim do traço: não o cobre, mas toca
+    assert opcoes_redacao(page, [fitz.Rect(190, 110, 260, 130)])["graphics"] == \
+        fitz.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED
+    assert opcoes_redacao(page, [fitz.Rect(300, 300, 310, 310)])["graphics"] == fitz.PDF_REDACT_LINE_ART_NONE
+
+
+def test_sombreamento_conta_como_vetor():
+    page = _pagina_com_sombreamento(fitz.open())
+    assert opcoes_redacao(page, [fitz.Rect(150, 700, 160, 710)])["graphics"] == \
+        fitz.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED
+
+
+@pytest.mark.parametrize("rects, esperados", [
+    # contido em outro
+    ([(10, 10, 100, 20), (20, 11, 50, 19)], [(10, 10, 100, 20)]),
+    # sobreposto na mesma linha
+    ([(10, 10, 60, 20), (50, 10, 120, 20)], [(10, 10, 120, 20)]),
+    # separados por exatamente FOLGA_FUSAO
+    ([(10, 10, 60, 20), (60 + FOLGA_FUSAO, 10, 120, 20)], [(10, 10, 120, 20)]),
+    # folga maior: continuam dois
+    ([(10, 10, 60, 20), (62 + FOLGA_FUSAO, 10, 120, 20)], [(10, 10, 60, 20), (62 + FOLGA_FUSAO, 10, 120, 20)]),
+    # linhas diferentes encostadas não são fundidas
+    ([(10, 10, 60, 20), (10, 20, 60, 30)], [(10, 10, 60, 20), (10, 20, 60, 30)]),
+    # repetido e vazio
+    ([(10, 10, 60, 20), (10, 10, 60, 20), (5, 5, 5, 9)], [(10, 10, 60, 20)]),
+])
+def test_coalescer_casos(rects, esperados):
+    resultado = coalescer_retangulos(rects)
+    assert sorted(tuple(r) for r in resultado) == sorted(tuple(float(v) for v in e) for e in esperados)
+    assert _cobre(resultado, rects)
+
+
+def test_coalescer_nunca_reduz_a_area():
+    sorteio = random.Random(23)
+    for _ in range(200):
+        rects = []
+        for _ in range(sorteio.randint(1, 40)):
+            x0, y0 = sorteio.uniform(0, 500), sorteio.choice([100, 112, 124]) + sorteio.uniform(-4, 4)
+            rects.append((x0, y0, x0 + sorteio.uniform(0, 80), y0 + sorteio.uniform(0, 14)))
+        resultado = coalescer_retangulos(rects)
+        assert _cobre(resultado, rects)
+        assert len(resultado) <= len(rects)
+        # Nenhum retângulo da saída fica contido em outro
+        assert not any(a is not b and a.contains(b) for a in resultado for b in resultado)
+
+
+def _palavras(*textos):
+    return [(0, 0, 10, 10, texto, 0, 0, i) for i, texto in enumerate(textos)]
+
+
+@pytest.mark.parametrize("textos", [
+    ("123.456.789-09",),
+    ("CPF:", "123.456.", "789-09"),
+    ("123", "456", "789", "09"),
+    ("123.456.789", "–", "09"),
+    ("123.456.789-", "09", "fim"),
+])
+def test_prefiltro_junta_trecho_partido_em_palavras(textos):
+    assert pode_conter_identificador(_palavras(*textos), 11)
+
+
+@pytest.mark.parametrize("textos", [
+    ("123.456.789",),                            # 9 dígitos
+    ("Processo", "123.456", "folha", "789-09"),  # palavra no meio quebra o trecho
+    ("12/34/56", "7", "de", "8901"),
+])
+def test_prefiltro_descarta_trechos_curtos(textos):
+    assert not pode_conter_identificador(_palavras(*textos), 11)
+
+
+def test_prefiltro_sem_minimo_nao_pula():
+    assert pode_conter_identificador([], 0)
+
+
+def test_cpf_partido_entre_linhas_nao_e_pulado():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 100), "Inscrita no CPF sob o 123.456.789-")
+    page.insert_text((72, 114), "09, residente nesta cidade")
+    metricas = MetricasArquivo()
+    assert redigir_pagina(page, [detector_cpf], metricas=metricas) >= 1
+    assert metricas.contadores.get("paginas_puladas", 0) == 0
+    assert "789" not in page.get_text()
+
+
+def test_pymupdf_sem_opcao_de_texto_ainda_remove_o_cpf(monkeypatch):
+    # Versões do PyMuPDF sem PDF_REDACT_TEXT_REMOVE: o argumento text não é passado
+    monkeypatch.setattr(redaction_engine, "_TEXTO_REMOVIDO", None)
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "CPF 529.982.247-25")
+    assert "text" not in opcoes_redacao(page, [fitz.Rect(72, 60, 200, 76)])
+    assert redigir_pagina(page, [detector_cpf]) == 1
+    assert "529.982.247-25" not in page.get_text()
@@ -0,0 +1,101 @@
+import threading
+
+import fitz
+import pytest
+
+from anonymizer import anonymize_pdf, detector_cpf
+from redaction_engine import redigir_pdf
+from streaming import copiar_janela, processar_em_janelas
+
+
+def _documento(caminho, paginas=25, link=False):
+    doc = fitz.open()
+    for i in range(paginas):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Página {i + 1}: CPF 529.982.247-25")
+    doc.set_metadata({"title": "Processo 123", "author": "Vara Cível"})
+    doc.set_toc([[1, "Petição", 1], [2, "Documentos", 12], [1, "Sentença", 24]])
+    if link:
+        doc[0].insert_link({"kind": fitz.LINK_GOTO, "from": fitz.Rect(72, 400, 200, 420), "page": paginas - 1})
+    doc.save(caminho)
+    doc.close()
+
+
+def _estrutura(caminho):
+    with fitz.open(caminho) as doc:
+        return doc.get_toc(), doc.metadata["title"], doc.metadata["author"], len(doc)
+
+
+def test_janelas_preservam_sumario_e_metadados(tmp_path):
+    entrada = str(tmp_path / "entrada.pdf")
+    _documento(entrada)
+    inteiro, janelas = str(tmp_path / "inteiro.pdf"), str(tmp_path / "janelas.pdf")
+    anonymize_pdf(entrada, inteiro)
+    anonymize_pdf(entrada, janelas, janela_paginas=10)
+    assert _estrutura(janelas) == _estrutura(inteiro)
+    assert _estrutura(janelas)[0] == [[1, "Petição", 1], [2, "Documentos", 12], [1, "Sentença", 24]]
+
+    redigido, redigido_janelas = str(tmp_path / "redigido.pdf"), str(tmp_path / "redigido_janelas.pdf")
+    redigir_pdf(entrada, redigido, [detector_cpf])
+    redigir_pdf(entrada, redigido_janelas, [detector_cpf], janela_paginas=10, compactar_janelas=True)
+    assert _estrutura(redigido_janelas) == _estrutura(redigido) == _estrutura(inteiro)
+
+
+def test_janelas_com_links_processam_documento_inteiro(tmp_path):
+    entrada, saida = str(tmp_path / "entrada.pdf"), str(tmp_path / "saida.pdf")
+    _documento(entrada, link=True)
+    anonymize_pdf(entrada, saida, janela_paginas=10)
+    with fitz.open(saida) as doc:
+        # O link da página 1 para a última atravessa as janelas
+        assert [link["page"] for link in doc[0].get_links()] == [24]
+        assert "529.982.247-25" not in doc[24].get_text()
+
+
+@pytest.mark.parametrize("janela, progresso", [(1, list(range(1, 26))), (7, [7, 14, 21, 25]),
+                                               (25, [25]), (40, [25])])
+def test_limites_das_janelas(tmp_path, janela, progresso):
+    entrada, saida = str(tmp_path / "entrada.pdf"), str(tmp_path / "saida.pdf")
+    _documento(entrada)
+    janelas, reportado = [], []
+
+    def gerar_janela(source_doc, inicio, fim):
+        janelas.append((inicio, fim))
+        return copiar_janela(source_doc, inicio, fim)
+
+    total = processar_em_janelas(entrada, saida, gerar_janela, janela,
+                                 progress_callback=lambda feitas, _: reportado.append(feitas))
+    assert total == 25 and reportado == progresso
+    # Janelas contíguas, sem sobreposição nem lacuna
+    assert [inicio for inicio, _ in janelas] == [0] + [fim for _, fim in janelas[:-1]]
+    with fitz.open(saida) as doc:
+        assert [page.get_text().split(":")[0] for page in doc] == [f"Página {i + 1}" for i in range(25)]
+
+
+def test_janela_invalida(tmp_path):
+    entrada = str(tmp_path / "entrada.pdf")
+    _documento(entrada)
+    with pytest.raises(ValueError):
+        processar_em_janelas(entrada, str(tmp_path / "saida.pdf"), copiar_janela, 0)
+
+
+def test_cancelamento_entre_janelas_corta_o_sumario(tmp_path):
+    entrada, saida = str(tmp_path / "entrada.pdf"), str(tmp_path / "saida.pdf")
+    _documento(entrada)
+    cancelar = threading.Event()
+    total = processar_em_janelas(entrada, saida, copiar_janela, 10, cancel_event=cancelar,
+                                 progress_callback=lambda feitas, _: feitas >= 20 and cancelar.set())
+    assert total == 20
+    with fitz.open(saida) as doc:
+        assert len(doc) == 20
+        # "Sentença" apontava para a página 24, que não foi gravada
+        assert doc.get_toc() == [[1, "Petição", 1], [2, "Documentos", 12]]
+
+
+def test_redacao_em_janelas_conta_o_mesmo_que_inteira(tmp_path):
+    entrada = str(tmp_path / "entrada.pdf")
+    _documento(entrada)
+    inteira = redigir_pdf(entrada, str(tmp_path / "inteira.pdf"), [detector_cpf])
+    em_janelas = redigir_pdf(entrada, str(tmp_path / "janelas.pdf"), [detector_cpf], janela_paginas=7)
+    assert inteira == em_janelas == 25
+    with fitz.open(str(tmp_path / "janelas.pdf")) as doc:
+        assert not any("529.982.247-25" in page.get_text() for page in doc)
@@ -0,0 +1,82 @@
+import pytest
+
+from validacao import validar_cnhs, validar_cnpjs, validar_cpfs, validar_pis, validar_titulos_eleitor
+
+
+def test_cpf_amostras_publicadas():
+    candidatos = ["529.982.247-25", "111.444.777-35", "52998224725", "529 982 247 25"]
+    assert validar_cpfs(candidatos).tolist() == [True] * len(candidatos)
+
+
+@pytest.mark.parametrize("cpf", [
+    "529.982.247-26",  # 2º dígito errado
+    "529.982.247-15",  # 1º dígito errado
+    "111.111.111-11",  # sequência repetida (passa no módulo 11)
+    "000.000.000-00",
+    "529.982.247-2",   # 10 dígitos
+])
+def test_cpf_invalido(cpf):
+    assert validar_cpfs([cpf]).tolist() == [False]
+
+
+def test_cpf_lote_misto_mantem_a_ordem():
+    assert validar_cpfs(["111.444.777-35", "123.456.789-00", "529.982.247-25"]).tolist() == [True, False, True]
+    assert validar_cpfs([]).tolist() == []
+
+
+@pytest.mark.parametrize("titulo", [
+    "0762 7912 0205",  # MG, resto do 1º dígito 0 vindo de 10: continua 0
+    "001538900108",    # SP, resto 10 no 1º dígito
+    "940627540205",    # MG, resto 10 no 1º dígito
+    "600685020116",    # SP, resto 0 no 1º dígito: vira 1
+    "510913660213",    # MG, resto 0 no 1º dígito: vira 1
+    "287468110590",    # RJ
+    "866147461325",    # UF 13
+])
+def test_titulo_eleitor_valido(titulo):
+    assert validar_titulos_eleitor([titulo]).tolist() == [True]
+
+
+@pytest.mark.parametrize("titulo", [
+    "076279120215",    # MG com o 0 trocado por 1 (regra de SP/MG aplicada depois do 10 -> 0)
+    "600685020106",    # SP sem a troca do resto 0 por 1
+    "287468110591",    # 2º dígito errado
+    "287468119990",    # UF 99
+    "28746811059",     # 11 dígitos
+])
+def test_titulo_eleitor_invalido(titulo):
+    assert validar_titulos_eleitor([titulo]).tolist() == [False]
+
+
+@pytest.mark.parametrize("cnh", [
+    "92140385100",     # desconto: 1 - 2 = -1 -> 10 -> 0
+    "75376782009",     # desconto: 0 - 2 = -2 -> 9
+    "16172086100",     # desconto: 2 - 2 = 0
+    "23726374108",     # desconto: 10 - 2 = 8
+    "57054329550",     # sem desconto, resto 10 -> 0
+    "39211421604",     # sem desconto
+])
+def test_cnh_valida(cnh):
+    assert validar_cnhs([cnh]).tolist() == [True]
+
+
+@pytest.mark.parametrize("cnh", [
+    "92140385109",     # 2º dígito errado
+    "75376782000",
+    "39211421605",
+    "11111111111",
+])
+def test_cnh_invalida(cnh):
+    assert validar_cnhs([cnh]).tolist() == [False]
+
+
+def test_cnpj():
+    validos = ["11.222.333/0001-81", "11.444.777/0001-61", "11444777000161"]
+    invalidos = ["11.222.333/0001-82", "11.222.333/0001-71", "00.000.000/0000-00", "11.222.333/0001-8"]
+    assert validar_cnpjs(validos + invalidos).tolist() == [True] * 3 + [False] * 4
+
+
+def test_pis():
+    validos = ["120.56377.88-0", "12345678900"]
+    invalidos = ["120.56377.88-1", "111.11111.11-1", "120.56377.88"]
+    assert validar_pis(validos + invalidos).tolist() == [True] * 2 + [False] * 3
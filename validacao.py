@@ -0,0 +1,136 @@
+# validacao.py
+# ------------------------------------------------------------------
+# Validação de dígitos verificadores, vetorizada com NumPy: todos os
+# candidatos de uma página são conferidos de uma vez, antes de qualquer
+# mapeamento para coordenadas, para descartar números que só têm o
+# formato de um documento (processos, telefones, códigos de barras).
+# ------------------------------------------------------------------
+
+import re
+
+import numpy as np
+
+_NAO_DIGITO = re.compile(r"\D")
+
+# Pesos do módulo 11 do CPF: 10..2 para o 1º dígito verificador, 11..2 para o 2º
+_PESOS_CPF_DV1 = np.arange(10, 1, -1)
+_PESOS_CPF_DV2 = np.arange(11, 1, -1)
+
+
+def matriz_de_digitos(candidatos, tamanho: int):
+    """
+    Converte os candidatos (texto com pontuação/espaços) em uma matriz
+    (n, tamanho) de dígitos. Retorna (matriz, com_tamanho_certo): linhas
+    de candidatos com outra quantidade de dígitos ficam zeradas.
+    """
+    somente_digitos = [_NAO_DIGITO.sub("", c) for c in candidatos]
+    com_tamanho_certo = np.array([len(d) == tamanho for d in somente_digitos], dtype=bool)
+    bruto = "".join(d if len(d) == tamanho else "0" * tamanho for d in somente_digitos)
+    matriz = (np.frombuffer(bruto.encode("ascii"), dtype=np.uint8) - ord("0")).reshape(-1, tamanho)
+    return matriz.astype(np.int32), com_tamanho_certo
+
+
+def _digito_mod11(parcial, pesos):
+    resto = (parcial @ pesos) * 10 % 11
+    return np.where(resto == 10, 0, resto)
+
+
+def validar_cpfs(candidatos) -> np.ndarray:
+    """
+    Confere os dois dígitos verificadores (módulo 11) de cada candidato e
+    rejeita sequências de um dígito só (000.000.000-00, 111...).
+    Retorna um array de bool, um por candidato.
+    """
+    if not candidatos:
+        return np.zeros(0, dtype=bool)
+    digitos, validos = matriz_de_digitos(candidatos, 11)
+    validos &= _digito_mod11(digitos[:, :9], _PESOS_CPF_DV1) == digitos[:, 9]
+    validos &= _digito_mod11(digitos[:, :10], _PESOS_CPF_DV2) == digitos[:, 10]
+    validos &= ~(digitos == digitos[:, :1]).all(axis=1)
+    return validos
+
+
+def _digito_mod11_complemento(parcial, pesos):
+    # Regra usada por CNPJ e PIS: dígito = 11 - (soma % 11); resultados 10 e 11 viram 0
+    digito = 11 - (parcial @ pesos) % 11
+    return np.where(digito >= 10, 0, digito)
+
+
+_PESOS_CNPJ_DV1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_PESOS_CNPJ_DV2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def validar_cnpjs(candidatos) -> np.ndarray:
+    """Confere os dois dígitos verificadores do CNPJ (14 dígitos) e rejeita sequências repetidas."""
+    if not candidatos:
+        return np.zeros(0, dtype=bool)
+    digitos, validos = matriz_de_digitos(candidatos, 14)
+    validos &= _digito_mod11_complemento(digitos[:, :12], _PESOS_CNPJ_DV1) == digitos[:, 12]
+    validos &= _digito_mod11_complemento(digitos[:, :13], _PESOS_CNPJ_DV2) == digitos[:, 13]
+    validos &= ~(digitos == digitos[:, :1]).all(axis=1)
+    return validos
+
+
+_PESOS_PIS = np.array([3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def validar_pis(candidatos) -> np.ndarray:
+    """Confere o dígito verificador do PIS/PASEP/NIS/NIT (11 dígitos) e rejeita sequências repetidas."""
+    if not candidatos:
+        return np.zeros(0, dtype=bool)
+    digitos, validos = matriz_de_digitos(candidatos, 11)
+    validos &= _digito_mod11_complemento(digitos[:, :10], _PESOS_PIS) == digitos[:, 10]
+    validos &= ~(digitos == digitos[:, :1]).all(axis=1)
+    return validos
+
+
+_PESOS_CNH_DV1 = np.arange(9, 0, -1)
+_PESOS_CNH_DV2 = np.arange(1, 10)
+
+
+def validar_cnhs(candidatos) -> np.ndarray:
+    """
+    Confere os dígitos verificadores do número de registro da CNH (11 dígitos):
+    1º = soma com pesos 9..1 mod 11 (10 vira 0 e desconta 2 do 2º);
+    2º = soma com pesos 1..9 mod 11 menos o desconto (negativo soma 11; 10 vira 0).
+    """
+    if not candidatos:
+        return np.zeros(0, dtype=bool)
+    digitos, validos = matriz_de_digitos(candidatos, 11)
+    resto1 = (digitos[:, :9] @ _PESOS_CNH_DV1) % 11
+    desconto = np.where(resto1 >= 10, 2, 0)
+    dv1 = np.where(resto1 >= 10, 0, resto1)
+    resto2 = (digitos[:, :9] @ _PESOS_CNH_DV2) % 11 - desconto
+    resto2 = np.where(resto2 < 0, resto2 + 11, resto2)
+    dv2 = np.where(resto2 >= 10, 0, resto2)
+    validos &= (dv1 == digitos[:, 9]) & (dv2 == digitos[:, 10])
+    validos &= ~(digitos == digitos[:, :1]).all(axis=1)
+    return validos
+
+
+_PESOS_TITULO_DV1 = np.arange(2, 10)
+_PESOS_TITULO_DV2 = np.array([7, 8, 9])
+
+
+def validar_titulos_eleitor(candidatos) -> np.ndarray:
+    """
+    Confere o título de eleitor (12 dígitos: 8 sequenciais, 2 da UF, 2 verificadores).
+    UF entre 01 e 28; resto 10 vira 0 para todas e, só para SP (01) e MG (02),
+    resto 0 vira 1 (o 0 que veio de um resto 10 continua 0).
+    """
+    if not candidatos:
+        return np.zeros(0, dtype=bool)
+    digitos, validos = matriz_de_digitos(candidatos, 12)
+    uf = digitos[:, 8] * 10 + digitos[:, 9]
+    sp_ou_mg = (uf == 1) | (uf == 2)
+
+    def _ajustar(resto):
+        # A regra de SP/MG olha o resto original, antes do 10 -> 0
+        digito = np.where(sp_ou_mg & (resto == 0), 1, resto)
+        return np.where(resto == 10, 0, digito)
+
+    dv1 = _ajustar((digitos[:, :8] @ _PESOS_TITULO_DV1) % 11)
+    dv2 = _ajustar((np.column_stack([digitos[:, 8], digitos[:, 9], dv1]) @ _PESOS_TITULO_DV2) % 11)
+    validos &= (uf >= 1) & (uf <= 28)
+    validos &= (dv1 == digitos[:, 10]) & (dv2 == digitos[:, 11])
+    return validos